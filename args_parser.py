@@ -1,10 +1,277 @@
 import argparse
-from argparse import Namespace
+import importlib.util
+from argparse import ArgumentParser, Namespace
 
+from problem_1.transportation import ENGINES
+from solvers.backends import BACKENDS, MATRIX_BACKENDS, SolverSettings, default_backend
 
-def cli_args() -> Namespace:
+
+def _positive_int(text: str) -> int:
+    try:
+        number = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'must be a positive integer, not {text!r}') from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be a positive integer, not {number}')
+
+    return number
+
+
+def _add_solver_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument('--solver', choices=BACKENDS, default=None,
+                        help='Solver backend (defaults to $OPTIMISATION_SOLVER, then cbc)')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help='Seconds after which the best solution found so far is returned')
+    parser.add_argument('--gap-rel', type=float, default=None,
+                        help='Stop once the best solution is within this fraction of the best bound')
+    parser.add_argument('--gap-abs', type=float, default=None,
+                        help='Stop once the best solution is within this amount of the best bound')
+
+
+def _check_matrix_backend(parser: ArgumentParser, args: Namespace, what: str) -> None:
+    backend = args.solver or default_backend()
+    if backend not in MATRIX_BACKENDS:
+        parser.error(f'{what} solved with the {" or ".join(MATRIX_BACKENDS)} backends, not {backend}')
+
+
+def _check_parquet(parser: ArgumentParser, needed: bool, what: str) -> None:
+    # Found without importing it, so argument parsing stays fast
+    if needed and importlib.util.find_spec('pyarrow') is None:
+        parser.error(f'{what} need pyarrow installed (uv sync --extra parquet)')
+
+
+def _any_parquet(*file_names: str | None) -> bool:
+    return any(file_name is not None and file_name.lower().endswith('.parquet') for file_name in file_names)
+
+
+def solver_settings(args: Namespace) -> SolverSettings:
+    return SolverSettings(args.solver, args.time_limit, args.gap_rel, args.gap_abs)
+
+
+def _add_metrics_argument(parser: ArgumentParser) -> None:
+    parser.add_argument('--metrics', type=str, default=None,
+                        help='File recording the time and memory of each phase: JSON lines, or OpenMetrics text '
+                             'for .prom and .txt files')
+
+
+def _add_sensitivity_argument(parser: ArgumentParser) -> None:
+    parser.add_argument('--sensitivity', type=str, default=None,
+                        help='NPZ file to save the duals, reduced costs and ranges of the solution to, for what_if.py; '
+                             'they come from one more LP solve with CBC, whichever solver found the solution')
+
+
+def _parser() -> ArgumentParser:
     parser = argparse.ArgumentParser(description='Optimize distribution costs for a retail chain.')
-    parser.add_argument('--input-file', type=str, required=True, help='Path to the input JSON file')
+    parser.add_argument('--input-file', type=str, required=True,
+                        help='Path to the input JSON file, or a directory of arrays written by convert_network.py')
     parser.add_argument('--visualise', action='store_true', help='Visualise the results')
+    _add_metrics_argument(parser)
+
+    return parser
+
+
+def cli_args() -> Namespace:
+    parser = _parser()
+    parser.add_argument('--builder', choices=['pulp', 'matrix'], default=None,
+                        help='Build the MILP with PuLP objects or as sparse arrays written straight to MPS '
+                             '(defaults to pulp)')
+    parser.add_argument('--render-workers', type=int, default=None,
+                        help='Processes rendering GIFs with --visualise (defaults to one per CPU)')
+    parser.add_argument('--verbose', action='store_true', help='Print the whole PuLP model before solving it')
+    parser.add_argument('--engine', choices=['auto', *ENGINES], default='auto',
+                        help='Solve with the MILP solver, the transportation simplex (Vogel + MODI) or networkx; auto '
+                             'picks the transportation simplex unless a MILP option such as --builder or --solver '
+                             'is given')
+    _add_sensitivity_argument(parser)
+    _add_solver_arguments(parser)
+
+    args = parser.parse_args()
+    if args.engine == 'auto':
+        # Supply chain inputs are always transportation problems, whose integral optimum the network engines find
+        # without branch and bound, so the MILP is only kept for the options that configure it
+        milp_options = [args.builder, args.solver, args.time_limit, args.gap_rel, args.gap_abs]
+        args.engine = 'milp' if args.verbose or any(option is not None for option in milp_options) else 'modi'
+    args.builder = args.builder or 'pulp'
+    if args.builder == 'matrix' and args.engine == 'milp':
+        _check_matrix_backend(parser, args, '--builder matrix models are')
+
+    return args
+
+
+def ga_cli_args() -> Namespace:
+    parser = _parser()
+    parser.add_argument('--islands', type=int, default=1, help='Number of islands to evolve in parallel processes')
+    parser.add_argument('--migration-interval', type=int, default=500,
+                        help='Generations between elite migrations from one island to the next')
+    parser.add_argument('--history-size', type=_positive_int, default=None,
+                        help='Maximum number of fitness history entries to retain (defaults to the whole run)')
+    parser.add_argument('--plot-format', nargs='*', default=['png'], choices=['png', 'svg', 'csv', 'parquet', 'none'],
+                        help='Convergence outputs written to problem_2/outputs (none, or no formats, to disable)')
+    parser.add_argument('--initialise', choices=['random', 'vogel', 'lp'], default='random',
+                        help='Seed the initial population randomly or from a Vogel / LP relaxation transport plan')
+    parser.add_argument('--history-every', type=_positive_int, default=1,
+                        help='Record fitness history every N generations')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt mutation to the observed success rate, stop when improvements become overdue '
+                             'and restart from the elites when diversity collapses')
+    parser.add_argument('--repair', action='store_true',
+                        help='Repair every offspring into a plan that meets supply and demand before evaluating it')
+    parser.add_argument('--integer', action='store_true',
+                        help='Keep genomes integral, matching the integer routes of the LP')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        help='NPZ file the population, random state and metrics are saved to as the run goes')
+    parser.add_argument('--checkpoint-every', type=int, default=500, help='Generations between checkpoints')
+    parser.add_argument('--resume', action='store_true',
+                        help='Carry on from the --checkpoint file where the previous run stopped, if it exists')
+
+    args = parser.parse_args()
+    if 'none' in args.plot_format:
+        if len(args.plot_format) > 1:
+            parser.error('--plot-format none cannot be combined with other formats')
+        args.plot_format = []
+    _check_parquet(parser, 'parquet' in args.plot_format, 'Parquet convergence metrics')
+
+    return args
+
+
+def batch_cli_args() -> Namespace:
+    parser = argparse.ArgumentParser(description='Solve a batch of supply chain and farmers scenarios concurrently.')
+    parser.add_argument('--input', type=str, required=True,
+                        help='Directory of scenario JSON files, a JSONL file of scenarios, or - for JSONL on stdin')
+    parser.add_argument('--output', type=str, default='-', help='JSONL file to stream results to (- for stdout)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of solves to run at once')
+    parser.add_argument('--threads-per-solve', type=int, default=1, help='CBC threads given to each solve')
+    _add_solver_arguments(parser)
+    parser.add_argument('--cache', type=str, default=None,
+                        help='SQLite file of previously solved scenarios; repeated scenarios are answered from it')
+    parser.add_argument('--cache-max-entries', type=int, default=100_000, help='Maximum number of cached solutions')
+    parser.add_argument('--cache-max-age', type=float, default=None,
+                        help='Seconds after which cached solutions are discarded (defaults to never)')
+
+    return parser.parse_args()
+
+
+def planner_cli_args() -> Namespace:
+    parser = argparse.ArgumentParser(description='Plan crops across fields from columnar crop and resource tables.')
+    parser.add_argument('--options', type=str, default='farmers_problem/data/crops.csv',
+                        help='CSV, Parquet or NPZ table with one row per crop (and field) option')
+    parser.add_argument('--resources', type=str, default='farmers_problem/data/resources.csv',
+                        help='CSV, Parquet or NPZ table with one row per resource limit')
+    _add_solver_arguments(parser)
+    parser.add_argument('--stream', action='store_true', help='Print each improved solution while solving')
+    _add_sensitivity_argument(parser)
+    _add_metrics_argument(parser)
+
+    args = parser.parse_args()
+    _check_matrix_backend(parser, args, 'Crop plans are')
+    _check_parquet(parser, _any_parquet(args.options, args.resources), 'Parquet tables')
+
+    return args
+
+
+def stochastic_cli_args() -> Namespace:
+    parser = argparse.ArgumentParser(description='Plan crops for the best expected profit over yield and price '
+                                                 'scenarios.')
+    parser.add_argument('--options', type=str, default='farmers_problem/data/crops.csv',
+                        help='CSV, Parquet or NPZ table with one row per crop (and field) option')
+    parser.add_argument('--resources', type=str, default='farmers_problem/data/resources.csv',
+                        help='CSV, Parquet or NPZ table with one row per resource limit')
+    parser.add_argument('--scenarios', type=str, default=None,
+                        help='Table with one row per scenario and option: scenario, crop, and optionally field, '
+                             'probability, yield, price and demand (defaults to sampled scenarios)')
+    parser.add_argument('--scenario-resources', type=str, default=None,
+                        help='Table of the soft limits available in each scenario: scenario, resource, available')
+    parser.add_argument('--sample', type=int, default=100, help='Number of scenarios to sample without --scenarios')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the sampled scenarios')
+    parser.add_argument('--method', choices=['benders', 'extensive'], default='benders',
+                        help='Decompose with the L-shaped method or solve every scenario in one MILP')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes solving the scenario subproblems (defaults to one per CPU)')
+    parser.add_argument('--max-iterations', type=int, default=100, help='Iteration limit for the L-shaped method')
+    parser.add_argument('--tolerance', type=float, default=1e-6,
+                        help='Relative gap between the expected profit and its bound at which to stop')
+    _add_solver_arguments(parser)
+    _add_metrics_argument(parser)
+
+    args = parser.parse_args()
+    _check_matrix_backend(parser, args, 'Stochastic crop plans are')
+    _check_parquet(
+        parser, _any_parquet(args.options, args.resources, args.scenarios, args.scenario_resources), 'Parquet tables'
+    )
+
+    return args
+
+
+def milp_cli_args() -> Namespace:
+    parser = argparse.ArgumentParser(description='Solve the extended farming MILP.')
+    _add_solver_arguments(parser)
+    parser.add_argument('--stream', action='store_true', help='Print each improved solution while solving')
+    _add_metrics_argument(parser)
+
+    return parser.parse_args()
+
+
+def benchmark_cli_args() -> Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark the LP, MILP, heuristic and GA techniques.')
+    parser.add_argument('--problems', nargs='*', choices=['transportation', 'crops'],
+                        default=['transportation', 'crops'], help='Problems to benchmark')
+    parser.add_argument('--sizes', nargs='*', default=['10x10', '50x50', '100x100', '200x500'],
+                        help='Transportation sizes as WAREHOUSESxSTORES, e.g. 1000x10000')
+    parser.add_argument('--crop-sizes', nargs='*', default=['10x3', '100x3', '1000x5'],
+                        help='Crop selection sizes as CROPSxRESOURCES')
+    parser.add_argument('--techniques', nargs='*', default=None,
+                        help='Techniques to run besides the exact reference (defaults to all)')
+    _add_solver_arguments(parser)
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic instances')
+    parser.add_argument('--ga-target-gap', type=float, default=0.05,
+                        help='Relative gap to the exact optimum at which the GA counts as on target')
+    parser.add_argument('--ga-generations', type=int, default=1000, help='Generation limit for GA runs')
+    parser.add_argument('--ga-max-routes', type=int, default=2500, help='Largest instance given to the GA')
+    parser.add_argument('--output', type=str, default='benchmarks/results.jsonl',
+                        help='JSONL file the results are appended to')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Earlier results file to report regressions against')
+
+    return parser.parse_args()
+
+
+def convert_cli_args() -> Namespace:
+    parser = argparse.ArgumentParser(description='Convert a supply chain JSON file into memory-mappable arrays.')
+    parser.add_argument('--input-file', type=str, required=True, help='Path to the input JSON file')
+    parser.add_argument('--output-dir', type=str, required=True, help='Directory the .npy arrays are written to')
+
+    return parser.parse_args()
+
+
+def what_if_cli_args() -> Namespace:
+    parser = argparse.ArgumentParser(description='Answer what-if questions from a saved sensitivity index.')
+    parser.add_argument('--index', type=str, required=True, help='NPZ file written with --sensitivity')
+    parser.add_argument('--rhs', nargs=2, action='append', default=[], metavar=('CONSTRAINT', 'CHANGE'),
+                        help='Change the right-hand side of a constraint, e.g. products_to_store_S(3) 50')
+    parser.add_argument('--cost', nargs=2, action='append', default=[], metavar=('VARIABLE', 'CHANGE'),
+                        help='Change the objective coefficient of a variable, e.g. crop_amount_tomato -0.2')
+    parser.add_argument('--resolve', action='store_true',
+                        help='Re-solve every question instead of answering from the index, as MILPs need for exact '
+                             'answers')
+    _add_solver_arguments(parser)
+
+    args = parser.parse_args()
+    _check_matrix_backend(parser, args, 'Re-solved what-if questions are')
+
+    return args
+
+
+def service_cli_args() -> Namespace:
+    parser = argparse.ArgumentParser(description='Serve supply chain and farmers solves over HTTP from warm workers.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--socket', type=str, default=None, help='Listen on this Unix socket instead of a port')
+    parser.add_argument('--workers', type=int, default=None, help='Number of solves to run at once')
+    parser.add_argument('--threads-per-solve', type=int, default=1, help='CBC threads given to each solve')
+    _add_solver_arguments(parser)
+    parser.add_argument('--cache', type=str, default=None,
+                        help='SQLite file of previously solved requests; repeated requests are answered from it')
+    parser.add_argument('--grace', type=float, default=1.0,
+                        help='Seconds past a request deadline to wait for an interrupted solve to report back')
 
     return parser.parse_args()
@@ -0,0 +1,189 @@
+import contextlib
+import io
+import time
+
+import numpy as np
+from pulp import LpAffineExpression, LpBinary, LpMaximize, LpProblem, LpStatus, LpVariable, value
+
+from benchmarks.instances import CropInstance, TransportationInstance
+from farmers_problem.planner import CropPlanInputs, build_crop_model
+from problem_1.heuristics import vogel_approximation
+from problem_1.matrix import build_transportation_model, solve_matrix_model
+from problem_1.supply_chain import build_supply_chain
+from problem_1.transportation import network_simplex, transportation_simplex
+from solvers.backends import SolverSettings
+
+
+def transportation_pulp(instance: TransportationInstance, settings: SolverSettings, **_) -> dict:
+    start = time.perf_counter()
+    problem, _ = build_supply_chain(instance.to_inputs())
+    built = time.perf_counter()
+    problem.solve(settings.solver(msg=False))
+
+    return {
+        'build_seconds': built - start, 'solve_seconds': time.perf_counter() - built,
+        'status': LpStatus[problem.status], 'objective': value(problem.objective),
+    }
+
+
+def transportation_matrix(instance: TransportationInstance, settings: SolverSettings, **_) -> dict:
+    num_warehouses, num_stores = instance.costs.shape
+    start = time.perf_counter()
+    model = build_transportation_model(
+        instance.supply, instance.demand, np.repeat(np.arange(num_warehouses), num_stores),
+        np.tile(np.arange(num_stores), num_warehouses), instance.costs.ravel(), instance.warehouses, instance.stores
+    )
+    built = time.perf_counter()
+    solution = solve_matrix_model(model.matrix, settings.solver(msg=False))
+
+    return {
+        'build_seconds': built - start, 'solve_seconds': time.perf_counter() - built,
+        'status': solution.status, 'objective': solution.objective,
+    }
+
+
+def transportation_vogel(instance: TransportationInstance, **_) -> dict:
+    start = time.perf_counter()
+    plan = vogel_approximation(instance.supply, instance.demand, instance.costs)
+
+    return {
+        'build_seconds': 0.0, 'solve_seconds': time.perf_counter() - start,
+        'status': 'Feasible', 'objective': float((plan * instance.costs).sum()),
+    }
+
+
+def transportation_modi(instance: TransportationInstance, **_) -> dict:
+    start = time.perf_counter()
+    result = transportation_simplex(instance.supply, instance.demand, instance.costs)
+
+    return {
+        'build_seconds': 0.0, 'solve_seconds': time.perf_counter() - start,
+        'status': result.status, 'objective': result.objective, 'iterations': result.iterations,
+    }
+
+
+def transportation_networkx(instance: TransportationInstance, **_) -> dict:
+    start = time.perf_counter()
+    result = network_simplex(instance.supply, instance.demand, instance.costs)
+
+    return {
+        'build_seconds': 0.0, 'solve_seconds': time.perf_counter() - start,
+        'status': result.status, 'objective': result.objective,
+    }
+
+
+def transportation_ga(instance: TransportationInstance, exact: float | None = None, ga_target_gap: float = 0.05,
+                      ga_generations: int = 1000, adaptive: bool = False, repair: bool = False, **_) -> dict:
+    # The GA stack is only imported for the cases that use it
+    from leap_ec import context
+    from optimise_problem_2 import run_ga
+
+    target = None if exact is None else exact * (1 + ga_target_gap)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        best_entry = run_ga(
+            instance.supply, instance.demand, instance.costs, plot_formats=(), generations=ga_generations,
+            target_fitness=target, adaptive=adaptive, repair=repair, integer=repair
+        )
+    elapsed = time.perf_counter() - start
+    reached = target is not None and best_entry['fitness'] <= target
+
+    return {
+        'build_seconds': 0.0, 'solve_seconds': elapsed, 'status': 'Feasible', 'objective': float(best_entry['fitness']),
+        'generations': context['leap']['generation'], 'time_to_target_seconds': elapsed if reached else None,
+    }
+
+
+def transportation_ga_adaptive(instance: TransportationInstance, **options) -> dict:
+    return transportation_ga(instance, adaptive=True, **options)
+
+
+def transportation_ga_repair(instance: TransportationInstance, **options) -> dict:
+    return transportation_ga(instance, repair=True, **options)
+
+
+def build_crop_problem(instance: CropInstance) -> LpProblem:
+    crops = range(len(instance.profit))
+    resources = range(len(instance.resource_available))
+    amount = LpVariable.matrix('crop_amount', crops, 0)
+    plant = LpVariable.matrix('plant_crop', crops, cat=LpBinary)
+    overuse = LpVariable.matrix('overuse', resources, 0)
+
+    problem = LpProblem('crop_benchmark', LpMaximize)
+    problem += LpAffineExpression(
+        list(zip(amount, instance.profit.tolist())) + list(zip(plant, (-instance.setup_cost).tolist())) +
+        list(zip(overuse, (-instance.overuse_penalty).tolist()))
+    ), 'Total_Net_Profit'
+    for k in resources:
+        # Resources with a penalty are soft limits that can be exceeded at a cost
+        soft = [(overuse[k], -1.0)] if instance.overuse_penalty[k] > 0 else []
+        problem += LpAffineExpression(
+            list(zip(amount, instance.resource_use[k].tolist())) + soft
+        ) <= instance.resource_available[k], f'Resource_{k}'
+    problem += LpAffineExpression(
+        zip(plant, instance.equipment_required.tolist())
+    ) <= instance.equipment_available, 'Equipment_Limit'
+    for i in crops:
+        problem += amount[i] - instance.max_plant[i] * plant[i] <= 0, f'Link_{i}'
+
+    return problem
+
+
+def crops_pulp(instance: CropInstance, settings: SolverSettings, **_) -> dict:
+    start = time.perf_counter()
+    problem = build_crop_problem(instance)
+    built = time.perf_counter()
+    problem.solve(settings.solver(msg=False))
+
+    return {
+        'build_seconds': built - start, 'solve_seconds': time.perf_counter() - built,
+        'status': LpStatus[problem.status], 'objective': value(problem.objective),
+    }
+
+
+def crop_plan_inputs(instance: CropInstance) -> CropPlanInputs:
+    num_crops, num_resources = len(instance.profit), len(instance.resource_available)
+    resources = np.array([f'resource_{k}' for k in range(num_resources)] + ['equipment'])
+    usage = dict(zip(resources.tolist(), list(instance.resource_use) + [instance.equipment_required]))
+
+    return CropPlanInputs(
+        crops=np.array([f'crop_{i}' for i in range(num_crops)]), fields=np.full(num_crops, ''),
+        profit=instance.profit, setup_cost=instance.setup_cost, max_plant=instance.max_plant, usage=usage,
+        resources=resources, resource_fields=np.full(num_resources + 1, ''),
+        available=np.append(instance.resource_available, instance.equipment_available),
+        overuse_penalty=np.append(instance.overuse_penalty, 0.0),
+        per_planted=np.append(np.zeros(num_resources, dtype=bool), True),
+    )
+
+
+def crops_planner(instance: CropInstance, settings: SolverSettings, **_) -> dict:
+    start = time.perf_counter()
+    model = build_crop_model(crop_plan_inputs(instance))
+    built = time.perf_counter()
+    solution = solve_matrix_model(model.matrix, settings.solver(msg=False))
+
+    return {
+        'build_seconds': built - start, 'solve_seconds': time.perf_counter() - built,
+        'status': solution.status, 'objective': solution.objective,
+    }
+
+
+# The first technique of each problem is the exact reference the others are measured against
+TECHNIQUES = {
+    'transportation': {
+        'matrix': transportation_matrix,
+        'pulp': transportation_pulp,
+        'vogel': transportation_vogel,
+        'modi': transportation_modi,
+        'networkx': transportation_networkx,
+        'ga': transportation_ga,
+        'ga_adaptive': transportation_ga_adaptive,
+        'ga_repair': transportation_ga_repair,
+    },
+    'crops': {
+        'pulp': crops_pulp,
+        'planner': crops_planner,
+    },
+}
+# Techniques solving matrix models, which only the MATRIX_BACKENDS accept
+MATRIX_TECHNIQUES = {'matrix', 'planner'}
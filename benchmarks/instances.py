@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+import numpy as np
+from numpy import ndarray
+
+from problem_1.models import Inputs
+
+
+@dataclass
+class TransportationInstance:
+    supply: ndarray
+    demand: ndarray
+    costs: ndarray
+
+    @property
+    def warehouses(self) -> list[str]:
+        return [f'W{i}' for i in range(len(self.supply))]
+
+    @property
+    def stores(self) -> list[str]:
+        return [f'S{i}' for i in range(len(self.demand))]
+
+    def to_inputs(self) -> Inputs:
+        warehouses, stores = self.warehouses, self.stores
+        return Inputs(
+            supply=dict(zip(warehouses, self.supply.tolist())),
+            demand=dict(zip(stores, self.demand.tolist())),
+            costs={w: dict(zip(stores, row)) for w, row in zip(warehouses, self.costs.tolist())},
+        )
+
+
+@dataclass
+class CropInstance:
+    profit: ndarray
+    setup_cost: ndarray
+    max_plant: ndarray
+    resource_use: ndarray  # resources x crops
+    resource_available: ndarray
+    overuse_penalty: ndarray  # 0 marks a hard limit
+    equipment_required: ndarray
+    equipment_available: int
+
+
+def transportation_instance(num_warehouses: int, num_stores: int, seed: int = 0,
+                            slack: float = 1.1) -> TransportationInstance:
+    rng = np.random.default_rng(seed)
+    demand = rng.integers(10, 100, num_stores)
+    # Supply is spread unevenly over warehouses but always covers demand, so every instance is feasible
+    shares = rng.dirichlet(np.ones(num_warehouses))
+    supply = np.ceil(shares * demand.sum() * slack).astype(np.int64) + 1
+    costs = rng.integers(1, 100, (num_warehouses, num_stores))
+
+    return TransportationInstance(supply, demand, costs)
+
+
+def crop_instance(num_crops: int, num_resources: int = 3, seed: int = 0) -> CropInstance:
+    rng = np.random.default_rng(seed)
+    max_plant = rng.integers(1000, 4000, num_crops).astype(np.float64)
+    resource_use = rng.uniform(0.5, 1.5, (num_resources, num_crops))
+    # Resources are tight enough that only part of the crops can be planted at full size
+    resource_available = np.round(0.4 * resource_use @ max_plant)
+    overuse_penalty = np.zeros(num_resources)
+    overuse_penalty[1 % num_resources] = 2.0
+
+    return CropInstance(
+        profit=np.round(rng.uniform(1.0, 2.0, num_crops), 2),
+        setup_cost=rng.integers(200, 1000, num_crops).astype(np.float64),
+        max_plant=max_plant,
+        resource_use=resource_use,
+        resource_available=resource_available,
+        overuse_penalty=overuse_penalty,
+        equipment_required=rng.integers(0, 2, num_crops),
+        equipment_available=max(1, num_crops // 4),
+    )
@@ -0,0 +1,30 @@
+import json
+
+METRICS = ['build_seconds', 'solve_seconds', 'peak_memory_bytes', 'gap', 'time_to_target_seconds']
+
+
+def load_results(file_name: str) -> list[dict]:
+    with open(file_name) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _key(record: dict) -> tuple:
+    return record['problem'], record['size'], record['technique'], record['solver']
+
+
+def compare_results(previous: list[dict], current: list[dict], tolerance: float = 0.2) -> list[str]:
+    # Later records win, so a file holding several runs is compared against its most recent one
+    baseline = {_key(record): record for record in previous}
+    regressions = []
+    for record in current:
+        before = baseline.get(_key(record))
+        if before is None:
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), record.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > 1e-3:
+                regressions.append(f'{" ".join(map(str, _key(record)))} {metric}: {old:.4g} -> {new:.4g}')
+
+    return regressions
@@ -0,0 +1,95 @@
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from benchmarks.cases import MATRIX_TECHNIQUES, TECHNIQUES
+from benchmarks.instances import crop_instance, transportation_instance
+from instrumentation.phases import peak_rss_bytes
+from solvers.backends import MATRIX_BACKENDS, SolverSettings, default_backend
+
+TRANSPORTATION = 'transportation'
+CROPS = 'crops'
+
+
+def parse_size(size: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in size.lower().split('x'))
+
+
+def _instance(problem: str, size: str, seed: int):
+    if problem == TRANSPORTATION:
+        return transportation_instance(*parse_size(size), seed=seed)
+    if problem == CROPS:
+        return crop_instance(*parse_size(size), seed=seed)
+
+    raise ValueError(f'Unknown benchmark problem: {problem}')
+
+
+def _run_case(problem: str, size: str, seed: int, technique: str, options: dict) -> dict:
+    instance = _instance(problem, size, seed)
+    metrics = TECHNIQUES[problem][technique](instance, **options)
+    # Each case runs in a fresh process, so the high-water marks belong to this case alone
+    metrics['peak_memory_bytes'] = peak_rss_bytes()
+    metrics['solver_peak_memory_bytes'] = peak_rss_bytes(resource.RUSAGE_CHILDREN)
+
+    return metrics
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(cases: list[tuple[str, str]], techniques: list[str] | None, seed: int, settings: SolverSettings,
+                   ga_max_routes: int = 2500, **options) -> Iterator[dict]:
+    run = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'commit': _commit(),
+        'python': platform.python_version(), 'machine': platform.machine(), 'seed': seed, **settings.key(),
+    }
+    matrix_backend = (settings.backend or default_backend()) in MATRIX_BACKENDS
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for problem, size in cases:
+            # Matrix models cannot be handed to every backend; the next exact technique then becomes the reference
+            runnable = [t for t in TECHNIQUES[problem] if matrix_backend or t not in MATRIX_TECHNIQUES]
+            reference = runnable[0]
+            exact = None
+            for technique in TECHNIQUES[problem]:
+                if technique != reference and techniques is not None and technique not in techniques:
+                    continue
+                record = {**run, 'problem': problem, 'size': size, 'technique': technique}
+                if technique not in runnable or (technique.startswith('ga') and _routes(size) > ga_max_routes):
+                    yield {**record, 'status': 'Skipped'}
+                    continue
+
+                try:
+                    metrics = executor.submit(
+                        _run_case, problem, size, seed, technique, {'settings': settings, 'exact': exact, **options}
+                    ).result()
+                except Exception as e:
+                    yield {**record, 'status': 'Error', 'error': f'{type(e).__name__}: {e}'}
+                    continue
+
+                if technique == reference and metrics['status'] == 'Optimal':
+                    exact = metrics['objective']
+                yield {**record, **metrics, 'gap': _gap(metrics['objective'], exact)}
+                print(f'{problem} {size} {technique}: {metrics["status"]} in '
+                      f'{metrics["build_seconds"] + metrics["solve_seconds"]:.3f}s', file=sys.stderr)
+
+
+def _routes(size: str) -> int:
+    num_warehouses, num_stores = parse_size(size)
+    return num_warehouses * num_stores
+
+
+def _gap(objective: float | None, exact: float | None) -> float | None:
+    if objective is None or exact is None:
+        return None
+
+    return abs(objective - exact) / max(abs(exact), 1e-9)
@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+import time
+
+ENTRY_POINTS = [
+    'optimise_problem_1_simple',
+    'optimise_problem_1_extensible',
+    'optimise_problem_2',
+    'farmers_problem.optimise_milp',
+    'run_milp',
+    'run_batch',
+    'run_crop_planner',
+    'convert_network',
+    'what_if',
+    'run_stochastic_planner',
+    'run_service',
+]
+# None of these are needed before a solve starts, so importing an entry point must not load them
+HEAVY_MODULES = ['matplotlib', 'PIL', 'leap_ec', 'scipy', 'pandas', 'pyarrow']
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{
+    'import_seconds': time.perf_counter() - start,
+    'heavy_modules': [name for name in {heavy!r} if name in sys.modules],
+}}))
+'''
+
+
+def measure_startup(module: str, repeats: int = 5) -> dict:
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True
+        )
+        runs.append({**json.loads(completed.stdout), 'process_seconds': time.perf_counter() - start})
+
+    # The fastest run is the least disturbed by whatever else the machine is doing
+    return {'module': module, **min(runs, key=lambda run: run['process_seconds'])}
+
+
+def startup_regressions(result: dict, budget: float) -> list[str]:
+    regressions = []
+    if result['heavy_modules']:
+        regressions.append(f'{result["module"]} imports {", ".join(result["heavy_modules"])} at startup')
+    if result['import_seconds'] > budget:
+        regressions.append(f'{result["module"]} takes {result["import_seconds"]:.3f}s to import (budget {budget}s)')
+
+    return regressions
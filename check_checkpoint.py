@@ -0,0 +1,74 @@
+import json
+import os
+import random
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+import numpy as np
+from leap_ec import context
+
+from optimise_problem_2 import clean_inputs, run_ga
+from problem_1.network import load_network
+from problem_2.checkpoint import GACheckpoint, load_checkpoint
+
+MODES = {
+    'plain': {},
+    'adaptive': {'adaptive': True},
+    'repair': {'adaptive': True, 'repair': True, 'integer': True},
+}
+
+
+def same_state(first: GACheckpoint, second: GACheckpoint) -> bool:
+    return (
+        first.generation == second.generation
+        and all(np.array_equal(a, b) and a.dtype == b.dtype for a, b in zip(first.genomes, second.genomes))
+        and np.array_equal(first.fitness, second.fitness)
+        and first.history.keys() == second.history.keys()
+        and all(np.array_equal(first.history[name], second.history[name]) for name in first.history)
+    )
+
+
+def run(seed: int, **options) -> dict:
+    # The best plan is tracked in leap's global context, so each run starts without the previous one's
+    random.seed(seed)
+    np.random.seed(seed)
+    context.pop('track', None)
+
+    # Progress goes to stderr, leaving stdout to the results
+    with redirect_stdout(sys.stderr):
+        return run_ga(plot_formats=(), **options)
+
+
+if __name__ == '__main__':
+    # Checks that a run stopped and resumed from its checkpoint ends exactly where the uninterrupted run does
+    generations = int(sys.argv[1]) if len(sys.argv) > 1 else 900
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    # Stopped early enough that the repair mode's stall detection has not ended the run yet
+    every, stop = generations // 9, generations // 3
+    inputs = clean_inputs(load_network('problem_1/complex.json'))
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode, options in MODES.items():
+            files = {name: os.path.join(tmp_dir, f'{mode}_{name}.npz') for name in ('full', 'stopped', 'resumed')}
+            options = {**inputs, **options, 'generations': generations, 'checkpoint_every': every}
+            full = run(seed, **options, checkpoint=files['full'])
+            run(seed, **options, checkpoint=files['stopped'], interrupt=lambda: context['leap']['generation'] >= stop)
+            stopped = load_checkpoint(files['stopped'])
+            # A different seed shows the resumed run takes its random state from the checkpoint alone
+            resumed = run(seed + 1, **options, checkpoint=files['resumed'], resume_from=stopped)
+
+            exact = (full['fitness'] == resumed['fitness'] and full['generation'] == resumed['generation']
+                     and same_state(load_checkpoint(files['full']), load_checkpoint(files['resumed'])))
+            print(json.dumps({
+                'mode': mode, 'generations': generations, 'stopped_at': stopped.generation,
+                'fitness': float(full['fitness']), 'resumed_fitness': float(resumed['fitness']), 'exact': exact
+            }))
+            if not exact:
+                mismatches.append(f'{mode}: resumed from generation {stopped.generation} to {resumed["fitness"]} at '
+                                  f'generation {resumed["generation"]}, uninterrupted {full["fitness"]} at '
+                                  f'generation {full["generation"]}')
+
+    for mismatch in mismatches:
+        print(f'Mismatch: {mismatch}', file=sys.stderr)
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,104 @@
+import copy
+import json
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+
+from benchmarks.instances import transportation_instance
+from farmers_problem.planner import build_crop_model, crop_sensitivity, load_crop_plan, solve_crop_model
+from problem_1.cbc import coin_cmd_solver
+from problem_1.matrix import build_transportation_model
+from problem_1.models import Inputs
+from problem_1.network import load_network
+from problem_1.sensitivity import SensitivityIndex, load_sensitivity_index, sensitivity_index
+
+
+def transportation_index(inputs: Inputs) -> SensitivityIndex:
+    model = build_transportation_model(
+        inputs.supply_array(), inputs.demand_array(), *inputs.routes(), inputs.warehouses, inputs.stores
+    )
+
+    return sensitivity_index(model.matrix, row_names=model.row_names(), column_names=model.route_names())
+
+
+def crop_index() -> SensitivityIndex:
+    model = build_crop_model(load_crop_plan('farmers_problem/data/crops.csv', 'farmers_problem/data/resources.csv'))
+
+    return crop_sensitivity(model, solve_crop_model(model, coin_cmd_solver(msg=False)))
+
+
+def reference(index: SensitivityIndex) -> SensitivityIndex:
+    """The index with its model swapped for the one its answers claim to be optima of, for re-solving."""
+    if not index.held.any():
+        return index
+
+    # Fixed-MIP answers are optima of the LP with the integer columns held at the saved plan
+    model = index.model
+    fixed = copy.copy(index)
+    fixed.model = replace(
+        model, col_lower=np.where(index.held, index.values, model.col_lower),
+        col_upper=np.where(index.held, index.values, model.col_upper),
+        integrality=np.zeros(model.num_columns, dtype=bool)
+    )
+
+    return fixed
+
+
+def check_index(name: str, index: SensitivityIndex) -> tuple[int, list[str]]:
+    """Compares every in-range answer at and inside the ends of each range with a re-solve."""
+    resolved, solver = reference(index), coin_cmd_solver(msg=False)
+    checked, mismatches = 0, []
+    questions = [('rhs', row, index.rhs_range(row)) for row in range(index.model.num_rows)]
+    questions += [('cost', column, index.cost_range(column)) for column in range(index.model.num_columns)]
+    for kind, position, (low, high) in questions:
+        for delta in {low, low / 2, high / 2, high, -1.0, -0.5, 0.5, 1.0}:
+            if not np.isfinite(delta):
+                continue
+            if kind == 'rhs':
+                answer = index.rhs_change(position, delta)
+                label = index.row_names[position]
+            else:
+                answer = index.cost_change(position, delta)
+                label = index.column_names[position]
+            if answer is None:
+                continue
+
+            solve = resolved.what_if_rhs if kind == 'rhs' else resolved.what_if_cost
+            expected = solve(position, delta, solver, resolve=True)
+            checked += 1
+            if abs(answer.objective - expected.objective) > 1e-6 * max(1.0, abs(expected.objective)):
+                mismatches.append(f'{name} {kind} {label} {delta:+g}: index {answer.objective} ({answer.status}), '
+                                  f're-solve {expected.objective} ({expected.status})')
+
+    return checked, mismatches
+
+
+if __name__ == '__main__':
+    # Checks answers from sensitivity indexes against re-solves: the supply chain inputs, random transportation
+    # instances and the crop plan, whose Fixed-MIP answers are checked against the LP with its integers held
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    indexes = {
+        'complex': transportation_index(load_network('problem_1/complex.json').to_inputs()), 'crops': crop_index()
+    }
+    for instance in range(count):
+        indexes[f'random_{instance}'] = transportation_index(transportation_instance(8, 8, seed + instance).to_inputs())
+
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, index in indexes.items():
+            # Saved indexes answer from their stored ranges, so they are checked as loaded too
+            file_name = os.path.join(tmp_dir, f'{name}.npz')
+            index.save(file_name)
+            for label, checked_index in ((name, index), (f'{name}_loaded', load_sensitivity_index(file_name))):
+                checked, found = check_index(label, checked_index)
+                print(json.dumps({'index': label, 'status': checked_index.answer_status, 'answers': checked,
+                                  'mismatches': len(found)}))
+                mismatches += found
+
+    for mismatch in mismatches:
+        print(f'Mismatch: {mismatch}', file=sys.stderr)
+    sys.exit(1 if mismatches else 0)
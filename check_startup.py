@@ -0,0 +1,17 @@
+import json
+import sys
+
+from benchmarks.startup import ENTRY_POINTS, measure_startup, startup_regressions
+
+if __name__ == '__main__':
+    # Plain argv handling keeps this check free of the imports it is measuring
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    regressions = []
+    for module in ENTRY_POINTS:
+        result = measure_startup(module)
+        print(json.dumps(result))
+        regressions += startup_regressions(result, budget)
+
+    for regression in regressions:
+        print(f'Regression: {regression}', file=sys.stderr)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,51 @@
+import json
+import sys
+
+import numpy as np
+
+from benchmarks.cases import crop_plan_inputs
+from benchmarks.instances import crop_instance
+from farmers_problem.planner import CropPlanInputs, load_crop_plan
+from farmers_problem.stochastic import (
+    CropScenarios, crop_recourse, sample_scenarios, solve_extensive_form, solve_stochastic_plan
+)
+
+
+def single_scenario(inputs: CropPlanInputs) -> CropScenarios:
+    """The deterministic crop plan as a single certain scenario."""
+    num_options = len(inputs.crops)
+
+    return CropScenarios(
+        np.array(['base']), np.ones(1), np.ones((1, num_options)), inputs.profit[None],
+        np.full((1, num_options), np.inf), inputs.available[crop_recourse(inputs).soft_rows][None]
+    )
+
+
+if __name__ == '__main__':
+    # Checks the L-shaped method against the extensive form MILP on the crop plan and random crop instances
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    crops = load_crop_plan('farmers_problem/data/crops.csv', 'farmers_problem/data/resources.csv')
+    cases = [('crops', crops, single_scenario(crops))]
+    cases += [(f'crops_{count}', crops, sample_scenarios(crops, count, seed, yield_spread=0.4)) for count in (20, 100)]
+    for size in (10, 30):
+        inputs = crop_plan_inputs(crop_instance(size, 3, seed))
+        cases += [(f'random_{size}_{count}', inputs, sample_scenarios(inputs, count, seed, yield_spread=0.4))
+                  for count in (1, 20)]
+
+    mismatches = []
+    for name, inputs, scenarios in cases:
+        extensive = solve_extensive_form(inputs, scenarios)
+        benders = solve_stochastic_plan(inputs, scenarios, workers=workers)
+        print(json.dumps({
+            'case': name, 'scenarios': scenarios.num_scenarios, 'extensive': extensive['expected_profit'],
+            'benders': benders['expected_profit'], 'iterations': benders['iterations']
+        }))
+        difference = abs(benders['expected_profit'] - extensive['expected_profit'])
+        if benders['status'] != 'Optimal' or difference > 1e-5 * max(1.0, abs(extensive['expected_profit'])):
+            mismatches.append(f'{name}: L-shaped {benders["status"]} {benders["expected_profit"]}, '
+                              f'extensive form {extensive["status"]} {extensive["expected_profit"]}')
+
+    for mismatch in mismatches:
+        print(f'Mismatch: {mismatch}', file=sys.stderr)
+    sys.exit(1 if mismatches else 0)
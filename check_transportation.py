@@ -0,0 +1,62 @@
+import json
+import sys
+
+import numpy as np
+
+from problem_1.cbc import coin_cmd_solver
+from problem_1.matrix import build_transportation_model, solve_matrix_model
+from problem_1.transportation import network_simplex, transportation_simplex
+
+ENGINES = {'modi': transportation_simplex, 'networkx': network_simplex}
+
+
+def random_instance(rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    num_warehouses, num_stores = rng.integers(1, 9, 2)
+    costs = rng.integers(1, 20, (num_warehouses, num_stores)).astype(np.float64)
+    # Missing routes, and supply that may fall short of demand, exercise the infeasible cases too
+    if rng.random() < 0.3:
+        costs[rng.random(costs.shape) < 0.3] = np.inf
+        costs[0, 0] = 1  # at least one route, so the model has a column
+    supply = rng.integers(0, 40, num_warehouses)
+    demand = rng.integers(0, 30, num_stores)
+
+    return supply, demand, costs
+
+
+def cbc_solve(supply: np.ndarray, demand: np.ndarray, costs: np.ndarray) -> tuple[str, float]:
+    warehouse_index, store_index = np.nonzero(np.isfinite(costs))
+    model = build_transportation_model(
+        supply, demand, warehouse_index, store_index, costs[warehouse_index, store_index],
+        [f'W{i}' for i in range(len(supply))], [f'S{j}' for j in range(len(demand))]
+    )
+    solution = solve_matrix_model(model.matrix, coin_cmd_solver(msg=False))
+
+    return solution.status, solution.objective
+
+
+if __name__ == '__main__':
+    # Checks the transportation simplex and network simplex against CBC on random instances
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    rng = np.random.default_rng(seed)
+    mismatches = []
+    solved = {engine: 0 for engine in ENGINES}
+    for instance in range(count):
+        supply, demand, costs = random_instance(rng)
+        status, objective = cbc_solve(supply, demand, costs)
+        for engine, solve in ENGINES.items():
+            result = solve(supply, demand, costs)
+            if status == 'Optimal':
+                solved[engine] += 1
+                agrees = result.status == 'Optimal' and abs(result.objective - objective) <= 1e-6 * max(1, objective)
+            else:
+                agrees = result.status != 'Optimal'
+            if not agrees:
+                mismatches.append(f'{engine} on instance {instance}: {result.status} {result.objective}, '
+                                  f'CBC {status} {objective}')
+
+    for engine in ENGINES:
+        print(json.dumps({'engine': engine, 'instances': count, 'optimal': solved[engine], 'seed': seed}))
+    for mismatch in mismatches:
+        print(f'Mismatch: {mismatch}', file=sys.stderr)
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,8 @@
+from args_parser import convert_cli_args
+from problem_1.network import convert_network
+
+if __name__ == '__main__':
+    args = convert_cli_args()
+    network = convert_network(args.input_file, args.output_dir)
+    print(f'Wrote {len(network.warehouses)} warehouses, {len(network.stores)} stores and a '
+          f'{network.costs.dtype} cost matrix to {args.output_dir}')
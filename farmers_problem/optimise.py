@@ -1,6 +1,6 @@
-from pulp import LpProblem, LpMaximize, LpVariable, LpStatus, value
+from pulp import LpProblem, LpMaximize, LpSolver, LpVariable, LpStatus, value
 
-from .cbc import coin_cmd_solver
+from solvers.backends import solver_backend
 from .models import Inputs, CropVariables
 
 
@@ -37,12 +37,12 @@ def create_problem(inputs: Inputs, variables: CropVariables) -> LpProblem:
     return prob
 
 
-def solve_problem(inputs: Inputs) -> dict:
+def solve_problem(inputs: Inputs, solver: LpSolver | None = None) -> dict:
     variables = create_variables()
     prob = create_problem(inputs, variables)
 
-    # Solve using CBC solver
-    prob.solve(coin_cmd_solver())
+    # Solve using the configured solver backend, CBC unless OPTIMISATION_SOLVER says otherwise
+    prob.solve(solver or solver_backend())
 
     # Prepare results
     results = {
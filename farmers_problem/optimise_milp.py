@@ -1,6 +1,14 @@
-from pulp import *
+from typing import Callable
 
-def solve_extended_farming_problem():
+from pulp import LpBinary, LpMaximize, LpProblem, LpSolution, LpStatus, LpVariable, lpSum, value
+
+from args_parser import milp_cli_args, solver_settings
+from instrumentation.phases import phase, recording
+from solvers.backends import SolverSettings
+from solvers.incumbents import Incumbent, stream_incumbents, print_incumbent
+
+def solve_extended_farming_problem(settings: SolverSettings = SolverSettings(),
+                                    on_incumbent: Callable[[Incumbent], None] | None = None):
     # Crop data
     crops = ["potato", "carrot", "lettuce", "tomato"]
 
@@ -60,12 +68,17 @@ def solve_extended_farming_problem():
     for crop in crops:
         prob += crop_amount[crop] <= max_plant[crop] * plant_crop[crop], f"Link_{crop}"
 
-    # Solve
-    prob.solve()
+    # Solve, optionally reporting each improved solution while CBC is still searching
+    solver = settings.solver(msg=on_incumbent is None)
+    with phase('solve'):
+        if on_incumbent is None:
+            prob.solve(solver)
+        else:
+            stream_incumbents(solver, prob.solve, on_incumbent, prob.sense)
 
     # Results
     print("\n📊 Extended MILP Results (Labour Soft Constraint):")
-    print(f"Status: {LpStatus[prob.status]}")
+    print(f"Status: {LpStatus[prob.status]} ({LpSolution[prob.sol_status]})")
     print(f"Net Profit (with labour penalty): £{value(prob.objective):.2f}")
     print(f"Labour overuse: {value(labour_overuse):.2f} units (penalty applied if > 0)")
     for crop in crops:
@@ -74,7 +87,13 @@ def solve_extended_farming_problem():
         else:
             print(f"- Do not plant {crop} ❌")
 
+def main():
+    args = milp_cli_args()
+    with recording(args.metrics, entry_point='optimise_milp'):
+        solve_extended_farming_problem(solver_settings(args), print_incumbent if args.stream else None)
+
+
 if __name__ == "__main__":
-    solve_extended_farming_problem()
+    main()
 
 
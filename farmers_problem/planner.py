@@ -0,0 +1,235 @@
+import os
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+from pulp import LpSolver
+
+from instrumentation.phases import phase
+from problem_1.matrix import MAXIMISE, MatrixModel, MatrixSolution, solve_matrix_model
+from problem_1.sensitivity import SensitivityIndex, sensitivity_index
+from solvers.backends import solver_backend
+from solvers.incumbents import Incumbent, stream_incumbents
+
+OPTION_COLUMNS = ['crop', 'profit', 'setup_cost', 'max_plant']
+RESOURCE_COLUMNS = ['resource', 'available']
+
+
+@dataclass
+class CropPlanInputs:
+    # One entry per planting option, i.e. a crop in a field
+    crops: ndarray
+    fields: ndarray
+    profit: ndarray
+    setup_cost: ndarray
+    max_plant: ndarray
+    usage: dict[str, ndarray]  # resource name -> use per option
+    # One entry per resource limit; an empty field means the limit covers every field
+    resources: ndarray
+    resource_fields: ndarray
+    available: ndarray
+    overuse_penalty: ndarray  # 0 marks a hard limit
+    per_planted: ndarray  # limits counted per planted option (e.g. equipment) rather than per unit planted
+
+
+@dataclass
+class CropModel:
+    matrix: MatrixModel
+    inputs: CropPlanInputs
+    soft_rows: ndarray
+
+    @property
+    def num_options(self) -> int:
+        return len(self.inputs.crops)
+
+
+def read_columns(file_name: str) -> dict[str, ndarray]:
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension == '.csv':
+        table = np.atleast_1d(np.genfromtxt(file_name, delimiter=',', names=True, dtype=None, encoding='utf-8'))
+        return {name: table[name] for name in table.dtype.names}
+    if extension == '.npz':
+        with np.load(file_name, allow_pickle=False) as table:
+            return {name: table[name] for name in table.files}
+    if extension == '.parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(f'Reading {file_name} needs pyarrow installed (uv sync --extra parquet)') from None
+        import pandas as pd
+
+        table = pd.read_parquet(file_name)
+        return {name: table[name].to_numpy() for name in table.columns}
+
+    raise ValueError(f'Unsupported table format: {file_name}')
+
+
+def _require(table: dict[str, ndarray], columns: list[str], name: str) -> None:
+    missing = [column for column in columns if column not in table]
+    if missing:
+        raise ValueError(f'The {name} table is missing columns {missing}')
+
+
+def crop_plan_inputs(options: dict[str, ndarray], resources: dict[str, ndarray]) -> CropPlanInputs:
+    _require(options, OPTION_COLUMNS, 'options')
+    _require(resources, RESOURCE_COLUMNS, 'resources')
+    num_options, num_limits = len(options['crop']), len(resources['resource'])
+    resource_names = resources['resource'].astype(str)
+    _require(options, sorted(set(resource_names)), 'options')
+
+    return CropPlanInputs(
+        crops=options['crop'].astype(str),
+        fields=options['field'].astype(str) if 'field' in options else np.full(num_options, ''),
+        profit=options['profit'].astype(np.float64),
+        setup_cost=options['setup_cost'].astype(np.float64),
+        max_plant=options['max_plant'].astype(np.float64),
+        usage={name: options[name].astype(np.float64) for name in set(resource_names)},
+        resources=resource_names,
+        resource_fields=resources['field'].astype(str) if 'field' in resources else np.full(num_limits, ''),
+        available=resources['available'].astype(np.float64),
+        overuse_penalty=(
+            resources['overuse_penalty'].astype(np.float64) if 'overuse_penalty' in resources else np.zeros(num_limits)
+        ),
+        per_planted=(
+            resources['per'].astype(str) == 'planted' if 'per' in resources else np.zeros(num_limits, dtype=bool)
+        ),
+    )
+
+
+def load_crop_plan(options_file: str, resources_file: str) -> CropPlanInputs:
+    return crop_plan_inputs(read_columns(options_file), read_columns(resources_file))
+
+
+def limit_usage(inputs: CropPlanInputs) -> tuple[ndarray, ndarray, ndarray]:
+    """(limit, column, value) entries of every resource limit, over the amount columns followed by the planted ones."""
+    num_options = len(inputs.crops)
+    field_names, field_codes = np.unique(np.concatenate([inputs.fields, inputs.resource_fields]), return_inverse=True)
+    option_fields, limit_fields = field_codes[:num_options], field_codes[num_options:]
+    covers_all = inputs.resource_fields == ''
+
+    rows, columns, values = [], [], []
+    for name, usage in inputs.usage.items():
+        limits = np.flatnonzero(inputs.resources == name)
+        # Limit row of this resource for every option: the field's own limit, or the farm-wide one
+        row_of_field = np.full(len(field_names), -1)
+        row_of_field[limit_fields[limits[~covers_all[limits]]]] = limits[~covers_all[limits]]
+        farm_wide = limits[covers_all[limits]]
+        for option_rows in [row_of_field[option_fields]] + [np.full(num_options, row) for row in farm_wide]:
+            used = np.flatnonzero((option_rows >= 0) & (usage != 0))
+            rows.append(option_rows[used])
+            columns.append(used + np.where(inputs.per_planted[option_rows[used]], num_options, 0))
+            values.append(usage[used])
+
+    return np.concatenate(rows), np.concatenate(columns), np.concatenate(values)
+
+
+def build_crop_model(inputs: CropPlanInputs) -> CropModel:
+    num_options, num_limits = len(inputs.crops), len(inputs.resources)
+    soft_rows = np.flatnonzero(inputs.overuse_penalty > 0)
+    # Columns are amounts planted, then planted flags, then overuse of each soft limit
+    amounts, planted, overuse = 0, num_options, 2 * num_options
+
+    usage_rows, usage_columns, usage_values = limit_usage(inputs)
+    rows, columns, values = [usage_rows], [usage_columns], [usage_values]
+
+    # Soft limits can be exceeded by their overuse column, at a cost in the objective
+    rows.append(soft_rows)
+    columns.append(overuse + np.arange(len(soft_rows)))
+    values.append(np.full(len(soft_rows), -1.0))
+
+    # Big-M links: nothing is planted unless the option is chosen, and never more than its maximum
+    links = num_limits + np.arange(num_options)
+    rows += [links, links]
+    columns += [amounts + np.arange(num_options), planted + np.arange(num_options)]
+    values += [np.ones(num_options), -inputs.max_plant]
+
+    rows, columns, values = np.concatenate(rows), np.concatenate(columns), np.concatenate(values)
+    num_rows = num_limits + num_options
+    order = np.lexsort((columns, rows))
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+
+    num_soft = len(soft_rows)
+    matrix = MatrixModel(
+        objective=np.concatenate([inputs.profit, -inputs.setup_cost, -inputs.overuse_penalty[soft_rows]]),
+        indptr=indptr,
+        indices=columns[order],
+        data=values[order],
+        row_lower=np.full(num_rows, -np.inf),
+        row_upper=np.concatenate([inputs.available, np.zeros(num_options)]),
+        col_lower=np.zeros(2 * num_options + num_soft),
+        col_upper=np.concatenate([np.full(num_options, np.inf), np.ones(num_options), np.full(num_soft, np.inf)]),
+        integrality=np.concatenate([np.zeros(num_options, bool), np.ones(num_options, bool), np.zeros(num_soft, bool)]),
+        sense=MAXIMISE,
+    )
+
+    return CropModel(matrix, inputs, soft_rows)
+
+
+def _limit_name(inputs: CropPlanInputs, row: int) -> str:
+    field = inputs.resource_fields[row]
+    return f'{inputs.resources[row]} ({field})' if field else str(inputs.resources[row])
+
+
+def solve_crop_model(model: CropModel, solver: LpSolver | None = None,
+                     on_incumbent: Callable[[Incumbent], None] | None = None) -> MatrixSolution:
+    solver = solver or solver_backend()
+    if on_incumbent is None:
+        return solve_matrix_model(model.matrix, solver)
+
+    return stream_incumbents(solver, lambda s: solve_matrix_model(model.matrix, s), on_incumbent, model.matrix.sense)
+
+
+def crop_plan_results(model: CropModel, solution: MatrixSolution) -> dict:
+    inputs, n = model.inputs, model.num_options
+    amounts, chosen = solution.values[:n], solution.values[n:2 * n] > 0.5
+    overuse = solution.values[2 * n:]
+
+    return {
+        'status': solution.status,
+        'total_profit': solution.objective,
+        'planted': [
+            {'crop': crop, 'field': field, 'amount': amount}
+            for crop, field, amount in zip(inputs.crops[chosen].tolist(), inputs.fields[chosen].tolist(),
+                                           amounts[chosen].tolist())
+        ],
+        'overuse': {
+            _limit_name(inputs, row): value for row, value in zip(model.soft_rows.tolist(), overuse.tolist())
+        },
+    }
+
+
+def solve_crop_plan(inputs: CropPlanInputs, solver: LpSolver | None = None,
+                    on_incumbent: Callable[[Incumbent], None] | None = None) -> dict:
+    with phase('build'):
+        model = build_crop_model(inputs)
+
+    return crop_plan_results(model, solve_crop_model(model, solver, on_incumbent))
+
+
+def crop_sensitivity(model: CropModel, solution: MatrixSolution) -> SensitivityIndex:
+    """Sensitivity of the plan with the choice of crops held as solved."""
+    inputs = model.inputs
+    options = [
+        f'{crop}_{field}' if field else crop for crop, field in zip(inputs.crops.tolist(), inputs.fields.tolist())
+    ]
+    limits = [
+        f'{resource}_{field}_Limit' if field else f'{resource}_Limit'
+        for resource, field in zip(inputs.resources.tolist(), inputs.resource_fields.tolist())
+    ]
+    column_names = ([f'crop_amount_{option}' for option in options] + [f'plant_crop_{option}' for option in options] +
+                    [f'{limits[row]}_overuse' for row in model.soft_rows.tolist()])
+
+    return sensitivity_index(model.matrix, solution.values, limits + [f'Link_{option}' for option in options],
+                             column_names)
+
+
+def print_crop_plan(results: dict) -> None:
+    print(f"Status: {results['status']}")
+    print(f"Net Profit (with overuse penalties): £{results['total_profit']:.2f}")
+    for resource, value in results['overuse'].items():
+        print(f"{resource} overuse: {value:.2f} units")
+    for option in results['planted']:
+        where = f" in {option['field']}" if option['field'] else ''
+        print(f"- Plant {option['amount']:.2f} kg of {option['crop']}{where}")
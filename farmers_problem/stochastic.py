@@ -0,0 +1,406 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+import numpy as np
+from numpy import ndarray
+
+from farmers_problem.planner import CropPlanInputs, limit_usage, read_columns
+from instrumentation.phases import phase, record
+from problem_1.matrix import MAXIMISE, MINIMISE, MatrixModel, solve_matrix_model
+from solvers.backends import SolverSettings
+
+
+@dataclass
+class CropScenarios:
+    names: ndarray
+    probability: ndarray
+    # One column per planting option
+    yields: ndarray  # harvested per unit planted
+    prices: ndarray  # paid per unit harvested
+    demand: ndarray  # most that can be sold, inf when there is no limit
+    # One column per soft resource limit, e.g. labour available at harvest
+    available: ndarray
+
+    @property
+    def num_scenarios(self) -> int:
+        return len(self.names)
+
+    def subset(self, scenarios: ndarray) -> 'CropScenarios':
+        return CropScenarios(
+            self.names[scenarios], self.probability[scenarios], self.yields[scenarios], self.prices[scenarios],
+            self.demand[scenarios], self.available[scenarios]
+        )
+
+
+@dataclass
+class Recourse:
+    """What happens after planting, once the scenario is known: harvested amounts are sold at the scenario's
+    prices, and the soft limits are used per unit harvested and overused at their penalty when they run short."""
+    soft_rows: ndarray
+    penalty: ndarray
+    amount_usage: ndarray  # (soft limits, options) use per unit harvested
+    planted_usage: ndarray  # (soft limits, options) use per planted option
+
+    @property
+    def num_soft(self) -> int:
+        return len(self.soft_rows)
+
+
+def crop_recourse(inputs: CropPlanInputs) -> Recourse:
+    num_options = len(inputs.crops)
+    soft_rows = np.flatnonzero(inputs.overuse_penalty > 0)
+    rows, columns, values = limit_usage(inputs)
+    usage = np.zeros((len(inputs.resources), 2 * num_options))
+    np.add.at(usage, (rows, columns), values)
+
+    return Recourse(
+        soft_rows, inputs.overuse_penalty[soft_rows], usage[soft_rows, :num_options], usage[soft_rows, num_options:]
+    )
+
+
+def read_scenarios(inputs: CropPlanInputs, file_name: str, resources_file: str | None = None) -> CropScenarios:
+    """Scenarios from a table with one row per scenario and option (scenario, crop, optional field, probability,
+    yield, price and demand columns) and an optional table of the soft limits available in each scenario.
+
+    Options a scenario leaves out keep a yield of 1 and their planned profit as the price, and scenarios without
+    a probability are equally likely."""
+    table = read_columns(file_name)
+    names, scenario_codes = np.unique(table['scenario'].astype(str), return_inverse=True)
+    options = {
+        (crop, field): i for i, (crop, field) in enumerate(zip(inputs.crops.tolist(), inputs.fields.tolist()))
+    }
+    fields = table['field'].astype(str) if 'field' in table else np.full(len(scenario_codes), '')
+    option_codes = np.array([options[key] for key in zip(table['crop'].astype(str).tolist(), fields.tolist())])
+
+    num_scenarios, num_options = len(names), len(inputs.crops)
+    columns = {}
+    for column, default in (('yield', np.ones(num_options)), ('price', inputs.profit),
+                            ('demand', np.full(num_options, np.inf))):
+        columns[column] = np.tile(default, (num_scenarios, 1))
+        if column in table:
+            columns[column][scenario_codes, option_codes] = table[column].astype(np.float64)
+
+    probability = np.full(num_scenarios, 1.0)
+    if 'probability' in table:
+        probability[scenario_codes] = table['probability'].astype(np.float64)
+
+    recourse = crop_recourse(inputs)
+    available = np.tile(inputs.available[recourse.soft_rows], (num_scenarios, 1))
+    if resources_file is not None:
+        resources = read_columns(resources_file)
+        soft_limits = zip(
+            inputs.resources[recourse.soft_rows].tolist(), inputs.resource_fields[recourse.soft_rows].tolist()
+        )
+        limits = {(resource, field): i for i, (resource, field) in enumerate(soft_limits)}
+        resource_fields = (
+            resources['field'].astype(str) if 'field' in resources else np.full(len(resources['resource']), '')
+        )
+        limit_codes = np.array([
+            limits[key] for key in zip(resources['resource'].astype(str).tolist(), resource_fields.tolist())
+        ])
+        available[np.searchsorted(names, resources['scenario'].astype(str)), limit_codes] = (
+            resources['available'].astype(np.float64)
+        )
+
+    return CropScenarios(
+        names, probability / probability.sum(), columns['yield'], columns['price'], columns['demand'], available
+    )
+
+
+def sample_scenarios(inputs: CropPlanInputs, count: int, seed: int = 0, yield_spread: float = 0.25,
+                     price_spread: float = 0.15, resource_spread: float = 0.1) -> CropScenarios:
+    """Equally likely scenarios with log-normal yields, prices and soft limits around the planned values."""
+    rng = np.random.default_rng(seed)
+    num_options = len(inputs.crops)
+    soft_available = inputs.available[crop_recourse(inputs).soft_rows]
+
+    return CropScenarios(
+        names=np.array([f'scenario_{s}' for s in range(count)]),
+        probability=np.full(count, 1 / count),
+        yields=rng.lognormal(0, yield_spread, (count, num_options)),
+        prices=inputs.profit * rng.lognormal(0, price_spread, (count, num_options)),
+        demand=np.full((count, num_options), np.inf),
+        available=soft_available * rng.lognormal(0, resource_spread, (count, len(soft_available))),
+    )
+
+
+def _csr(rows: ndarray, columns: ndarray, values: ndarray, num_rows: int) -> tuple[ndarray, ndarray, ndarray]:
+    order = np.lexsort((columns, rows))
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+
+    return indptr, columns[order], values[order]
+
+
+def _first_stage_entries(inputs: CropPlanInputs) -> tuple[ndarray, ndarray, ndarray, ndarray]:
+    """Hard limits and big-M links over the amount and planted columns, with their upper bounds."""
+    num_options = len(inputs.crops)
+    hard = np.flatnonzero(inputs.overuse_penalty == 0)
+    row_of_limit = np.full(len(inputs.resources), -1)
+    row_of_limit[hard] = np.arange(len(hard))
+
+    rows, columns, values = limit_usage(inputs)
+    keep = row_of_limit[rows] >= 0
+    links = len(hard) + np.arange(num_options)
+    rows = np.concatenate([row_of_limit[rows[keep]], links, links])
+    columns = np.concatenate([columns[keep], np.arange(num_options), num_options + np.arange(num_options)])
+    values = np.concatenate([values[keep], np.ones(num_options), -inputs.max_plant])
+
+    return rows, columns, values, np.concatenate([inputs.available[hard], np.zeros(num_options)])
+
+
+def _recourse_entries(recourse: Recourse, num_options: int, num_blocks: int,
+                      first_column: int) -> tuple[ndarray, ndarray, ndarray]:
+    """Harvest and soft limit rows of `num_blocks` scenarios, each with its harvested and overuse columns."""
+    block_size = num_options + recourse.num_soft
+    limits, options = np.nonzero(recourse.amount_usage)
+    soft = num_options + np.arange(recourse.num_soft)
+    rows = np.concatenate([np.arange(num_options), num_options + limits, soft])
+    columns = np.concatenate([np.arange(num_options), options, soft])
+    values = np.concatenate([np.ones(num_options), recourse.amount_usage[limits, options], -np.ones(recourse.num_soft)])
+    offsets = np.arange(num_blocks)[:, np.newaxis] * block_size
+
+    return (offsets + rows).ravel(), (first_column + offsets + columns).ravel(), np.tile(values, num_blocks)
+
+
+def _recourse_objective(recourse: Recourse, scenarios: CropScenarios) -> ndarray:
+    return np.column_stack([scenarios.prices, np.tile(-recourse.penalty, (scenarios.num_scenarios, 1))])
+
+
+def solve_recourse(recourse: Recourse, scenarios: CropScenarios, amounts: ndarray, planted: ndarray,
+                   settings: SolverSettings = SolverSettings()) -> tuple[ndarray, ndarray, ndarray]:
+    """Profit of each scenario after planting `amounts` of the `planted` options, with its supergradients in the
+    amounts and the planted flags.
+
+    The scenarios are independent, so they are solved together as one block diagonal LP."""
+    num_scenarios, num_options = scenarios.yields.shape
+    num_soft = recourse.num_soft
+    rows, columns, values = _recourse_entries(recourse, num_options, num_scenarios, 0)
+    # Every scenario has a harvest row and column per option and a limit row and overuse column per soft limit
+    num_rows = num_columns = num_scenarios * (num_options + num_soft)
+    indptr, indices, data = _csr(rows, columns, values, num_rows)
+
+    soft_limits = scenarios.available - recourse.planted_usage @ planted
+    model = MatrixModel(
+        objective=-_recourse_objective(recourse, scenarios).ravel(),
+        indptr=indptr,
+        indices=indices,
+        data=data,
+        row_lower=np.full(num_rows, -np.inf),
+        row_upper=np.column_stack([scenarios.yields * amounts, soft_limits]).ravel(),
+        col_lower=np.zeros(num_columns),
+        col_upper=np.column_stack([scenarios.demand, np.full((num_scenarios, num_soft), np.inf)]).ravel(),
+        integrality=np.zeros(num_columns, dtype=bool),
+        sense=MINIMISE,
+    )
+    solution = solve_matrix_model(model, settings.solver(threads=1, msg=False))
+    if solution.status != 'Optimal':
+        raise ValueError(f'The recourse problem of planting {amounts} was {solution.status}')
+
+    # Duals of the minimisation give how much profit each unit of harvest or soft limit is worth
+    duals = -solution.duals.reshape((num_scenarios, num_options + num_soft))
+    profit = -(model.objective * solution.values).reshape((num_scenarios, -1)).sum(axis=1)
+
+    return profit, duals[:, :num_options] * scenarios.yields, -duals[:, num_options:] @ recourse.planted_usage
+
+
+class _Master:
+    """First stage MILP with one profit estimate per scenario, bounded above by the cuts found so far."""
+
+    def __init__(self, inputs: CropPlanInputs, recourse: Recourse, scenarios: CropScenarios):
+        num_options, num_scenarios = len(inputs.crops), scenarios.num_scenarios
+        self.num_options = num_options
+        rows, columns, values, row_upper = _first_stage_entries(inputs)
+        indptr, indices, data = _csr(rows, columns, values, len(row_upper))
+
+        # Until it has cuts, a scenario can at best sell everything that could possibly be harvested
+        harvest = np.minimum(scenarios.yields * inputs.max_plant, scenarios.demand)
+        best_case = (np.maximum(scenarios.prices, 0) * harvest).sum(axis=1)
+        self.matrix = MatrixModel(
+            objective=np.concatenate([np.zeros(num_options), -inputs.setup_cost, scenarios.probability]),
+            indptr=indptr,
+            indices=indices,
+            data=data,
+            row_lower=np.full(len(row_upper), -np.inf),
+            row_upper=row_upper,
+            col_lower=np.concatenate([np.zeros(2 * num_options), np.full(num_scenarios, -np.inf)]),
+            col_upper=np.concatenate([inputs.max_plant, np.ones(num_options), best_case]),
+            integrality=np.concatenate([np.zeros(num_options, bool), np.ones(num_options, bool),
+                                        np.zeros(num_scenarios, bool)]),
+            sense=MAXIMISE,
+        )
+
+    def add_cuts(self, scenarios: ndarray, profit: ndarray, amounts_gradient: ndarray, planted_gradient: ndarray,
+                 amounts: ndarray, planted: ndarray) -> None:
+        # theta_s - g.(x, y) <= Q_s(x^, y^) - g.(x^, y^)
+        num_cuts, n = len(scenarios), self.num_options
+        coefficients = np.column_stack([-amounts_gradient, -planted_gradient, np.ones(num_cuts)])
+        columns = np.tile(np.append(np.arange(2 * n), 0), (num_cuts, 1))
+        columns[:, -1] = 2 * n + scenarios
+        keep = coefficients != 0
+
+        matrix = self.matrix
+        matrix.indptr = np.concatenate([matrix.indptr, matrix.indptr[-1] + np.cumsum(keep.sum(axis=1))])
+        matrix.indices = np.concatenate([matrix.indices, columns[keep]])
+        matrix.data = np.concatenate([matrix.data, coefficients[keep]])
+        matrix.row_lower = np.concatenate([matrix.row_lower, np.full(num_cuts, -np.inf)])
+        matrix.row_upper = np.concatenate([
+            matrix.row_upper, profit - amounts_gradient @ amounts - planted_gradient @ planted
+        ])
+
+
+def _plan_results(inputs: CropPlanInputs, amounts: ndarray, planted: ndarray) -> list[dict]:
+    chosen = planted > 0.5
+    return [
+        {'crop': crop, 'field': field, 'amount': amount}
+        for crop, field, amount in zip(inputs.crops[chosen].tolist(), inputs.fields[chosen].tolist(),
+                                       amounts[chosen].tolist())
+    ]
+
+
+def solve_stochastic_plan(inputs: CropPlanInputs, scenarios: CropScenarios,
+                          settings: SolverSettings = SolverSettings(), workers: int | None = None,
+                          max_iterations: int = 100, tolerance: float = 1e-6, verbose: bool = False) -> dict:
+    """Plants for the best expected profit over the scenarios with the multi-cut L-shaped method.
+
+    A master MILP chooses what to plant; the scenarios' recourse LPs, split across worker processes, value that
+    choice and send back one optimality cut per scenario it overestimated. The recourse is always feasible, since
+    unharvested crops and overused soft limits have no hard limit, so no feasibility cuts are needed.
+    """
+    recourse = crop_recourse(inputs)
+    master = _Master(inputs, recourse, scenarios)
+    num_options = len(inputs.crops)
+    workers = min(workers or os.cpu_count() or 1, scenarios.num_scenarios)
+    chunks = [scenarios.subset(chunk) for chunk in np.array_split(np.arange(scenarios.num_scenarios), workers)]
+
+    lower, upper = -np.inf, np.inf
+    best = (np.zeros(num_options), np.zeros(num_options), np.zeros(scenarios.num_scenarios))
+    status, iteration = 'Not Solved', 0
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+        solve_chunks = executor.map if executor is not None else map
+        for iteration in range(1, max_iterations + 1):
+            with phase('master', iteration=iteration):
+                solution = solve_matrix_model(master.matrix, settings.solver(msg=False))
+            if solution.status != 'Optimal':
+                status = solution.status
+                break
+            amounts = solution.values[:num_options]
+            planted = np.rint(solution.values[num_options:2 * num_options])
+            estimates = solution.values[2 * num_options:]
+            upper = min(upper, solution.objective)
+
+            with phase('subproblems', iteration=iteration):
+                results = list(solve_chunks(
+                    solve_recourse, [recourse] * workers, chunks, [amounts] * workers, [planted] * workers,
+                    [settings] * workers
+                ))
+            profit, amounts_gradient, planted_gradient = (np.concatenate(parts) for parts in zip(*results))
+
+            expected = float(scenarios.probability @ profit - inputs.setup_cost @ planted)
+            if expected > lower:
+                lower, best = expected, (amounts, planted, profit)
+
+            overestimated = np.flatnonzero(estimates > profit + tolerance * np.maximum(1, np.abs(profit)))
+            record('benders_iteration', iteration=iteration, lower=lower, upper=upper, cuts=len(overestimated))
+            if verbose:
+                print(f'Iteration {iteration}: expected profit between £{lower:.2f} and £{upper:.2f}')
+            if upper - lower <= tolerance * max(1.0, abs(lower)) or not len(overestimated):
+                status = 'Optimal'
+                break
+            master.add_cuts(
+                overestimated, profit[overestimated], amounts_gradient[overestimated],
+                planted_gradient[overestimated], amounts, planted
+            )
+
+    amounts, planted, profit = best
+    return {
+        'status': status,
+        'expected_profit': lower,
+        'bound': upper,
+        'iterations': iteration,
+        'planted': _plan_results(inputs, amounts, planted),
+        'scenario_profit': profit - inputs.setup_cost @ planted,
+    }
+
+
+def solve_extensive_form(inputs: CropPlanInputs, scenarios: CropScenarios,
+                         settings: SolverSettings = SolverSettings()) -> dict:
+    """The same model as one MILP with every scenario's recourse, for checking the decomposition on small cases."""
+    recourse = crop_recourse(inputs)
+    num_options, num_scenarios, num_soft = len(inputs.crops), scenarios.num_scenarios, recourse.num_soft
+    block_size = num_options + num_soft
+    rows, columns, values, row_upper = _first_stage_entries(inputs)
+    num_first = len(row_upper)
+
+    recourse_rows, recourse_columns, recourse_values = _recourse_entries(
+        recourse, num_options, num_scenarios, 2 * num_options
+    )
+    # Harvest is limited by what was planted, and per planted use of a soft limit is fixed by the planting
+    blocks = np.arange(num_scenarios)[:, np.newaxis] * block_size
+    harvest_rows = (blocks + np.arange(num_options)).ravel()
+    limits, options = np.nonzero(recourse.planted_usage)
+    rows = np.concatenate([
+        rows, num_first + recourse_rows, num_first + harvest_rows,
+        num_first + (blocks + num_options + limits).ravel()
+    ])
+    columns = np.concatenate([
+        columns, recourse_columns, np.tile(np.arange(num_options), num_scenarios),
+        np.tile(num_options + options, num_scenarios)
+    ])
+    values = np.concatenate([
+        values, recourse_values, -scenarios.yields.ravel(),
+        np.tile(recourse.planted_usage[limits, options], num_scenarios)
+    ])
+    num_rows = num_first + num_scenarios * block_size
+    indptr, indices, data = _csr(rows, columns, values, num_rows)
+
+    num_recourse = num_scenarios * block_size
+    matrix = MatrixModel(
+        objective=np.concatenate([
+            np.zeros(num_options), -inputs.setup_cost,
+            (scenarios.probability[:, np.newaxis] * _recourse_objective(recourse, scenarios)).ravel()
+        ]),
+        indptr=indptr,
+        indices=indices,
+        data=data,
+        row_lower=np.full(num_rows, -np.inf),
+        row_upper=np.concatenate([
+            row_upper, np.column_stack([np.zeros((num_scenarios, num_options)), scenarios.available]).ravel()
+        ]),
+        col_lower=np.zeros(2 * num_options + num_recourse),
+        col_upper=np.concatenate([
+            inputs.max_plant, np.ones(num_options),
+            np.column_stack([scenarios.demand, np.full((num_scenarios, num_soft), np.inf)]).ravel()
+        ]),
+        integrality=np.concatenate([np.zeros(num_options, bool), np.ones(num_options, bool),
+                                    np.zeros(num_recourse, bool)]),
+        sense=MAXIMISE,
+    )
+    with phase('solve', method='extensive'):
+        solution = solve_matrix_model(matrix, settings.solver(msg=False))
+
+    amounts, planted = solution.values[:num_options], np.rint(solution.values[num_options:2 * num_options])
+    recourse_values = solution.values[2 * num_options:].reshape((num_scenarios, block_size))
+    profit = (_recourse_objective(recourse, scenarios) * recourse_values).sum(axis=1)
+
+    return {
+        'status': solution.status,
+        'expected_profit': solution.objective,
+        'bound': solution.objective,
+        'iterations': None,
+        'planted': _plan_results(inputs, amounts, planted),
+        'scenario_profit': profit - inputs.setup_cost @ planted,
+    }
+
+
+def print_stochastic_plan(results: dict) -> None:
+    profit = results['scenario_profit']
+    iterations = f" after {results['iterations']} iterations" if results['iterations'] is not None else ''
+    print(f"Status: {results['status']}{iterations}")
+    print(f"Expected net profit: £{results['expected_profit']:.2f} (bound £{results['bound']:.2f})")
+    print(f"Scenario net profit: worst £{profit.min():.2f}, best £{profit.max():.2f}")
+    for option in results['planted']:
+        where = f" in {option['field']}" if option['field'] else ''
+        print(f"- Plant {option['amount']:.2f} kg of {option['crop']}{where}")
@@ -0,0 +1,129 @@
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Iterator
+
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def peak_rss_bytes(who: int = resource.RUSAGE_SELF) -> int:
+    return resource.getrusage(who).ru_maxrss * _RSS_UNIT
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class JsonLinesSink:
+    def __init__(self, path: str):
+        self._file = open(path, 'a')
+
+    def write(self, event: dict) -> None:
+        self._file.write(json.dumps(event) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class OpenMetricsSink:
+    """Aggregates events into counters and gauges, written as an OpenMetrics text file when closed."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._gauges: dict[tuple[str, tuple], float] = {}
+
+    def write(self, event: dict) -> None:
+        name = event['event']
+        labels = tuple(sorted((k, v) for k, v in event.get('labels', {}).items()))
+        if name == 'phase':
+            labels = (('phase', event['phase']),) + labels
+            for metric, field in (('phase_wall_seconds', 'wall_seconds'), ('phase_cpu_seconds', 'cpu_seconds')):
+                self._counters[metric, labels] = self._counters.get((metric, labels), 0) + event[field]
+            self._counters['phase_calls', labels] = self._counters.get(('phase_calls', labels), 0) + 1
+            self._gauges['phase_peak_rss_bytes', labels] = max(
+                self._gauges.get(('phase_peak_rss_bytes', labels), 0), event['peak_rss_bytes']
+            )
+        else:
+            for field, value in event.items():
+                if field not in ('event', 'timestamp', 'labels') and isinstance(value, (int, float)):
+                    self._gauges[f'{name}_{field}', labels] = value
+
+    def close(self) -> None:
+        lines = []
+        for kind, metrics in (('counter', self._counters), ('gauge', self._gauges)):
+            for name in sorted({name for name, _ in metrics}):
+                lines.append(f'# TYPE {name} {kind}')
+                suffix = '_total' if kind == 'counter' else ''
+                for (metric, labels), value in sorted(metrics.items()):
+                    if metric == name:
+                        label_text = ','.join(f'{k}="{_label_value(v)}"' for k, v in labels)
+                        lines.append(f'{name}{suffix}{{{label_text}}} {value}')
+        lines.append('# EOF')
+
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temporary_path, self.path)
+
+
+class Recorder:
+    def __init__(self, sink: JsonLinesSink | OpenMetricsSink, **labels):
+        self.sink = sink
+        self.labels = labels
+
+    @contextmanager
+    def phase(self, name: str, **labels) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        rss = peak_rss_bytes()
+        try:
+            yield
+        finally:
+            peak = peak_rss_bytes()
+            self.record(
+                'phase', phase=name, wall_seconds=time.perf_counter() - wall, cpu_seconds=time.process_time() - cpu,
+                peak_rss_bytes=peak, peak_rss_growth_bytes=peak - rss, labels=labels
+            )
+
+    def record(self, event: str, labels: dict | None = None, **fields) -> None:
+        labels = {**self.labels, **(labels or {})}
+        self.sink.write({'event': event, 'timestamp': time.time(), **fields, **({'labels': labels} if labels else {})})
+
+    def close(self) -> None:
+        self.sink.close()
+
+
+# Library code reports to whichever recorder the entry point installed; with none installed it costs nothing
+_active: Recorder | None = None
+
+
+def phase(name: str, **labels):
+    return nullcontext() if _active is None else _active.phase(name, **labels)
+
+
+def record(event: str, **fields) -> None:
+    if _active is not None:
+        _active.record(event, **fields)
+
+
+@contextmanager
+def recording(path: str | None, **labels) -> Iterator[Recorder | None]:
+    """Installs a recorder writing to `path` for the duration of the block; `.prom` and `.txt` files are written
+    as OpenMetrics text, anything else as JSON lines."""
+    global _active
+    if path is None:
+        yield None
+        return
+
+    sink = OpenMetricsSink(path) if path.endswith(('.prom', '.txt')) else JsonLinesSink(path)
+    _active = Recorder(sink, **labels)
+    try:
+        yield _active
+    finally:
+        _active.close()
+        _active = None
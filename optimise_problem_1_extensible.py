@@ -1,54 +1,67 @@
-import json
-from itertools import combinations
-
-from pulp import LpInteger, LpMinimize, LpProblem, LpVariable, lpSum
-
-from args_parser import cli_args
-from problem_1.cbc import coin_cmd_solver
-from problem_1.models import RouteVariables, Inputs
-from problem_1.outputs import print_box, print_solution, create_gif
-
-
-def solve_supply_chain(inputs: Inputs) -> tuple[LpProblem, RouteVariables]:
-    problem = LpProblem('supply_chain_problem', LpMinimize)
-    routes = [(w, s) for w in inputs.warehouses for s in inputs.stores]
-    variables = LpVariable.dicts('route', (inputs.warehouses, inputs.stores), 0, None, LpInteger)
-
-    transportation_cost = lpSum([variables[w][s] * inputs.costs[w][s] for (w, s) in routes])
-    problem += (transportation_cost, 'total_cost')
-
-    for w in inputs.warehouses:
-        problem += (lpSum([variables[w][s] for s in inputs.stores]) <= inputs.supply[w], f'products_from_warehouse_{w}')
-
-    for s in inputs.stores:
-        problem += (lpSum([variables[w][s] for w in inputs.warehouses]) >= inputs.demand[s], f'products_to_store_{s}')
-
-    print_box('Problem')
-    print(problem)
-    print_box('Run solver')
-    problem.solve(coin_cmd_solver())
-
-    return problem, variables
-
-
-def solve_for(inputs: Inputs, visualise: bool) -> None:
-    problem, route_variables = solve_supply_chain(inputs)
-    print_solution(problem)
+from args_parser import cli_args, solver_settings
+from instrumentation.phases import phase, recording
+from problem_1.matrix import build_transportation_model
+from problem_1.models import Inputs
+from problem_1.network import Network, load_network
+from problem_1.gifs import gif_jobs, render_gifs
+from problem_1.supply_chain import solve_supply_chain, solve_supply_chain_matrix
+from problem_1.transportation import solve_transportation
+from problem_1.outputs import print_box, print_solution, print_matrix_solution, print_sensitivity
+from problem_1.sensitivity import sensitivity_index
+from solvers.backends import SolverSettings
+
+
+def solve_for(inputs: Inputs | Network, visualise: bool, builder: str = 'pulp',
+              settings: SolverSettings = SolverSettings(), render_workers: int | None = None,
+              verbose: bool = False, engine: str = 'milp', sensitivity_file: str | None = None) -> None:
+    solver = settings.solver()
+    # The matrix builder and the network engines read the arrays directly; the PuLP model and the GIFs need the
+    # nested dictionaries
+    if isinstance(inputs, Network) and ((builder != 'matrix' and engine == 'milp') or visualise):
+        with phase('convert_inputs'):
+            inputs = inputs.to_inputs()
+    if engine != 'milp':
+        print_box('Run solver')
+        with phase('solve', engine=engine):
+            model, solution = solve_transportation(inputs, engine)
+        with phase('extract'):
+            print_matrix_solution(model, solution)
+    elif builder == 'matrix':
+        model, solution = solve_supply_chain_matrix(inputs, solver)
+        with phase('extract'):
+            print_matrix_solution(model, solution)
+    else:
+        problem, route_variables = solve_supply_chain(inputs, solver, verbose)
+        with phase('extract'):
+            print_solution(problem)
+
+    if sensitivity_file is not None:
+        # The transportation LP has integral vertices, so its relaxation is indexed whichever way it was solved. The
+        # index needs an optimal basis, which only CBC writes out, so this is always one more CBC solve
+        with phase('sensitivity'):
+            model = build_transportation_model(
+                inputs.supply_array(), inputs.demand_array(), *inputs.routes(), inputs.warehouses, inputs.stores
+            )
+            index = sensitivity_index(model.matrix, row_names=model.row_names(), column_names=model.route_names())
+            index.save(sensitivity_file)
+        print_sensitivity(index)
 
     if visualise:
         print()
         print_box("Create gif")
 
-        for warehouse in inputs.warehouses:
-            for store_1, store_2 in combinations(inputs.stores, 2):
-                create_gif(
-                    inputs.supply[warehouse], inputs.demand[store_1], inputs.demand[store_2],
-                    warehouse, store_1, store_2
-                )
+        with phase('render'):
+            rendered, unchanged = render_gifs(gif_jobs(inputs), workers=render_workers)
+        print(f"Rendered {rendered} GIFs, {unchanged} unchanged since the last run")
 
 
 if __name__ == '__main__':
     args = cli_args()
-
-    with open(args.input_file) as f:
-        solve_for(inputs=Inputs(**json.load(f)), visualise=args.visualise)
+    with recording(args.metrics, entry_point='optimise_problem_1_extensible'):
+        with phase('load'):
+            network = load_network(args.input_file)
+        solve_for(
+            inputs=network, visualise=args.visualise, builder=args.builder, settings=solver_settings(args),
+            render_workers=args.render_workers, verbose=args.verbose,
+            engine=args.engine, sensitivity_file=args.sensitivity
+        )
@@ -1,7 +1,7 @@
 from pulp import LpInteger, LpMinimize, LpProblem, LpVariable
 
-from problem_1.cbc import coin_cmd_solver
 from problem_1.outputs import print_box, print_solution
+from solvers.backends import solver_backend
 
 
 def solve_supply_chain(cost_to_s1: int, cost_to_s2: int, available_supply: int, s1_demand: int,
@@ -20,7 +20,7 @@ def solve_supply_chain(cost_to_s1: int, cost_to_s2: int, available_supply: int,
     print_box('Problem')
     print(problem)
     print_box('Run solver')
-    problem.solve(coin_cmd_solver())
+    problem.solve(solver_backend())
 
     return problem
 
@@ -1,25 +1,33 @@
-import json
+import os
 import random
+import signal
+import threading
 from functools import partial
-from typing import TypedDict
+from typing import Callable, Sequence, TypedDict, TYPE_CHECKING
 
 import numpy as np
-from leap_ec import ops, Representation, context, Individual
-from leap_ec.algorithm import generational_ea
-from leap_ec.decoder import IdentityDecoder
-from leap_ec.ops import UniformCrossover
-from leap_ec.real_rep.ops import mutate_gaussian
 from numpy import ndarray
 
-from args_parser import cli_args
-from problem_2.outputs import process_result
-from problem_2.probes import BestFitnessLoggerProbe
-from problem_2.problem import TransportationProblem
+from args_parser import ga_cli_args
+from instrumentation.phases import phase, recording
+from problem_1.network import Network, load_network
 
+if TYPE_CHECKING:
+    from leap_ec import Individual
+
+    from problem_2.checkpoint import GACheckpoint
+
+
+def stop_fn(_population: list['Individual'], generations: int, target_fitness: float | None = None) -> bool:
+    from leap_ec import context
 
-def stop_fn(_population: list[Individual], generations: int) -> bool:
     current_generation = context['leap']['generation']
-    best_generation = context.get('track', {}).get('best_entry', {}).get('generation', 0)
+    best_entry = context.get('track', {}).get('best_entry', {})
+    best_generation = best_entry.get('generation', 0)
+
+    if target_fitness is not None and best_entry.get('fitness', np.inf) <= target_fitness:
+        print("Stopping at generation", current_generation, "because the target fitness was reached.")
+        return True
 
     threshold = min(5000, round(generations / 4))
     should_stop = current_generation - best_generation >= threshold
@@ -36,53 +44,207 @@ class GAInputs(TypedDict):
     costs: ndarray
 
 
-def clean_inputs(supply: dict[str, int], demand: dict[str, int], costs: dict[str, dict[str, int]]) -> GAInputs:
-    costs_matrix: list[list[int]] = [[costs[warehouse][store] for store in demand] for warehouse in supply]
-    costs = np.array(costs_matrix)
-    supply = np.array(list(supply.values()))
-    demand = np.array(list(demand.values()))
-
-    return {"supply": supply, "demand": demand, "costs": costs}
+def clean_inputs(network: Network) -> GAInputs:
+    # Every genome entry is a route, so the GA cannot run on a network with missing routes
+    if not network.complete:
+        raise ValueError('The genetic algorithm needs a cost for every warehouse and store pair')
+
+    return {"supply": network.supply, "demand": network.demand, "costs": network.costs}
+
+
+def run_ga(supply: ndarray[int], demand: ndarray[int], costs: ndarray[ndarray[int]],
+           extra_operators: Sequence[Callable[[list['Individual']], list['Individual']]] = (),
+           plot_formats: Sequence[str] = ('png',), history_size: int | None = None, history_every: int = 1,
+           initial_plan: ndarray | None = None, generations: int = 20000,
+           target_fitness: float | None = None, adaptive: bool = False, repair: bool = False,
+           integer: bool = False, interrupt: Callable[[], bool] | None = None, checkpoint: str | None = None,
+           checkpoint_every: int = 500, resume_from: 'GACheckpoint | None' = None) -> dict:
+    # The GA stack is imported here so that argument parsing and importing this module stay fast
+    from leap_ec import ops, Representation, context
+    from leap_ec.algorithm import generational_ea
+    from leap_ec.decoder import IdentityDecoder
+    from leap_ec.ops import UniformCrossover
+    from leap_ec.real_rep.ops import mutate_gaussian
+
+    from problem_2.adaptive import AdaptiveController
+    from problem_2.checkpoint import Checkpointer
+    from problem_2.evaluation import evaluate_population
+    from problem_2.plots import ConvergencePlotWriter
+    from problem_2.probes import BestFitnessLoggerProbe, ThroughputProbe
+    from problem_2.problem import TransportationProblem
+    from problem_2.repair import GenomeRepair
+    from problem_2.seeding import SeededInitializer
 
-
-def optimise_with_ga(supply: ndarray[int], demand: ndarray[int], costs: ndarray[ndarray[int]]) -> None:
     num_warehouses = len(supply)
     num_stores = len(demand)
     genome_size = num_warehouses * num_stores
-    representation = Representation(
-        initialize=lambda: np.random.randint(0, np.max(supply), size=genome_size),
-        decoder=IdentityDecoder(),
-    )
+    if resume_from is not None:
+        if resume_from.genomes[0].size != genome_size:
+            raise ValueError(f'The checkpoint holds genomes of {resume_from.genomes[0].size} routes, not {genome_size}')
+        if (resume_from.adaptive is not None) != adaptive:
+            raise ValueError('A run must be resumed with --adaptive exactly when it was started with it')
+        initialize = resume_from.initialize()
+    elif initial_plan is not None:
+        initialize = SeededInitializer(initial_plan, np.max(supply))
+    else:
+        def initialize():
+            return np.random.randint(0, np.max(supply), size=genome_size)
+    representation = Representation(initialize=initialize, decoder=IdentityDecoder())
     pop_size = 100
     elite_retention_count = 2
-    generations = 20000
+    probe = BestFitnessLoggerProbe(
+        generations, elite_retention_count, ConvergencePlotWriter(plot_formats) if plot_formats else None,
+        history_size, history_every
+    )
 
-    generational_ea(
+    if repair or integer:
+        # Offspring are repaired or rounded as a population, just before they are evaluated
+        genome_repair = GenomeRepair(supply, demand, repair, integer)
+
+        def repair_and_evaluate(pop):
+            return evaluate_population(genome_repair(pop))
+    else:
+        repair_and_evaluate = evaluate_population
+    throughput = ThroughputProbe(repair_and_evaluate, evaluations=resume_from.evaluations if resume_from else 0)
+    evaluate = throughput.evaluate
+
+    max_stall = min(5000, round(generations / 4))
+    if adaptive:
+        controller = AdaptiveController(
+            np.max(supply), genome_size, max_stall, elite_count=elite_retention_count, evaluate=evaluate
+        )
+        record_parents, mutate, adapt = [controller.record_parents], controller.mutate, [controller]
+        stop = partial(controller.stop, target_fitness=target_fitness)
+    else:
+        controller, record_parents, adapt = None, [], []
+
+        def mutate(pop):
+            return mutate_gaussian(
+                pop, std=50, expected_num_mutations=random.randint(0, genome_size), bounds=(0, np.max(supply))
+            )
+
+        stop = partial(stop_fn, generations=generations, target_fitness=target_fitness)
+
+    if interrupt is not None:
+        # A cancelled or overdue run ends at the next generation, keeping the best plan found so far
+        keep_going = stop
+
+        def stop(pop):
+            return interrupt() or keep_going(pop)
+
+    start_generation = 0
+    if resume_from is not None:
+        start_generation = resume_from.generation
+        resume_from.restore_context()
+        if controller is not None:
+            controller.restore(resume_from.adaptive)
+    checkpointer = None
+    if checkpoint is not None:
+        checkpointer = Checkpointer(checkpoint, checkpoint_every, throughput, controller, start_generation)
+    if resume_from is not None:
+        # Restored last, as building the run above must not draw from the generators
+        resume_from.restore_random()
+
+    population = generational_ea(
         max_generations=generations,
         pop_size=pop_size,
         problem=TransportationProblem(supply, demand, costs),
         representation=representation,
         pipeline=[
+            # Checkpoints are taken first, before anything in the generation draws a random number
+            *([checkpointer] if checkpointer is not None else []),
+            *record_parents,
             ops.tournament_selection(k=3),
             ops.clone(),
             UniformCrossover(0.3),
-            lambda pop: mutate_gaussian(
-                pop, std=50, expected_num_mutations=random.randint(0, genome_size),
-                bounds=(0, np.max(supply))
-            ),
-            ops.evaluate,
+            mutate,
             ops.pool(size=pop_size),
-            BestFitnessLoggerProbe(generations, elite_retention_count),
+            evaluate,
+            *extra_operators,
+            probe,
+            *adapt,
+            throughput,
         ],
+        init_evaluate=evaluate if resume_from is None else resume_from.restore_fitness,
         k_elites=elite_retention_count,
-        stop=partial(stop_fn, generations=generations)
+        stop=stop,
+        start_generation=start_generation
     )
-
-    process_result(supply, demand)
+    if checkpointer is not None:
+        # The final population is at a generation boundary too, so a stopped or interrupted run resumes from it
+        checkpointer.save(population)
+    if adaptive:
+        print('Adaptive diagnostics:', ', '.join(f'{k}={v:.4g}' for k, v in controller.diagnostics().items()))
+    probe.close()
+    throughput.close()
+
+    return context['track']['best_entry']
+
+
+def optimise_with_ga(supply: ndarray[int], demand: ndarray[int], costs: ndarray[ndarray[int]], islands: int = 1,
+                     migration_interval: int = 500, plot_formats: Sequence[str] = ('png',),
+                     history_size: int | None = None, history_every: int = 1, initialise: str = 'random',
+                     adaptive: bool = False, repair: bool = False, integer: bool = False,
+                     checkpoint: str | None = None, checkpoint_every: int = 500, resume: bool = False) -> None:
+    from problem_2.checkpoint import load_checkpoint
+    from problem_2.islands import run_islands
+    from problem_2.outputs import process_result
+    from problem_2.seeding import initial_plan
+
+    if checkpoint is not None and islands > 1:
+        raise ValueError('Checkpoints are only taken of single island runs')
+    if resume and checkpoint is None:
+        raise ValueError('--resume needs the --checkpoint to resume from')
+
+    resume_from = None
+    if resume and os.path.exists(checkpoint):
+        with phase('resume'):
+            resume_from = load_checkpoint(checkpoint)
+        print('Resuming from generation', resume_from.generation, 'of', checkpoint)
+    elif resume:
+        print('No checkpoint at', checkpoint, 'yet, so starting a new run')
+
+    plan = None
+    if resume_from is None:
+        with phase('initialise', initialise=initialise):
+            plan = initial_plan(initialise, supply, demand, costs)
+
+    # Preemptible capacity gives notice with SIGTERM: the run stops at the next generation and saves its checkpoint
+    preempted = threading.Event()
+    if checkpoint is not None:
+        signal.signal(signal.SIGTERM, lambda *_: preempted.set())
+
+    # Island workers run in their own processes, so only the run as a whole is timed for them
+    with phase('ga', islands=islands):
+        if islands > 1:
+            best_entry = run_islands(
+                run_ga, islands, migration_interval, migration_count=2,
+                supply=supply, demand=demand, costs=costs, plot_formats=(),
+                history_size=history_size, history_every=history_every, initial_plan=plan, adaptive=adaptive,
+                repair=repair, integer=integer
+            )
+        else:
+            best_entry = run_ga(
+                supply, demand, costs, plot_formats=plot_formats, history_size=history_size,
+                history_every=history_every, initial_plan=plan, adaptive=adaptive, repair=repair, integer=integer,
+                interrupt=preempted.is_set if checkpoint is not None else None, checkpoint=checkpoint,
+                checkpoint_every=checkpoint_every, resume_from=resume_from
+            )
+    if preempted.is_set():
+        print('Stopped early on SIGTERM; run again with --resume to carry on from', checkpoint)
+
+    with phase('extract'):
+        process_result(supply, demand, best_entry)
 
 
 if __name__ == '__main__':
-    args = cli_args()
-
-    with open(args.input_file) as f:
-        optimise_with_ga(**clean_inputs(**json.load(f)))
+    args = ga_cli_args()
+    with recording(args.metrics, entry_point='optimise_problem_2'):
+        with phase('load'):
+            inputs = clean_inputs(load_network(args.input_file))
+        optimise_with_ga(
+            **inputs, islands=args.islands, migration_interval=args.migration_interval,
+            plot_formats=args.plot_format, history_size=args.history_size, history_every=args.history_every,
+            initialise=args.initialise, adaptive=args.adaptive, repair=args.repair, integer=args.integer,
+            checkpoint=args.checkpoint, checkpoint_every=args.checkpoint_every, resume=args.resume
+        )
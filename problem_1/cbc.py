@@ -7,9 +7,14 @@ def get_threads() -> int:
     return max(1, multiprocessing.cpu_count() - 1)
 
 
-def coin_cmd_solver() -> COIN_CMD:
+def coin_cmd_solver(threads: int | None = None, msg: bool = True, time_limit: float | None = None,
+                    gap_rel: float | None = None, gap_abs: float | None = None) -> COIN_CMD:
     return COIN_CMD(
-        threads=get_threads(),
+        threads=threads or get_threads(),
         path='cbc',
-        presolve=True
+        presolve=True,
+        msg=msg,
+        timeLimit=time_limit,
+        gapRel=gap_rel,
+        gapAbs=gap_abs
     )
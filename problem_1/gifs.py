@@ -0,0 +1,174 @@
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import batched, combinations
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from problem_1.models import Inputs
+
+OUTPUT_DIR = 'problem_1/outputs'
+MANIFEST = 'manifest.json'
+# Bump whenever the drawing changes, so every GIF is rendered again
+RENDER_VERSION = 1
+FRAME_DURATION = 1750
+
+
+@dataclass(frozen=True)
+class GifJob:
+    warehouse_upper_bound: int
+    x_store_upper_bound: int
+    y_store_upper_bound: int
+    warehouse_name: str
+    x_name: str
+    y_name: str
+
+    @property
+    def file_name(self) -> str:
+        return f'{self.warehouse_name}_{self.x_name}_{self.y_name}.gif'
+
+    def key(self) -> str:
+        return f'{RENDER_VERSION}:{self.warehouse_upper_bound}:{self.x_store_upper_bound}:{self.y_store_upper_bound}'
+
+
+def gif_jobs(inputs: Inputs) -> Iterator[GifJob]:
+    for warehouse in inputs.warehouses:
+        for store_1, store_2 in combinations(inputs.stores, 2):
+            yield GifJob(
+                inputs.supply[warehouse], inputs.demand[store_1], inputs.demand[store_2], warehouse, store_1, store_2
+            )
+
+
+class _FrameRenderer:
+    def __init__(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Polygon
+
+        # One figure per process is redrawn for every frame; its artists are updated rather than recreated,
+        # so nothing accumulates between GIFs and the axes are not rebuilt each time
+        self.canvas = FigureCanvasAgg(Figure())
+        self.ax = self.canvas.figure.add_subplot()
+        self.lines = [
+            self.ax.plot([], [], color=color, linestyle='-', marker='o')[0] for color in ('red', 'green', 'purple')
+        ]
+        self.region = self.ax.add_patch(Polygon(np.zeros((1, 2)), color='green', alpha=0.5))
+
+    def frames(self, job: GifJob) -> list[np.ndarray]:
+        upper = job.warehouse_upper_bound
+        x_upper = job.x_store_upper_bound
+        y_upper = job.y_store_upper_bound
+        warehouse, x_store, y_store = self.lines
+        warehouse.set_data([upper, 0], [0, upper])
+        warehouse.set_label(f'{job.x_name} + {job.y_name} ≤ {upper}')
+        x_store.set_data([x_upper, x_upper], [0, upper])
+        x_store.set_label(f'{job.x_name} ≤ {x_upper}')
+        y_store.set_data([0, upper], [y_upper, y_upper])
+        y_store.set_label(f'{job.y_name} ≤ {y_upper}')
+
+        self.ax.set_xlim(0, upper)
+        self.ax.set_ylim(0, upper)
+        self.ax.set_xlabel(job.x_name)
+        self.ax.set_ylabel(job.y_name)
+        self.ax.set_title(f'Feasible Region Evolution from {job.warehouse_name} to {job.x_name} and {job.y_name}')
+
+        frames = []
+        for stage in range(3):
+            for i, line in enumerate(self.lines):
+                line.set_visible(i <= stage)
+            # The feasible region shrinks as each constraint is added
+            x = np.linspace(0, upper if stage == 0 else x_upper, 100)
+            top = upper - x if stage < 2 else np.minimum(upper - x, y_upper)
+            self.region.set_xy(np.column_stack([np.concatenate([x, x[::-1]]),
+                                                np.concatenate([top, np.zeros_like(x)])]))
+            self.ax.legend(handles=self.lines[:stage + 1])
+            self.canvas.draw()
+            frames.append(np.array(self.canvas.buffer_rgba())[..., :3])
+
+        return frames
+
+
+_renderer: _FrameRenderer | None = None
+
+
+def render_gif(job: GifJob, output_dir: str = OUTPUT_DIR) -> str:
+    from PIL import Image
+
+    global _renderer
+    if _renderer is None:
+        _renderer = _FrameRenderer()
+
+    # Frames go straight from the canvas buffer into the GIF without touching disk
+    images = [
+        Image.fromarray(frame).quantize(colors=64, method=Image.Quantize.FASTOCTREE)
+        for frame in _renderer.frames(job)
+    ]
+    file_name = os.path.join(output_dir, job.file_name)
+    images[0].save(file_name, save_all=True, append_images=images[1:], duration=FRAME_DURATION, loop=0)
+
+    return file_name
+
+
+def _render_batch(jobs: tuple[GifJob, ...], output_dir: str) -> list[tuple[str, str]]:
+    return [(render_gif(job, output_dir), job.key()) for job in jobs]
+
+
+def _load_manifest(output_dir: str) -> dict[str, str]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(output_dir: str, manifest: dict[str, str]) -> None:
+    file_name = os.path.join(output_dir, MANIFEST)
+    with open(file_name + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(file_name + '.tmp', file_name)
+
+
+def render_gifs(jobs: Iterable[GifJob], output_dir: str = OUTPUT_DIR, workers: int | None = None,
+                batch_size: int = 8) -> tuple[int, int]:
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+    skipped = 0
+
+    def changed() -> Iterator[GifJob]:
+        nonlocal skipped
+        for job in jobs:
+            path = os.path.join(output_dir, job.file_name)
+            if manifest.get(path) == job.key() and os.path.exists(path):
+                skipped += 1
+            else:
+                yield job
+
+    workers = workers or os.cpu_count() or 1
+    rendered = 0
+    pending: set[Future] = set()
+
+    def record_completed() -> None:
+        nonlocal pending, rendered
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            for file_name, key in future.result():
+                manifest[file_name] = key
+                rendered += 1
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Jobs are generated lazily and only a few batches are in flight, so memory stays flat
+            for batch in batched(changed(), batch_size):
+                if len(pending) >= 2 * workers:
+                    record_completed()
+                pending.add(executor.submit(_render_batch, batch, output_dir))
+            while pending:
+                record_completed()
+    finally:
+        # Whatever finished is recorded, so an interrupted run resumes where it stopped
+        _save_manifest(output_dir, manifest)
+
+    return rendered, skipped
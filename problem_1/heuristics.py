@@ -0,0 +1,58 @@
+import numpy as np
+from numpy import ndarray
+
+
+def balance(supply: ndarray, demand: ndarray, costs: ndarray) -> tuple[ndarray, ndarray, ndarray]:
+    surplus = supply.sum() - demand.sum()
+    if surplus > 0:
+        # Unused supply goes to a zero cost dummy store
+        return supply, np.append(demand, surplus), np.column_stack([costs, np.zeros(len(supply), costs.dtype)])
+    if surplus < 0:
+        # Unmet demand comes from a zero cost dummy warehouse
+        return np.append(supply, -surplus), demand, np.vstack([costs, np.zeros(len(demand), costs.dtype)])
+
+    return supply, demand, costs
+
+
+def _penalties(costs: ndarray, axis: int) -> ndarray:
+    if costs.shape[axis] == 1:
+        return costs.min(axis=axis)
+
+    cheapest = np.partition(costs, 1, axis=axis)
+    return np.take(cheapest, 1, axis=axis) - np.take(cheapest, 0, axis=axis)
+
+
+def vogel_approximation(supply: ndarray, demand: ndarray, costs: ndarray) -> ndarray:
+    num_warehouses, num_stores = costs.shape
+    remaining_supply, remaining_demand, balanced_costs = balance(supply, demand, costs)
+    remaining_supply = remaining_supply.astype(np.int64)
+    remaining_demand = remaining_demand.astype(np.int64)
+    balanced_costs = balanced_costs.astype(np.float64)
+    plan = np.zeros(balanced_costs.shape, dtype=np.int64)
+    rows = np.arange(len(remaining_supply))
+    cols = np.arange(len(remaining_demand))
+
+    while len(rows) and len(cols):
+        active_costs = balanced_costs[np.ix_(rows, cols)]
+        row_penalties = _penalties(active_costs, axis=1)
+        col_penalties = _penalties(active_costs, axis=0)
+
+        if row_penalties.max() >= col_penalties.max():
+            i = np.argmax(row_penalties)
+            j = np.argmin(active_costs[i])
+        else:
+            j = np.argmax(col_penalties)
+            i = np.argmin(active_costs[:, j])
+
+        w, s = rows[i], cols[j]
+        amount = min(remaining_supply[w], remaining_demand[s])
+        plan[w, s] = amount
+        remaining_supply[w] -= amount
+        remaining_demand[s] -= amount
+
+        if remaining_supply[w] == 0:
+            rows = np.delete(rows, i)
+        else:
+            cols = np.delete(cols, j)
+
+    return plan[:num_warehouses, :num_stores]
@@ -0,0 +1,148 @@
+import os
+import tempfile
+from dataclasses import replace
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+from pulp import COIN_CMD
+
+from problem_1.matrix import (
+    MatrixModel, MatrixSolution, TransportationModel, bound_lines, build_transportation_model, column_lines,
+    rhs_lines, row_lines, solve_matrix_model, write_mps_sections
+)
+from problem_1.models import Inputs
+from problem_1.sensitivity import SensitivityIndex, WhatIf, read_basis, sensitivity_index
+from solvers.scipy_solver import ScipySolver
+
+
+class IncrementalTransportationModel:
+    def __init__(self, inputs: Inputs, solver: COIN_CMD | ScipySolver | None = None, chunk_size: int = 4096):
+        # Integer supply and demand give the transportation LP integral vertices, so it is solved as an LP
+        # and warm started from the previous basis rather than branched on
+        self.model: TransportationModel = build_transportation_model(
+            inputs.supply_array(), inputs.demand_array(), *inputs.routes(), inputs.warehouses, inputs.stores,
+            integer=False
+        )
+        self.solver = solver
+        self.chunk_size = chunk_size
+        self.solution: MatrixSolution | None = None
+        self._previous_values: ndarray | None = None
+        self._basis_dir = tempfile.TemporaryDirectory()
+        self._basis_file = os.path.join(self._basis_dir.name, 'model.bas')
+        self._index: SensitivityIndex | None = None
+
+        matrix = self.model.matrix
+        self._warehouse_positions = {warehouse: i for i, warehouse in enumerate(inputs.warehouses)}
+        self._store_positions = {store: i for i, store in enumerate(inputs.stores)}
+        self._routes = np.full((len(inputs.warehouses), len(inputs.stores)), -1, dtype=np.int64)
+        self._routes[self.model.warehouse_index, self.model.store_index] = np.arange(matrix.num_columns)
+
+        # Formatted MPS sections are cached; the columns section is split into chunks so a cost
+        # change only re-formats the chunk holding that route
+        self._csc = matrix.to_csc()
+        self._columns = [None] * -(-matrix.num_columns // chunk_size)
+        self._rows = None
+        self._rhs = None
+        self._bounds = bound_lines(matrix)
+
+    def update_supply(self, warehouse: str, supply: int) -> None:
+        self.model.matrix.row_upper[self._warehouse_positions[warehouse]] = supply
+        self._invalidate_rhs()
+
+    def update_demand(self, store: str, demand: int) -> None:
+        self.model.matrix.row_lower[len(self._warehouse_positions) + self._store_positions[store]] = demand
+        self._invalidate_rhs()
+
+    def update_cost(self, warehouse: str, store: str, cost: float) -> None:
+        route = self._routes[self._warehouse_positions[warehouse], self._store_positions[store]]
+        if route < 0:
+            raise KeyError(f'There is no route from {warehouse} to {store}')
+
+        self.model.matrix.objective[route] = cost
+        self._columns[route // self.chunk_size] = None
+        self.solution = None
+        self._index = None
+
+    def solve(self) -> MatrixSolution:
+        # Unchanged models are not re-solved at all
+        if self.solution is None:
+            self.solution = solve_matrix_model(
+                self.model.matrix, self.solver, self._previous_values, self._write, self._basis_file
+            )
+            self._previous_values = self.solution.values
+
+        return self.solution
+
+    def sensitivity(self) -> SensitivityIndex:
+        if self._index is None:
+            solution = self.solve()
+            matrix = self.model.matrix
+            # The index keeps its own copy of everything the updates change in place
+            matrix = replace(
+                matrix, objective=matrix.objective.copy(), row_lower=matrix.row_lower.copy(),
+                row_upper=matrix.row_upper.copy()
+            )
+            names = self.model.row_names(), self.model.route_names()
+            if isinstance(self.solver, ScipySolver):
+                self._index = sensitivity_index(matrix, None, *names)
+            else:
+                # CBC leaves the optimal basis of the last solve behind, so no further solve is needed
+                self._index = SensitivityIndex(
+                    matrix, solution.values, solution.row_activity, read_basis(self._basis_file, matrix), None, *names
+                )
+
+        return self._index
+
+    def what_if_supply(self, warehouse: str, change: float) -> WhatIf:
+        row = self._warehouse_positions[warehouse]
+        supply = self.model.matrix.row_upper[row]
+        return self.sensitivity().rhs_change(row, change) or self._resolve(
+            lambda: self.update_supply(warehouse, supply + change), lambda: self.update_supply(warehouse, supply)
+        )
+
+    def what_if_demand(self, store: str, change: float) -> WhatIf:
+        row = len(self._warehouse_positions) + self._store_positions[store]
+        demand = self.model.matrix.row_lower[row]
+        return self.sensitivity().rhs_change(row, change) or self._resolve(
+            lambda: self.update_demand(store, demand + change), lambda: self.update_demand(store, demand)
+        )
+
+    def what_if_cost(self, warehouse: str, store: str, change: float) -> WhatIf:
+        route = self._routes[self._warehouse_positions[warehouse], self._store_positions[store]]
+        if route < 0:
+            raise KeyError(f'There is no route from {warehouse} to {store}')
+
+        cost = self.model.matrix.objective[route]
+        return self.sensitivity().cost_change(route, change) or self._resolve(
+            lambda: self.update_cost(warehouse, store, cost + change), lambda: self.update_cost(warehouse, store, cost)
+        )
+
+    def _resolve(self, change: Callable[[], None], undo: Callable[[], None]) -> WhatIf:
+        # Changes outside the ranges are solved warm started, then the model is put back as it was
+        solution, index = self.solution, self._index
+        change()
+        changed = self.solve()
+        undo()
+        self.solution, self._index = solution, index
+
+        return WhatIf(changed.status, changed.objective, changed.values, from_index=False)
+
+    def _invalidate_rhs(self) -> None:
+        self._rows = None
+        self._rhs = None
+        self.solution = None
+        self._index = None
+
+    def _write(self, matrix: MatrixModel, file_name: str) -> None:
+        if self._rows is None:
+            self._rows = row_lines(matrix)
+            self._rhs = rhs_lines(matrix)
+        for chunk, lines in enumerate(self._columns):
+            if lines is None:
+                start = chunk * self.chunk_size
+                self._columns[chunk] = column_lines(
+                    matrix, self._csc, start, min(start + self.chunk_size, matrix.num_columns)
+                )
+
+        write_mps_sections(file_name, self._rows, self._columns, self._rhs, self._bounds)
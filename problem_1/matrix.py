@@ -0,0 +1,321 @@
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+from pulp import COIN_CMD
+
+from instrumentation.phases import phase
+from problem_1.cbc import coin_cmd_solver
+from solvers.scipy_solver import ScipySolver, solve_arrays
+
+MINIMISE = 1
+MAXIMISE = -1
+
+
+@dataclass
+class MatrixModel:
+    objective: ndarray
+    indptr: ndarray
+    indices: ndarray
+    data: ndarray
+    row_lower: ndarray
+    row_upper: ndarray
+    col_lower: ndarray
+    col_upper: ndarray
+    integrality: ndarray
+    sense: int = MINIMISE
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.row_lower)
+
+    @property
+    def num_columns(self) -> int:
+        return len(self.objective)
+
+    def row_index(self) -> ndarray:
+        return np.repeat(np.arange(self.num_rows), np.diff(self.indptr))
+
+    def to_csc(self) -> tuple[ndarray, ndarray, ndarray]:
+        order = np.argsort(self.indices, kind='stable')
+        indptr = np.zeros(self.num_columns + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.num_columns), out=indptr[1:])
+
+        return indptr, self.row_index()[order], self.data[order]
+
+
+@dataclass
+class MatrixSolution:
+    status: str
+    objective: float
+    values: ndarray
+    reduced_costs: ndarray
+    row_activity: ndarray
+    duals: ndarray
+
+
+@dataclass
+class TransportationModel:
+    matrix: MatrixModel
+    warehouses: list[str]
+    stores: list[str]
+    warehouse_index: ndarray
+    store_index: ndarray
+
+    def route_name(self, route: int) -> str:
+        return f'route_{self.warehouses[self.warehouse_index[route]]}_{self.stores[self.store_index[route]]}'
+
+    def route_names(self) -> list[str]:
+        return [
+            f'route_{self.warehouses[w]}_{self.stores[s]}'
+            for w, s in zip(self.warehouse_index.tolist(), self.store_index.tolist())
+        ]
+
+    def row_names(self) -> list[str]:
+        # Named as in the PuLP model
+        return ([f'products_from_warehouse_{w}' for w in self.warehouses] +
+                [f'products_to_store_{s}' for s in self.stores])
+
+
+def build_transportation_model(supply: ndarray, demand: ndarray, warehouse_index: ndarray, store_index: ndarray,
+                               route_costs: ndarray, warehouses: list[str], stores: list[str],
+                               integer: bool = True) -> TransportationModel:
+    num_warehouses = len(supply)
+    num_routes = len(route_costs)
+
+    # Supply rows come first, then demand rows; every route has a 1 in its warehouse row and its store row
+    rows = np.concatenate([warehouse_index, num_warehouses + store_index])
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(num_warehouses + len(demand) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(indptr) - 1), out=indptr[1:])
+
+    matrix = MatrixModel(
+        objective=np.asarray(route_costs, dtype=np.float64),
+        indptr=indptr,
+        indices=np.tile(np.arange(num_routes), 2)[order],
+        data=np.ones(2 * num_routes),
+        row_lower=np.concatenate([np.full(num_warehouses, -np.inf), demand]).astype(np.float64),
+        row_upper=np.concatenate([supply, np.full(len(demand), np.inf)]).astype(np.float64),
+        col_lower=np.zeros(num_routes),
+        col_upper=np.full(num_routes, np.inf),
+        integrality=np.full(num_routes, integer),
+    )
+
+    return TransportationModel(matrix, warehouses, stores, warehouse_index, store_index)
+
+
+def _lines(template: str, *columns: ndarray) -> str:
+    if not len(columns[0]):
+        return ''
+
+    values = np.empty((len(columns[0]), len(columns)), dtype=object)
+    for i, column in enumerate(columns):
+        values[:, i] = column
+
+    return (template * len(values)) % tuple(values.ravel().tolist())
+
+
+def _numbers(values: ndarray) -> ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    # Integral coefficients are by far the most common and format much faster as integers
+    if np.all(np.mod(values, 1) == 0) and np.all(np.abs(values) < 2 ** 53):
+        return values.astype(np.int64)
+
+    return values
+
+
+def column_lines(model: MatrixModel, csc: tuple[ndarray, ndarray, ndarray], start: int, stop: int) -> str:
+    indptr, rows, data = csc
+    columns = np.arange(start, stop)
+
+    # Each column starts with its objective entry, followed by its constraint coefficients
+    counts = np.diff(indptr[start:stop + 1]) + 1
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    is_objective = np.zeros(counts.sum(), dtype=bool)
+    is_objective[starts] = True
+    entry_rows = np.zeros(counts.sum(), dtype=np.int64)
+    entry_rows[~is_objective] = rows[indptr[start]:indptr[stop]] + 1
+    entry_values = np.empty(counts.sum(), dtype=np.float64)
+    entry_values[is_objective] = model.objective[start:stop]
+    entry_values[~is_objective] = data[indptr[start]:indptr[stop]]
+    entry_columns = np.repeat(columns, counts)
+    row_names = np.array(['obj'] + [f'r{i}' for i in range(model.num_rows)], dtype=object)
+
+    lines = []
+    # Integer columns are wrapped in markers, one pair per contiguous block
+    integrality = model.integrality[start:stop]
+    boundaries = np.flatnonzero(np.diff(integrality.astype(np.int8))) + 1
+    for block in np.split(np.arange(len(columns)), boundaries):
+        if not len(block):
+            continue
+        entries = slice(starts[block[0]], starts[block[-1]] + counts[block[-1]])
+        body = _lines(' x%s %s %s\n', entry_columns[entries], row_names[entry_rows[entries]],
+                      _numbers(entry_values[entries]))
+        if integrality[block[0]]:
+            body = f" MARKER 'MARKER' 'INTORG'\n{body} MARKER 'MARKER' 'INTEND'\n"
+        lines.append(body)
+
+    return ''.join(lines)
+
+
+def row_lines(model: MatrixModel) -> str:
+    lower, upper = model.row_lower, model.row_upper
+    if np.any(np.isneginf(lower) & np.isposinf(upper)):
+        raise ValueError('Every constraint needs at least one finite bound')
+
+    equal = lower == upper
+    less = np.isneginf(lower) & ~equal
+
+    return _lines(' %s r%s\n', np.select([equal, less], ['E', 'L'], 'G'), np.arange(model.num_rows))
+
+
+def rhs_lines(model: MatrixModel) -> str:
+    lower, upper = model.row_lower, model.row_upper
+    rows = np.arange(model.num_rows)
+    less = np.isneginf(lower)
+    ranged = ~less & np.isfinite(upper) & (lower != upper)
+
+    lines = _lines(' RHS r%s %s\n', rows, _numbers(np.where(less, upper, lower)))
+    if ranged.any():
+        lines += 'RANGES\n' + _lines(' RNG r%s %s\n', rows[ranged], _numbers(upper[ranged] - lower[ranged]))
+
+    return lines
+
+
+def bound_lines(model: MatrixModel) -> str:
+    columns = np.arange(model.num_columns)
+    lower, upper = model.col_lower, model.col_upper
+    free = np.isneginf(lower) & np.isposinf(upper)
+    minus_infinity = np.isneginf(lower) & ~np.isposinf(upper)
+    # COIN treats integer columns without bounds as binary, so their zero lower bound is written explicitly
+    explicit_lower = np.isfinite(lower) & ((lower != 0) | (model.integrality & np.isposinf(upper)))
+    explicit_upper = np.isfinite(upper)
+
+    return (
+        _lines(' FR BND x%s\n', columns[free]) +
+        _lines(' MI BND x%s\n', columns[minus_infinity]) +
+        _lines(' LO BND x%s %s\n', columns[explicit_lower], _numbers(lower[explicit_lower])) +
+        _lines(' UP BND x%s %s\n', columns[explicit_upper], _numbers(upper[explicit_upper]))
+    )
+
+
+def write_mps_sections(file_name: str, rows: str, columns: list[str], rhs: str, bounds: str) -> None:
+    with open(file_name, 'w') as f:
+        # The FREE keyword stops COIN guessing fixed-column layout from short lines
+        f.write('NAME matrix_model FREE\nROWS\n N obj\n')
+        f.write(rows)
+        f.write('COLUMNS\n')
+        f.writelines(columns)
+        f.write('RHS\n')
+        f.write(rhs)
+        f.write('BOUNDS\n')
+        f.write(bounds)
+        f.write('ENDATA\n')
+
+
+def write_mps(model: MatrixModel, file_name: str) -> None:
+    write_mps_sections(
+        file_name, row_lines(model), [column_lines(model, model.to_csc(), 0, model.num_columns)], rhs_lines(model),
+        bound_lines(model)
+    )
+
+
+def write_mip_start(file_name: str, values: ndarray) -> None:
+    # Same layout as a CBC solution file; columns that are left out start at zero
+    nonzero = np.flatnonzero(values)
+    with open(file_name, 'w') as f:
+        f.write('Stopped on time - objective value 0\n')
+        f.write(_lines('%s x%s %s 0\n', nonzero, nonzero, values[nonzero]))
+
+
+def read_solution(file_name: str, model: MatrixModel) -> MatrixSolution:
+    with open(file_name) as f:
+        status_line = f.readline().split()
+        # Rows are listed before columns as 'index name value dual', with infeasible entries flagged by '**'.
+        # Dropping the name prefixes and flags leaves plain numbers that NumPy can parse in one pass
+        entries = np.fromstring(f.read().translate(str.maketrans('', '', 'xr*')), sep=' ').reshape((-1, 4))
+
+    if status_line[0] == 'Optimal' or (status_line[0] == 'Stopped' and 'objective' in status_line):
+        status = 'Optimal'
+    else:
+        status = {'Infeasible': 'Infeasible', 'Integer': 'Infeasible', 'Unbounded': 'Unbounded'}.get(
+            status_line[0], 'Not Solved'
+        )
+
+    rows, columns = entries[:model.num_rows], entries[model.num_rows:]
+    values = np.zeros(model.num_columns)
+    reduced_costs = np.zeros(model.num_columns)
+    row_activity = np.zeros(model.num_rows)
+    duals = np.zeros(model.num_rows)
+    values[columns[:, 1].astype(np.int64)] = columns[:, 2]
+    reduced_costs[columns[:, 1].astype(np.int64)] = columns[:, 3]
+    row_activity[rows[:, 1].astype(np.int64)] = rows[:, 2]
+    duals[rows[:, 1].astype(np.int64)] = rows[:, 3]
+
+    return MatrixSolution(status, float(model.objective @ values), values, reduced_costs, row_activity, duals)
+
+
+def _solve_in_process(model: MatrixModel, solver: ScipySolver) -> MatrixSolution:
+    # The arrays go straight to HiGHS; there is no MPS file, warm start or basis file
+    solution = solve_arrays(
+        model.objective, (model.data, model.indices, model.indptr), model.row_lower, model.row_upper,
+        model.col_lower, model.col_upper, model.integrality, model.sense, solver.timeLimit,
+        solver.optionsDict.get('gapRel'), solver.msg
+    )
+
+    return MatrixSolution(
+        solution.status, float(model.objective @ solution.values), solution.values, solution.reduced_costs,
+        solution.row_activity, solution.duals
+    )
+
+
+def solve_matrix_model(model: MatrixModel, solver: COIN_CMD | ScipySolver | None = None,
+                       warm_start: ndarray | None = None, writer: Callable[[MatrixModel, str], None] = write_mps,
+                       basis_file: str | None = None) -> MatrixSolution:
+    solver = solver or coin_cmd_solver()
+    if isinstance(solver, ScipySolver):
+        with phase('solve'):
+            return _solve_in_process(model, solver)
+    if not isinstance(solver, COIN_CMD):
+        raise ValueError(f'Matrix models are solved with the cbc or scipy backends, not {solver.name}')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mps_file = os.path.join(tmp_dir, 'model.mps')
+        solution_file = os.path.join(tmp_dir, 'model.sol')
+        with phase('write_model'):
+            writer(model, mps_file)
+
+        args = [solver.path, mps_file]
+        if model.sense == MAXIMISE:
+            args.append('-max')
+        if warm_start is not None and model.integrality.any():
+            mip_start_file = os.path.join(tmp_dir, 'model.mst')
+            write_mip_start(mip_start_file, warm_start)
+            args.extend(['-mips', mip_start_file])
+        if basis_file is not None and not model.integrality.any():
+            # Continuous models restart from the previous optimal basis and save the new one for next time
+            if os.path.exists(basis_file):
+                args.extend(['-basisI', basis_file])
+        if solver.timeLimit is not None:
+            args.extend(['-sec', str(solver.timeLimit)])
+        for option in solver.options + solver.getOptions():
+            args.extend(f'-{option}'.split())
+        args.append('-branch' if model.integrality.any() else '-initialSolve')
+        if basis_file is not None and not model.integrality.any():
+            # CBC runs its arguments in order, so the basis is only saved after the solve
+            args.extend(['-basisO', basis_file])
+        args.extend(['-printingOptions', 'all', '-solution', solution_file])
+
+        # As with PuLP's own COIN_CMD, a log path takes the solver output instead of the console
+        log_path = solver.optionsDict.get('logPath')
+        with open(log_path, 'w') if log_path else open(os.devnull, 'w') as log:
+            output = log if log_path or not solver.msg else None
+            with phase('solve'):
+                subprocess.run(args, stdout=output, stderr=output, stdin=subprocess.DEVNULL, check=True)
+
+        with phase('read_solution'):
+            return read_solution(solution_file, model)
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+import numpy as np
+from numpy import ndarray
 from pulp import LpVariable
 
 RouteVariables = dict[str, dict[str, LpVariable]]
@@ -18,3 +20,21 @@ class Inputs:
     @property
     def stores(self):
         return list(self.demand.keys())
+
+    def supply_array(self) -> ndarray:
+        return np.fromiter(self.supply.values(), dtype=np.int64, count=len(self.supply))
+
+    def demand_array(self) -> ndarray:
+        return np.fromiter(self.demand.values(), dtype=np.int64, count=len(self.demand))
+
+    def routes(self) -> tuple[ndarray, ndarray, ndarray]:
+        """Warehouse index, store index and cost of every route present in `costs`."""
+        store_positions = {store: i for i, store in enumerate(self.demand)}
+        warehouse_index, store_index, route_costs = [], [], []
+        for w, warehouse in enumerate(self.warehouses):
+            for store, cost in self.costs.get(warehouse, {}).items():
+                warehouse_index.append(w)
+                store_index.append(store_positions[store])
+                route_costs.append(cost)
+
+        return np.array(warehouse_index, dtype=np.int64), np.array(store_index, dtype=np.int64), np.array(route_costs)
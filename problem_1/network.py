@@ -0,0 +1,234 @@
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+import numpy as np
+from numpy import ndarray
+
+from problem_1.models import Inputs
+
+CHUNK_SIZE = 1 << 20
+ARRAYS = ('warehouses', 'stores', 'supply', 'demand')
+
+
+@dataclass
+class Network:
+    """Supply chain inputs held as contiguous arrays; routes missing from the costs are NaN."""
+    warehouses: list[str]
+    stores: list[str]
+    supply: ndarray
+    demand: ndarray
+    costs: ndarray
+
+    @property
+    def complete(self) -> bool:
+        # A NaN anywhere makes the sum NaN, without a mask the size of the matrix
+        return self.costs.dtype.kind != 'f' or not np.isnan(np.sum(self.costs))
+
+    def supply_array(self) -> ndarray:
+        return self.supply
+
+    def demand_array(self) -> ndarray:
+        return self.demand
+
+    def routes(self) -> tuple[ndarray, ndarray, ndarray]:
+        num_warehouses, num_stores = self.costs.shape
+        if self.complete:
+            # Every route exists, so the costs are used as a flat view rather than copied through a mask
+            return (np.repeat(np.arange(num_warehouses), num_stores), np.tile(np.arange(num_stores), num_warehouses),
+                    self.costs.reshape(-1))
+
+        warehouse_index, store_index = np.nonzero(~np.isnan(self.costs))
+
+        return warehouse_index, store_index, self.costs[warehouse_index, store_index]
+
+    def to_inputs(self) -> Inputs:
+        costs = {
+            warehouse: {store: cost.item() for store, cost in zip(self.stores, row) if not np.isnan(cost)}
+            for warehouse, row in zip(self.warehouses, self.costs)
+        }
+
+        return Inputs(dict(zip(self.warehouses, self.supply.tolist())),
+                      dict(zip(self.stores, self.demand.tolist())), costs)
+
+
+class _JsonStream:
+    """Reads one JSON document a value at a time, so only the value being decoded is held in memory."""
+
+    def __init__(self, f: IO[str], chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        chunk = self.f.read(size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill(self.chunk_size):
+                raise ValueError('Unexpected end of JSON input')
+
+    def expect(self, token: str) -> None:
+        if self.peek() != token:
+            raise ValueError(f'Expected {token!r} in JSON input, found {self.buffer[self.position]!r}')
+        self.position += 1
+
+    def value(self) -> Any:
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or not self._fill(size):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+                # Large values are read in growing chunks so decoding them is not retried too often
+                size *= 2
+
+    def members(self):
+        """Yields the keys of the object at the current position, leaving each value to be read by the caller."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.position += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == '}':
+                self.position += 1
+                return
+            self.expect(',')
+
+
+def _fill_costs(costs: ndarray, filled: ndarray, rows: Any, warehouse_positions: dict[str, int],
+                store_positions: dict[str, int], stores: list[str]) -> ndarray:
+    for warehouse, row in rows:
+        if warehouse not in warehouse_positions:
+            raise ValueError(f'Costs given for unknown warehouse {warehouse}')
+        w = warehouse_positions[warehouse]
+        values = list(row.values())
+        if costs.dtype.kind != 'f' and (len(row) != len(stores) or any(isinstance(v, float) for v in values)):
+            costs = _as_float(costs, filled)
+        if list(row) == stores:
+            costs[w] = values
+        else:
+            unknown = row.keys() - store_positions.keys()
+            if unknown:
+                raise ValueError(f'Costs from {warehouse} given for unknown stores {sorted(unknown)}')
+            costs[w, [store_positions[store] for store in row]] = values
+        filled[w] = True
+
+    return costs
+
+
+def _as_float(costs: ndarray, filled: ndarray) -> ndarray:
+    """Widens integer costs so that missing routes can be held as NaN."""
+    if isinstance(costs, np.memmap):
+        file_name = costs.filename
+        widened = np.lib.format.open_memmap(f'{file_name}.tmp', 'w+', np.float64, costs.shape)
+        for start in range(0, len(costs), 1024):
+            widened[start:start + 1024] = costs[start:start + 1024]
+        widened.flush()
+        os.replace(f'{file_name}.tmp', file_name)
+        widened = np.load(file_name, mmap_mode='r+')
+    else:
+        widened = costs.astype(np.float64)
+    widened[~filled] = np.nan
+
+    return widened
+
+
+def _empty_costs(shape: tuple[int, int], output_dir: str | None) -> ndarray:
+    if output_dir is None:
+        return np.empty(shape, dtype=np.int64)
+
+    return np.lib.format.open_memmap(os.path.join(output_dir, 'costs.npy'), 'w+', np.int64, shape)
+
+
+def read_json_network(file_name: str, output_dir: str | None = None) -> Network:
+    """Streams a supply chain JSON file into arrays, writing the costs straight to `output_dir` if given."""
+    fields: dict[str, Any] = {}
+    with open(file_name) as f:
+        stream = _JsonStream(f)
+        for key in stream.members():
+            if key == 'costs' and {'supply', 'demand'} <= fields.keys():
+                # Each warehouse's costs are decoded and placed in the matrix before the next is read
+                fields[key] = ((warehouse, stream.value()) for warehouse in stream.members())
+                costs, filled = _read_costs(fields, output_dir)
+            else:
+                # Costs written before supply and demand cannot be placed as they arrive, so they are held whole
+                fields[key] = stream.value()
+
+    missing = {'supply', 'demand', 'costs'} - fields.keys()
+    if missing:
+        raise ValueError(f'{file_name} has no {", ".join(sorted(missing))}')
+    if isinstance(fields['costs'], dict):
+        fields['costs'] = fields['costs'].items()
+        costs, filled = _read_costs(fields, output_dir)
+
+    if not filled.all():
+        if costs.dtype.kind == 'f':
+            costs[~filled] = np.nan
+        else:
+            costs = _as_float(costs, filled)
+
+    warehouses, stores = list(fields['supply']), list(fields['demand'])
+
+    return Network(
+        warehouses, stores, np.fromiter(fields['supply'].values(), dtype=np.int64, count=len(warehouses)),
+        np.fromiter(fields['demand'].values(), dtype=np.int64, count=len(stores)), costs
+    )
+
+
+def _read_costs(fields: dict[str, Any], output_dir: str | None) -> tuple[ndarray, ndarray]:
+    warehouses, stores = list(fields['supply']), list(fields['demand'])
+    filled = np.zeros(len(warehouses), dtype=bool)
+    costs = _fill_costs(
+        _empty_costs((len(warehouses), len(stores)), output_dir), filled, fields['costs'],
+        {w: i for i, w in enumerate(warehouses)}, {s: i for i, s in enumerate(stores)}, stores
+    )
+
+    return costs, filled
+
+
+def convert_network(file_name: str, output_dir: str) -> Network:
+    """Converts a supply chain JSON file into a directory of .npy arrays that `load_network` memory-maps."""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    network = read_json_network(file_name, output_dir)
+    network.costs.flush()
+    for name in ARRAYS:
+        np.save(os.path.join(output_dir, f'{name}.npy'), np.asarray(getattr(network, name)))
+
+    return network
+
+
+def load_network(path: str, mmap: bool = True) -> Network:
+    """Loads a network from JSON or from a directory written by `convert_network`."""
+    if not os.path.isdir(path):
+        return read_json_network(path)
+
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy')) for name in ARRAYS}
+
+    return Network(
+        arrays['warehouses'].tolist(), arrays['stores'].tolist(), arrays['supply'], arrays['demand'],
+        np.load(os.path.join(path, 'costs.npy'), mmap_mode='r' if mmap else None)
+    )
@@ -0,0 +1,355 @@
+import os
+import tempfile
+from dataclasses import dataclass, replace
+
+import numpy as np
+from numpy import ndarray
+from pulp import COIN_CMD
+
+from problem_1.cbc import coin_cmd_solver
+from problem_1.matrix import MatrixModel, solve_matrix_model
+from solvers.scipy_solver import ScipySolver
+
+# Ratio tests ignore tableau entries this close to zero
+TOLERANCE = 1e-9
+# Columns of the basis inverse solved for at once when ranging the right-hand sides
+RANGE_BLOCK = 256
+# Arrays saved with an index so loading it needs no factorisation
+STORED = ['duals', 'reduced_costs', 'rhs_lower', 'rhs_upper', 'rhs_moves_basis']
+
+
+@dataclass
+class WhatIf:
+    status: str
+    objective: float
+    values: ndarray
+    # False when the change fell outside the stored ranges and the model had to be solved again
+    from_index: bool
+
+
+def read_basis(file_name: str, model: MatrixModel) -> ndarray:
+    """Basic variables in a CBC basis file, as a mask over the columns followed by the row activities."""
+    basic = np.concatenate([np.zeros(model.num_columns, dtype=bool), np.ones(model.num_rows, dtype=bool)])
+    with open(file_name) as f:
+        for line in f:
+            # Columns are nonbasic and rows basic unless listed; XU and XL swap a column into the basis for a row
+            fields = line.split()
+            if fields[0] in ('XU', 'XL'):
+                basic[int(fields[1][1:])] = True
+                basic[model.num_columns + int(fields[2][1:])] = False
+
+    return basic
+
+
+def _step_limits(values: ndarray, steps: ndarray, lower: ndarray, upper: ndarray) -> tuple[ndarray, ndarray]:
+    """How far each column of `steps` can be taken, down and up, before one of `values` leaves its bounds."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        to_upper = (upper - values)[:, np.newaxis] / steps
+        to_lower = (lower - values)[:, np.newaxis] / steps
+    rising, falling = steps > TOLERANCE, steps < -TOLERANCE
+    decrease = np.where(rising, to_lower, np.where(falling, to_upper, -np.inf)).max(axis=0, initial=-np.inf)
+    increase = np.where(rising, to_upper, np.where(falling, to_lower, np.inf)).min(axis=0, initial=np.inf)
+
+    # Values already sitting on a bound give an empty range on that side rather than a slightly wrong one
+    return np.minimum(decrease, 0), np.maximum(increase, 0)
+
+
+class SensitivityIndex:
+    """Duals, reduced costs and RHS and cost ranges of an optimal basis, so that the objective after a change to
+    one right-hand side or cost is known without a solver while the change stays inside its range.
+
+    The model is read as min c.x subject to A.x - s = 0, with bounds on the columns x and row activities s. Columns
+    in `held` are integer columns fixed at their optimal values: changing their costs is never answered here, and
+    every other answer keeps those integer decisions as they are. Such answers have the status 'Fixed-MIP', as the
+    MILP re-solved from scratch may make other integer decisions and reach a better objective.
+
+    The basis is kept as a sparse LU factorisation, factored when first needed, and each answer solves with it for
+    the one row or column of the inverse it uses. `stored` takes the duals, reduced costs and right-hand side ranges
+    of a saved index, so loading one factors nothing.
+    """
+
+    def __init__(self, model: MatrixModel, values: ndarray, row_activity: ndarray, basic: ndarray,
+                 held: ndarray | None = None, row_names: list[str] | None = None,
+                 column_names: list[str] | None = None, stored: dict[str, ndarray] | None = None):
+        num_columns, num_rows = model.num_columns, model.num_rows
+        self.model = model
+        self.held = np.zeros(num_columns, dtype=bool) if held is None else held
+        self.answer_status = 'Fixed-MIP' if self.held.any() else 'Optimal'
+        self.basic = basic
+        self.row_names = row_names or [f'r{i}' for i in range(num_rows)]
+        self.column_names = column_names or [f'x{j}' for j in range(num_columns)]
+        self._rows = {name: i for i, name in enumerate(self.row_names)}
+        self._columns = {name: j for j, name in enumerate(self.column_names)}
+        self._cost_ranges: dict[int, tuple[float, float]] = {}
+
+        self._row_index = model.row_index()
+        self._lower = np.concatenate([np.where(self.held, values, model.col_lower), model.row_lower])
+        self._upper = np.concatenate([np.where(self.held, values, model.col_upper), model.row_upper])
+        self._costs = model.sense * np.concatenate([model.objective, np.zeros(num_rows)])
+
+        # Position of each basic variable among the columns of the basis matrix of [A -I]
+        self._basic_variables = np.flatnonzero(basic)
+        self._position = np.full(num_columns + num_rows, -1)
+        self._position[self._basic_variables] = np.arange(num_rows)
+        self._factor = None
+
+        # Nonbasic variables sit on the bound nearest their value
+        variables = np.concatenate([values, row_activity])
+        self._at_upper = ~basic & np.isfinite(self._upper) & (
+            np.isneginf(self._lower) | (np.abs(variables - self._upper) < np.abs(variables - self._lower))
+        )
+        if stored is None:
+            # Basic values are recomputed from the nonbasic ones
+            nonbasic = np.where(self._at_upper, self._upper, np.where(np.isfinite(self._lower), self._lower, 0))
+            nonbasic[basic] = 0
+            residual = np.bincount(self._row_index, weights=model.data * nonbasic[model.indices], minlength=num_rows)
+            residual -= nonbasic[num_columns:]
+            self._variables = nonbasic
+            self._variables[self._basic_variables] = -self._basis_solve(residual)
+
+            # Minimisation duals of the row activities and reduced costs; reported in the model's own sense
+            self._duals = self._basis_solve(self._costs[self._basic_variables], transpose=True)
+            self._reduced_costs = self._costs[:num_columns] - np.bincount(
+                model.indices, weights=model.data * self._duals[self._row_index], minlength=num_columns
+            )
+        else:
+            self._variables = variables
+            self._duals = model.sense * stored['duals']
+            self._reduced_costs = model.sense * stored['reduced_costs']
+        self.duals = model.sense * self._duals
+        self.reduced_costs = model.sense * self._reduced_costs
+        self.values = self._variables[:num_columns]
+        self.objective = float(model.objective @ self.values)
+
+        if stored is None:
+            self.rhs_lower, self.rhs_upper, self._rhs_moves_basis = self._rhs_ranges()
+        else:
+            self.rhs_lower, self.rhs_upper = stored['rhs_lower'], stored['rhs_upper']
+            self._rhs_moves_basis = stored['rhs_moves_basis']
+
+    def factor(self) -> None:
+        """Factors the basis now rather than on the first answer that needs it."""
+        if self._factor is not None:
+            return
+
+        # scipy comes with leap_ec, and is only imported once an answer needs the basis
+        from scipy.sparse import csc_array
+        from scipy.sparse.linalg import splu
+
+        model, num_columns, num_rows = self.model, self.model.num_columns, self.model.num_rows
+        in_basis = self._position[model.indices] >= 0
+        basic_rows = np.flatnonzero(self.basic[num_columns:])
+        basis = csc_array((
+            np.concatenate([model.data[in_basis], np.full(len(basic_rows), -1.0)]),
+            (np.concatenate([self._row_index[in_basis], basic_rows]),
+             np.concatenate([self._position[model.indices[in_basis]], self._position[num_columns + basic_rows]]))
+        ), shape=(num_rows, num_rows))
+        self._factor = splu(basis)
+
+    def _basis_solve(self, rhs: ndarray, transpose: bool = False) -> ndarray:
+        """B^-1 rhs, or B^-T rhs when transposed, for the basis matrix B."""
+        self.factor()
+
+        return self._factor.solve(np.asarray(rhs, dtype=np.float64), trans='T' if transpose else 'N')
+
+    def _inverse_column(self, row: int) -> ndarray:
+        unit = np.zeros(self.model.num_rows)
+        unit[row] = 1
+
+        return self._basis_solve(unit)
+
+    def _inverse_row(self, position: int) -> ndarray:
+        unit = np.zeros(self.model.num_rows)
+        unit[position] = 1
+
+        return self._basis_solve(unit, transpose=True)
+
+    def row(self, name: str) -> int:
+        return self._rows[name]
+
+    def column(self, name: str) -> int:
+        return self._columns[name]
+
+    def _rhs_ranges(self) -> tuple[ndarray, ndarray, ndarray]:
+        model, num_columns = self.model, self.model.num_columns
+        lower, upper = model.row_lower, model.row_upper
+        activity = self._variables[num_columns:]
+        # The right-hand side is the lower bound of >= and ranged rows, the upper bound of <= rows and both of =
+        moves_lower = np.isfinite(lower)
+        moves_upper = np.isneginf(lower) | (lower == upper)
+        at_upper = self._at_upper[num_columns:]
+        moves_basis = ~self.basic[num_columns:] & np.where(at_upper, moves_upper, moves_lower)
+
+        # A row whose activity is nonbasic on the moving bound drags the basic variables along column i of the
+        # inverse, solved for a block of rows at a time so the dense inverse is never held whole
+        decrease, increase = np.full(model.num_rows, -np.inf), np.full(model.num_rows, np.inf)
+        basic_values = self._variables[self._basic_variables]
+        basic_lower, basic_upper = self._lower[self._basic_variables], self._upper[self._basic_variables]
+        rows = np.flatnonzero(moves_basis)
+        for start in range(0, len(rows), RANGE_BLOCK):
+            block = rows[start:start + RANGE_BLOCK]
+            units = np.zeros((model.num_rows, len(block)))
+            units[block, np.arange(len(block))] = 1
+            steps = self._basis_solve(units)
+            decrease[block], increase[block] = _step_limits(basic_values, steps, basic_lower, basic_upper)
+        # A moving lower bound may not pass a fixed upper one, and the other way round
+        one_sided = lower != upper
+        increase = np.where(moves_lower & one_sided, np.minimum(increase, upper - lower), increase)
+        decrease = np.where(moves_upper & one_sided, np.maximum(decrease, lower - upper), decrease)
+
+        # Otherwise the solution stays put until the moving bound reaches the activity
+        slack_decrease = np.where(moves_upper & np.isfinite(upper), np.minimum(activity - upper, 0), -np.inf)
+        slack_increase = np.where(moves_lower, np.maximum(activity - lower, 0), np.inf)
+
+        return (np.where(moves_basis, decrease, slack_decrease), np.where(moves_basis, increase, slack_increase),
+                moves_basis)
+
+    def rhs_range(self, row: int) -> tuple[float, float]:
+        """Smallest and largest change to the row's right-hand side for which the basis stays optimal."""
+        return float(self.rhs_lower[row]), float(self.rhs_upper[row])
+
+    def cost_range(self, column: int) -> tuple[float, float]:
+        """Smallest and largest change to the column's cost for which the solution stays optimal."""
+        if self.held[column]:
+            return 0.0, 0.0
+        if column not in self._cost_ranges:
+            self._cost_ranges[column] = self._minimisation_cost_range(column)
+            if self.model.sense < 0:
+                low, high = self._cost_ranges[column]
+                self._cost_ranges[column] = -high, -low
+
+        return self._cost_ranges[column]
+
+    def _minimisation_cost_range(self, column: int) -> tuple[float, float]:
+        if self._lower[column] == self._upper[column]:
+            return -np.inf, np.inf
+        if not self.basic[column]:
+            reduced_cost = self._reduced_costs[column]
+            # A nonbasic column stays out until its reduced cost changes sign
+            return (-max(reduced_cost, 0), np.inf) if not self._at_upper[column] else (-np.inf, -min(reduced_cost, 0))
+
+        # A basic column's cost shifts every nonbasic reduced cost by its tableau row
+        inverse_row = self._inverse_row(self._position[column])
+        num_columns = self.model.num_columns
+        tableau = np.concatenate([
+            np.bincount(self.model.indices, weights=self.model.data * inverse_row[self._row_index],
+                        minlength=num_columns),
+            -inverse_row
+        ])
+        reduced_costs = np.concatenate([self._reduced_costs, self._duals])
+        movable = ~self.basic & (self._lower < self._upper)
+        at_lower = movable & ~self._at_upper
+        at_upper = movable & self._at_upper
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = reduced_costs / tableau
+        # Reduced costs at lower bounds must stay >= 0 and those at upper bounds <= 0
+        limits_above = (at_lower & (tableau > TOLERANCE)) | (at_upper & (tableau < -TOLERANCE))
+        limits_below = (at_lower & (tableau < -TOLERANCE)) | (at_upper & (tableau > TOLERANCE))
+
+        return (min(float(ratios[limits_below].max(initial=-np.inf)), 0.0),
+                max(float(ratios[limits_above].min(initial=np.inf)), 0.0))
+
+    def rhs_change(self, row: int, delta: float) -> WhatIf | None:
+        """The optimum after changing the row's right-hand side by `delta`, or None out of range or off integers."""
+        if not self.rhs_lower[row] <= delta <= self.rhs_upper[row]:
+            return None
+
+        values = self.values.copy()
+        if self._rhs_moves_basis[row]:
+            basic_columns = self._basic_variables[self._basic_variables < self.model.num_columns]
+            values[basic_columns] += delta * self._inverse_column(row)[self._position[basic_columns]]
+            # Relaxed integer columns, as in the transportation LP, are only exact while the vertex stays integral
+            relaxed = self.model.integrality.astype(bool) & ~self.held
+            if not np.allclose(values[relaxed], np.rint(values[relaxed]), rtol=0, atol=TOLERANCE):
+                return None
+
+        return WhatIf(self.answer_status, float(self.model.objective @ values), values, from_index=True)
+
+    def cost_change(self, column: int, delta: float) -> WhatIf | None:
+        """The optimum after changing the column's cost by `delta`, or None outside its range."""
+        low, high = self.cost_range(column)
+        if not low <= delta <= high:
+            return None
+
+        return WhatIf(
+            self.answer_status, self.objective + delta * float(self.values[column]), self.values, from_index=True
+        )
+
+    def what_if_rhs(self, row: int, delta: float, solver: COIN_CMD | ScipySolver | None = None,
+                    resolve: bool = False) -> WhatIf:
+        answer = None if resolve else self.rhs_change(row, delta)
+        if answer is None:
+            model = self.model
+            row_lower, row_upper = model.row_lower.copy(), model.row_upper.copy()
+            if np.isfinite(row_lower[row]):
+                row_lower[row] += delta
+            if np.isneginf(model.row_lower[row]) or model.row_lower[row] == model.row_upper[row]:
+                row_upper[row] += delta
+            answer = self._solve(replace(model, row_lower=row_lower, row_upper=row_upper), solver)
+
+        return answer
+
+    def what_if_cost(self, column: int, delta: float, solver: COIN_CMD | ScipySolver | None = None,
+                     resolve: bool = False) -> WhatIf:
+        answer = None if resolve else self.cost_change(column, delta)
+        if answer is None:
+            objective = self.model.objective.copy()
+            objective[column] += delta
+            answer = self._solve(replace(self.model, objective=objective), solver)
+
+        return answer
+
+    def _solve(self, model: MatrixModel, solver: COIN_CMD | ScipySolver | None) -> WhatIf:
+        solution = solve_matrix_model(model, solver or coin_cmd_solver(msg=False))
+
+        return WhatIf(solution.status, solution.objective, solution.values, from_index=False)
+
+    def save(self, file_name: str) -> None:
+        model = self.model
+        np.savez(
+            file_name, objective=model.objective, indptr=model.indptr, indices=model.indices, data=model.data,
+            row_lower=model.row_lower, row_upper=model.row_upper, col_lower=model.col_lower,
+            col_upper=model.col_upper, integrality=model.integrality, sense=model.sense, values=self.values,
+            row_activity=self._variables[model.num_columns:], basic=self.basic, held=self.held,
+            row_names=np.array(self.row_names), column_names=np.array(self.column_names), duals=self.duals,
+            reduced_costs=self.reduced_costs, rhs_lower=self.rhs_lower, rhs_upper=self.rhs_upper,
+            rhs_moves_basis=self._rhs_moves_basis
+        )
+
+
+def load_sensitivity_index(file_name: str) -> SensitivityIndex:
+    with np.load(file_name, allow_pickle=False) as arrays:
+        model = MatrixModel(
+            arrays['objective'], arrays['indptr'], arrays['indices'], arrays['data'], arrays['row_lower'],
+            arrays['row_upper'], arrays['col_lower'], arrays['col_upper'], arrays['integrality'], int(arrays['sense'])
+        )
+        # Indexes saved before the ranges were stored are ranged again
+        stored = {name: arrays[name] for name in STORED if name in arrays.files}
+        return SensitivityIndex(
+            model, arrays['values'], arrays['row_activity'], arrays['basic'], arrays['held'],
+            arrays['row_names'].tolist(), arrays['column_names'].tolist(),
+            stored if len(stored) == len(STORED) else None
+        )
+
+
+def sensitivity_index(model: MatrixModel, values: ndarray | None = None, row_names: list[str] | None = None,
+                      column_names: list[str] | None = None, solver: COIN_CMD | None = None) -> SensitivityIndex:
+    """Solves the LP of `model` once more for its optimal basis and indexes it.
+
+    Integer columns are held at `values` when they are given, as for MILPs, and relaxed otherwise, which is exact
+    for models with integral vertices such as the transportation LP.
+    """
+    held = model.integrality.astype(bool) if values is not None else np.zeros(model.num_columns, dtype=bool)
+    fixed = np.rint(values) if values is not None else model.col_lower
+    lp = replace(
+        model, col_lower=np.where(held, fixed, model.col_lower), col_upper=np.where(held, fixed, model.col_upper),
+        integrality=np.zeros(model.num_columns, dtype=bool)
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        basis_file = os.path.join(tmp_dir, 'model.bas')
+        solution = solve_matrix_model(lp, solver or coin_cmd_solver(msg=False), basis_file=basis_file)
+        if solution.status != 'Optimal':
+            raise ValueError(f'Only optimal solutions have a sensitivity index, not {solution.status} ones')
+        basic = read_basis(basis_file, lp)
+
+    return SensitivityIndex(model, solution.values, solution.row_activity, basic, held, row_names, column_names)
@@ -0,0 +1,52 @@
+from pulp import LpInteger, LpMinimize, LpProblem, LpSolver, LpVariable, lpSum
+
+from instrumentation.phases import phase
+from problem_1.matrix import MatrixSolution, TransportationModel, build_transportation_model, solve_matrix_model
+from problem_1.models import Inputs, RouteVariables
+from problem_1.network import Network
+from problem_1.outputs import print_box
+from solvers.backends import solver_backend
+
+
+def build_supply_chain(inputs: Inputs) -> tuple[LpProblem, RouteVariables]:
+    problem = LpProblem('supply_chain_problem', LpMinimize)
+    routes = [(w, s) for w in inputs.warehouses for s in inputs.stores]
+    variables = LpVariable.dicts('route', (inputs.warehouses, inputs.stores), 0, None, LpInteger)
+
+    transportation_cost = lpSum([variables[w][s] * inputs.costs[w][s] for (w, s) in routes])
+    problem += (transportation_cost, 'total_cost')
+
+    for w in inputs.warehouses:
+        problem += (lpSum([variables[w][s] for s in inputs.stores]) <= inputs.supply[w], f'products_from_warehouse_{w}')
+
+    for s in inputs.stores:
+        problem += (lpSum([variables[w][s] for w in inputs.warehouses]) >= inputs.demand[s], f'products_to_store_{s}')
+
+    return problem, variables
+
+
+def solve_supply_chain(inputs: Inputs, solver: LpSolver | None = None,
+                       verbose: bool = False) -> tuple[LpProblem, RouteVariables]:
+    with phase('build', builder='pulp'):
+        problem, variables = build_supply_chain(inputs)
+    # Printing the whole model costs more than solving it once the model is large, so it is opt-in
+    if verbose:
+        print_box('Problem')
+        print(problem)
+    print_box('Run solver')
+    # PuLP writes the model, runs the solver and reads the solution back in one call
+    with phase('solve', builder='pulp'):
+        problem.solve(solver or solver_backend())
+
+    return problem, variables
+
+
+def solve_supply_chain_matrix(inputs: Inputs | Network,
+                              solver: LpSolver | None = None) -> tuple[TransportationModel, MatrixSolution]:
+    with phase('build', builder='matrix'):
+        model = build_transportation_model(
+            inputs.supply_array(), inputs.demand_array(), *inputs.routes(), inputs.warehouses, inputs.stores
+        )
+    print_box('Run solver')
+
+    return model, solve_matrix_model(model.matrix, solver or solver_backend())
@@ -0,0 +1,302 @@
+from dataclasses import dataclass
+
+import numpy as np
+from numpy import ndarray
+
+from instrumentation.phases import record
+from problem_1.cbc import coin_cmd_solver
+from problem_1.heuristics import balance, vogel_approximation
+from problem_1.matrix import MatrixSolution, TransportationModel, build_transportation_model, solve_matrix_model
+from problem_1.models import Inputs
+
+ENGINES = ['milp', 'modi', 'networkx']
+
+
+@dataclass
+class TransportationResult:
+    status: str
+    plan: ndarray
+    objective: float
+    # Potentials of the warehouse and store constraints, i.e. their duals
+    u: ndarray
+    v: ndarray
+    iterations: int = 0
+
+
+def _initial_basis(plan: ndarray) -> list[tuple[int, int]]:
+    """Vogel's allocations plus enough zero cells to make a spanning tree when the start is degenerate."""
+    num_rows, num_cols = plan.shape
+    parent = list(range(num_rows + num_cols))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    basis = []
+    for i, j in zip(*np.nonzero(plan)):
+        parent[find(int(i))] = find(num_rows + int(j))
+        basis.append((int(i), int(j)))
+
+    components: dict[int, list[int]] = {}
+    for node in range(num_rows + num_cols):
+        components.setdefault(find(node), []).append(node)
+    # Components holding a store are joined first, so a store is always available to join lone warehouses to
+    main, *others = sorted(components.values(), key=lambda nodes: max(nodes) < num_rows)
+    for nodes in others:
+        main_row = next((n for n in main if n < num_rows), None)
+        main_col = next((n for n in main if n >= num_rows), None)
+        row = next((n for n in nodes if n < num_rows), None)
+        if row is not None and main_col is not None:
+            basis.append((row, main_col - num_rows))
+        else:
+            basis.append((main_row, next(n for n in nodes if n >= num_rows) - num_rows))
+        main = main + nodes
+
+    return basis
+
+
+class _SpanningTree:
+    """The basis as a spanning tree over warehouse nodes 0..m-1 and store nodes m..m+n-1, rooted at warehouse 0.
+
+    Each node keeps its parent, depth and potential (u for warehouses, v for stores), so a pivot only revisits
+    the subtree that is re-hung from the entering cell rather than the whole tree.
+    """
+
+    def __init__(self, costs: ndarray, basis: list[tuple[int, int]]):
+        self.costs = costs
+        self.num_rows = costs.shape[0]
+        size = costs.shape[0] + costs.shape[1]
+        self.neighbours: list[set[int]] = [set() for _ in range(size)]
+        for i, j in basis:
+            self._link(i, self.num_rows + j)
+        self.parent = [-1] * size
+        self.depth = [0] * size
+        self.potential = np.zeros(size)
+        self._hang(0, -1)
+
+    def _link(self, a: int, b: int) -> None:
+        self.neighbours[a].add(b)
+        self.neighbours[b].add(a)
+
+    def _cost(self, a: int, b: int) -> float:
+        return self.costs[min(a, b), max(a, b) - self.num_rows]
+
+    def _hang(self, node: int, parent: int) -> None:
+        """Hangs the subtree at `node` from `parent`, recomputing its parents, depths and potentials."""
+        self.parent[node] = parent
+        self.depth[node] = 0 if parent < 0 else self.depth[parent] + 1
+        self.potential[node] = 0 if parent < 0 else self._cost(node, parent) - self.potential[parent]
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for child in self.neighbours[current]:
+                if child != self.parent[current]:
+                    self.parent[child] = current
+                    self.depth[child] = self.depth[current] + 1
+                    self.potential[child] = self._cost(child, current) - self.potential[current]
+                    stack.append(child)
+
+    def cell(self, a: int, b: int) -> tuple[int, int]:
+        return min(a, b), max(a, b) - self.num_rows
+
+    def cycle_path(self, row: int, col: int) -> tuple[list[tuple[int, int]], int]:
+        """Basic cells on the tree path from warehouse `row` to store `col`, in order from `row`, and the position
+        in it of the first cell below the apex on the store's side."""
+        a, b = row, self.num_rows + col
+        from_row, from_col = [], []
+        while a != b:
+            if self.depth[a] >= self.depth[b]:
+                from_row.append(self.cell(a, self.parent[a]))
+                a = self.parent[a]
+            else:
+                from_col.append(self.cell(b, self.parent[b]))
+                b = self.parent[b]
+
+        return from_row + from_col[::-1], len(from_row)
+
+    def pivot(self, entering: tuple[int, int], leaving: tuple[int, int]) -> None:
+        a, b = leaving[0], self.num_rows + leaving[1]
+        child = a if self.parent[a] == b else b
+        self.neighbours[a].discard(b)
+        self.neighbours[b].discard(a)
+
+        # The subtree below the leaving cell holds exactly one end of the entering cell, from which it is re-hung
+        subtree, stack = {child}, [child]
+        while stack:
+            for neighbour in self.neighbours[stack.pop()]:
+                if neighbour not in subtree:
+                    subtree.add(neighbour)
+                    stack.append(neighbour)
+        row, col = entering[0], self.num_rows + entering[1]
+        inside, outside = (row, col) if row in subtree else (col, row)
+        self._link(row, col)
+        self._hang(inside, outside)
+
+
+def _leaving_cell(plan: ndarray, path: list[tuple[int, int]], apex: int) -> tuple[int, int]:
+    """The last cell to block the entering flow, going round the cycle from its apex in the direction of that flow.
+
+    The flow goes down from the apex to the warehouse, across the entering cell and back up from the store, so the
+    last blocking cell is the store side one nearest the apex, or failing that the warehouse side one nearest the
+    entering cell. From a strongly feasible tree, one whose zero flow cells all point away from the root, this keeps
+    the tree strongly feasible and so stops degenerate pivots cycling; the iteration cap covers the starts that are
+    not.
+    """
+    losing = range(0, len(path), 2)
+    theta = min(plan[path[position]] for position in losing)
+    blocking = [position for position in losing if plan[path[position]] == theta]
+    store_side = [position for position in blocking if position >= apex]
+
+    return path[store_side[0] if store_side else blocking[0]]
+
+
+def transportation_simplex(supply: ndarray, demand: ndarray, costs: ndarray, max_iterations: int | None = None,
+                           pricing_blocks: int = 16) -> TransportationResult:
+    """Solves min c.x subject to row sums <= supply and column sums >= demand with the transportation simplex:
+    a Vogel starting basis improved by MODI pivots. Missing routes are given as inf or NaN costs.
+
+    Runs stop as 'Not Solved' after `max_iterations` pivots, by default one per cell of the balanced problem.
+    """
+    num_warehouses, num_stores = costs.shape
+    if supply.sum() < demand.sum():
+        return TransportationResult('Infeasible', np.zeros(costs.shape), np.nan, np.zeros(num_warehouses),
+                                    np.zeros(num_stores))
+
+    costs = np.asarray(costs, dtype=np.float64)
+    missing = ~np.isfinite(costs)
+    finite = costs[~missing]
+    # Missing routes cost more than any cycle of real routes can save, so they only carry flow if they must
+    big_m = 1 + 2 * (num_warehouses + num_stores) * (np.abs(finite).max() if len(finite) else 1)
+    balanced_supply, balanced_demand, balanced_costs = balance(supply, demand, np.where(missing, big_m, costs))
+
+    integral = np.all(np.mod(supply, 1) == 0) and np.all(np.mod(demand, 1) == 0)
+    plan = vogel_approximation(balanced_supply, balanced_demand, balanced_costs).astype(
+        np.int64 if integral else np.float64
+    )
+    num_rows = plan.shape[0]
+    tree = _SpanningTree(balanced_costs, _initial_basis(plan))
+    if max_iterations is None:
+        # Runs take a few pivots per warehouse and store, so this many only happen if degenerate pivots cycle
+        max_iterations = plan.size + sum(plan.shape)
+
+    tolerance = 1e-9 * max(1.0, np.abs(balanced_costs).max())
+    # Partial pricing: each pivot prices one block of warehouses, moving on to the next block only when this one
+    # has no improving cell, so a full pass over the costs is only needed to prove optimality
+    block_size = max(1, -(-num_rows // pricing_blocks))
+    num_blocks = -(-num_rows // block_size)
+    block, blocks_checked = 0, 0
+    iterations = 0
+    optimal = False
+    while iterations < max_iterations:
+        start, stop = block * block_size, min((block + 1) * block_size, num_rows)
+        reduced_costs = (balanced_costs[start:stop] - tree.potential[start:stop, np.newaxis]
+                         - tree.potential[num_rows:])
+        entering = np.unravel_index(np.argmin(reduced_costs), reduced_costs.shape)
+        if reduced_costs[entering] >= -tolerance:
+            blocks_checked += 1
+            if blocks_checked >= num_blocks:
+                optimal = True
+                break
+            block = (block + 1) % num_blocks
+            continue
+        blocks_checked = 0
+
+        i, j = start + int(entering[0]), int(entering[1])
+        path, apex = tree.cycle_path(i, j)
+        # Around the cycle the entering cell gains flow, then the path cells alternately lose and gain it
+        leaving = _leaving_cell(plan, path, apex)
+        theta = plan[leaving]
+        for cell in path[0::2]:
+            plan[cell] -= theta
+        for cell in path[1::2]:
+            plan[cell] += theta
+        plan[i, j] += theta
+        tree.pivot((i, j), leaving)
+        iterations += 1
+
+    u, v = tree.potential[:num_rows], tree.potential[num_rows:]
+    if (plan[:num_warehouses, :num_stores][missing] > 0).any():
+        status = 'Infeasible'
+    elif not optimal:
+        status = 'Not Solved'
+    else:
+        status = 'Optimal'
+
+    # Potentials are only fixed up to a constant; anchoring them on the zero cost surplus store (or the largest
+    # warehouse potential) gives the signs of the duals of <= supply and >= demand constraints
+    offset = -v[num_stores] if len(v) > num_stores else u.max()
+    u, v = u - offset, v + offset
+    plan = plan[:num_warehouses, :num_stores]
+
+    return TransportationResult(
+        status, plan, float((plan * np.where(missing, 0, costs)).sum()), u[:num_warehouses], v[:num_stores],
+        iterations
+    )
+
+
+def network_simplex(supply: ndarray, demand: ndarray, costs: ndarray) -> TransportationResult:
+    """The same problem as a min cost flow solved with networkx, with unused supply sent to a surplus node."""
+    import networkx as nx
+
+    num_warehouses, num_stores = costs.shape
+    if supply.sum() < demand.sum():
+        return TransportationResult('Infeasible', np.zeros(costs.shape), np.nan, np.zeros(num_warehouses),
+                                    np.zeros(num_stores))
+
+    graph = nx.DiGraph()
+    for i, amount in enumerate(supply.tolist()):
+        graph.add_node(('warehouse', i), demand=-amount)
+        graph.add_edge(('warehouse', i), 'surplus', weight=0)
+    for j, amount in enumerate(demand.tolist()):
+        graph.add_node(('store', j), demand=amount)
+    graph.add_node('surplus', demand=int(supply.sum() - demand.sum()))
+    for i, j in zip(*np.nonzero(np.isfinite(costs))):
+        graph.add_edge(('warehouse', int(i)), ('store', int(j)), weight=costs[i, j].item())
+
+    try:
+        _, flows = nx.network_simplex(graph)
+    except nx.NetworkXUnfeasible:
+        return TransportationResult('Infeasible', np.zeros(costs.shape), np.nan, np.zeros(num_warehouses),
+                                    np.zeros(num_stores))
+
+    integral = np.all(np.mod(supply, 1) == 0) and np.all(np.mod(demand, 1) == 0)
+    plan = np.zeros(costs.shape, dtype=np.int64 if integral else np.float64)
+    for i in range(num_warehouses):
+        for node, flow in flows[('warehouse', i)].items():
+            if node != 'surplus':
+                plan[i, node[1]] = flow
+
+    # networkx does not expose the potentials, so the duals are left unset
+    return TransportationResult(
+        'Optimal', plan, float((plan * np.where(np.isfinite(costs), costs, 0)).sum()),
+        np.full(num_warehouses, np.nan), np.full(num_stores, np.nan)
+    )
+
+
+def solve_transportation(inputs: Inputs, engine: str = 'modi') -> tuple[TransportationModel, MatrixSolution]:
+    """Solves the supply chain with a network engine, returning the same model and solution as the matrix builder."""
+    warehouse_index, store_index, route_costs = inputs.routes()
+    model = build_transportation_model(
+        inputs.supply_array(), inputs.demand_array(), warehouse_index, store_index, route_costs, inputs.warehouses,
+        inputs.stores
+    )
+    costs = np.full((len(inputs.warehouses), len(inputs.stores)), np.inf)
+    costs[warehouse_index, store_index] = route_costs
+
+    solve = transportation_simplex if engine == 'modi' else network_simplex
+    result = solve(inputs.supply_array(), inputs.demand_array(), costs)
+    if result.status == 'Not Solved':
+        # The MILP always finishes, so a run that ran out of pivots is solved again with CBC
+        record('transportation_fallback', engine=engine, iterations=result.iterations)
+        return model, solve_matrix_model(model.matrix, coin_cmd_solver(msg=False))
+
+    values = result.plan[warehouse_index, store_index].astype(np.float64)
+
+    return model, MatrixSolution(
+        result.status, result.objective, values,
+        costs[warehouse_index, store_index] - result.u[warehouse_index] - result.v[store_index],
+        np.concatenate([result.plan.sum(axis=1), result.plan.sum(axis=0)]).astype(np.float64),
+        np.concatenate([result.u, result.v])
+    )
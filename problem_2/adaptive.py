@@ -0,0 +1,161 @@
+from collections import deque
+from typing import Callable
+
+import numpy as np
+from leap_ec import context, Individual
+from leap_ec.real_rep.ops import mutate_gaussian
+
+from problem_2.evaluation import evaluate_population
+from problem_2.probes import find_best_solution
+
+
+class AdaptiveController:
+    """Adapts the mutation step size and rate with the 1/5th success rule, stops once improvements are overdue
+    for the measured improvement rate, and restarts from the elites when the population loses its diversity."""
+
+    def __init__(self, upper_bound: int, genome_size: int, max_stall: int, std: float = 50,
+                 mutation_rate: float = 0.5, elite_count: int = 2, adapt_every: int = 10, step: float = 0.85,
+                 stall_factor: float = 4, min_stall: int = 100, tolerance: float = 1e-4,
+                 diversity_threshold: float = 0.005, restart_cooldown: int = 200,
+                 evaluate: Callable[[list[Individual]], list[Individual]] = evaluate_population):
+        self.upper_bound = upper_bound
+        self.genome_size = genome_size
+        self.initial_std = self.std = std
+        self.initial_mutation_rate = self.mutation_rate = mutation_rate
+        self.elite_count = elite_count
+        self.adapt_every = adapt_every
+        self.step = step
+        self.max_stall = max_stall
+        self.stall_factor = stall_factor
+        self.min_stall = min_stall
+        self.tolerance = tolerance
+        self.diversity_threshold = diversity_threshold
+        self.restart_cooldown = restart_cooldown
+        self.evaluate = evaluate
+
+        self.restarts = 0
+        self.success_rate = 0.0
+        self.diversity = 1.0
+        self._parent_fitness: dict = {}
+        self._successes = self._trials = 0
+        self._best = np.inf
+        self._last_improvement = 0
+        self._last_restart = 0
+        self._intervals: deque[int] = deque(maxlen=5)
+
+    @property
+    def expected_num_mutations(self) -> float:
+        return max(1.0, self.mutation_rate * self.genome_size)
+
+    @property
+    def stall_threshold(self) -> int:
+        # Waiting a few times longer than improvements have recently taken to arrive, within the fixed limit
+        if not self._intervals:
+            return self.max_stall
+
+        return int(np.clip(self.stall_factor * np.mean(self._intervals), self.min_stall, self.max_stall))
+
+    def mutate(self, population: list[Individual]) -> list[Individual]:
+        return mutate_gaussian(
+            population, std=self.std, expected_num_mutations=self.expected_num_mutations, bounds=(0, self.upper_bound)
+        )
+
+    def record_parents(self, population: list[Individual]) -> list[Individual]:
+        self._parent_fitness = {individual.uuid: individual.fitness for individual in population}
+
+        return population
+
+    def __call__(self, population: list[Individual]) -> list[Individual]:
+        generation = context['leap']['generation']
+        self._count_successes(population)
+        self._track_improvement(generation)
+
+        if generation > 0 and generation % self.adapt_every == 0:
+            self.success_rate = self._successes / max(self._trials, 1)
+            # Too many successes means the search is too cautious, too few that it overshoots
+            factor = 1 / self.step if self.success_rate > 0.2 else self.step
+            self.std = float(np.clip(self.std * factor, 1, self.upper_bound))
+            self.mutation_rate = float(np.clip(self.mutation_rate * factor, 1 / self.genome_size, 1))
+            self._successes = self._trials = 0
+
+        genomes = np.stack([individual.genome for individual in population])
+        self.diversity = float(genomes.std(axis=0).mean() / self.upper_bound)
+        if self.diversity < self.diversity_threshold and generation - self._last_restart >= self.restart_cooldown:
+            population = self._restart(population, generation)
+
+        context['track']['adaptive'] = self.diagnostics()
+
+        return population
+
+    def stop(self, _population: list[Individual], target_fitness: float | None = None) -> bool:
+        current_generation = context['leap']['generation']
+        if target_fitness is not None and self._best <= target_fitness:
+            print("Stopping at generation", current_generation, "because the target fitness was reached.")
+            return True
+
+        threshold = self.stall_threshold
+        should_stop = current_generation - self._last_improvement >= threshold
+        if should_stop:
+            print("Stopping at generation", current_generation, "because the solution has not improved in",
+                  threshold, "generations, given the recent rate of improvement.")
+
+        return should_stop
+
+    def diagnostics(self) -> dict:
+        return {
+            'std': self.std, 'mutation_rate': self.mutation_rate, 'success_rate': self.success_rate,
+            'diversity': self.diversity, 'stall_threshold': self.stall_threshold, 'restarts': self.restarts,
+        }
+
+    def state(self) -> dict:
+        # The parents' fitness is recorded afresh at the start of every generation, so it is not part of the state
+        return {
+            'std': self.std, 'mutation_rate': self.mutation_rate, 'success_rate': self.success_rate,
+            'diversity': self.diversity, 'restarts': self.restarts, 'successes': self._successes,
+            'trials': self._trials, 'best': self._best, 'last_improvement': self._last_improvement,
+            'last_restart': self._last_restart, 'intervals': list(self._intervals),
+        }
+
+    def restore(self, state: dict) -> None:
+        self.std, self.mutation_rate = float(state['std']), float(state['mutation_rate'])
+        self.success_rate, self.diversity = float(state['success_rate']), float(state['diversity'])
+        self.restarts = int(state['restarts'])
+        self._successes, self._trials = int(state['successes']), int(state['trials'])
+        self._best = float(state['best'])
+        self._last_improvement, self._last_restart = int(state['last_improvement']), int(state['last_restart'])
+        self._intervals.clear()
+        self._intervals.extend(int(interval) for interval in state['intervals'])
+
+    def _count_successes(self, population: list[Individual]) -> None:
+        for individual in population:
+            parent_fitness = [
+                self._parent_fitness[uuid] for uuid in individual.parents if uuid in self._parent_fitness
+            ]
+            if parent_fitness:
+                self._trials += 1
+                self._successes += individual.fitness < min(parent_fitness)
+
+    def _track_improvement(self, generation: int) -> None:
+        best = context['track']['best_entry']['fitness']
+        # Improvements too small to matter do not hold off the stall check
+        if best < self._best - self.tolerance * abs(self._best) or not np.isfinite(self._best):
+            if np.isfinite(self._best):
+                self._intervals.append(generation - self._last_improvement)
+            self._last_improvement = generation
+        self._best = min(best, self._best)
+
+    def _restart(self, population: list[Individual], generation: int) -> list[Individual]:
+        elites = find_best_solution(population, self.elite_count)
+        self.std = self.initial_std
+        self.mutation_rate = self.initial_mutation_rate
+        offspring = self.evaluate([
+            next(self.mutate(iter([elites[i % len(elites)].clone()]))) for i in range(len(population) - len(elites))
+        ])
+
+        # The restarted population gets a full stall window of its own
+        self.restarts += 1
+        self._last_restart = self._last_improvement = generation
+        print(f'Restarting from {len(elites)} elites at generation {generation}: '
+              f'diversity fell to {self.diversity:.4f}')
+
+        return elites + offspring
@@ -0,0 +1,150 @@
+import os
+import random
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from leap_ec import context, Individual
+from numpy import ndarray
+
+from instrumentation.phases import record
+from problem_2.adaptive import AdaptiveController
+from problem_2.history import FitnessHistory
+from problem_2.probes import ThroughputProbe
+
+
+def narrow(values: ndarray) -> ndarray:
+    """`values` in the smallest of int32, float32 and their own dtype that holds every value exactly."""
+    values = np.asarray(values)
+    with np.errstate(invalid='ignore', over='ignore'):
+        for dtype in (np.int32, np.float32):
+            if np.dtype(dtype).itemsize < values.dtype.itemsize:
+                narrowed = values.astype(dtype)
+                if np.array_equal(narrowed, values):
+                    return narrowed
+
+    return values
+
+
+@dataclass
+class GACheckpoint:
+    generation: int
+    genomes: list[ndarray]
+    fitness: ndarray
+    python_random: tuple
+    numpy_random: tuple
+    best_entry: dict
+    history: dict[str, ndarray]
+    adaptive: dict | None
+    evaluations: int
+
+    def initialize(self):
+        """Initializer handing out the saved genomes in their saved order, in place of a random population."""
+        genomes = iter(self.genomes)
+
+        return lambda: next(genomes)
+
+    def restore_fitness(self, population: list[Individual]) -> list[Individual]:
+        # Used as the initial evaluation, so the saved population is not evaluated again
+        for individual, fitness in zip(population, self.fitness):
+            individual.fitness = fitness
+
+        return population
+
+    def restore_context(self) -> None:
+        context['track'] = {'history': FitnessHistory.from_state(self.history), 'best_entry': dict(self.best_entry)}
+
+    def restore_random(self) -> None:
+        random.setstate(self.python_random)
+        np.random.set_state(self.numpy_random)
+
+
+class Checkpointer:
+    """Pipeline operator saving the population, random number generators and run metrics every `every`
+    generations, at the start of a generation so a resumed run repeats it exactly."""
+
+    def __init__(self, file_name: str, every: int, throughput: ThroughputProbe,
+                 controller: AdaptiveController | None = None, start_generation: int = 0):
+        self.file_name = file_name
+        self.every = every
+        self.throughput = throughput
+        self.controller = controller
+        self._last = start_generation
+
+    def __call__(self, population: list[Individual]) -> list[Individual]:
+        generation = context['leap']['generation']
+        if generation > self._last and generation % self.every == 0:
+            self.save(population)
+
+        return population
+
+    def save(self, population: list[Individual]) -> None:
+        track = context.get('track')
+        if track is None:
+            return
+
+        start = time.perf_counter()
+        generation = context['leap']['generation']
+        genomes = [individual.genome for individual in population]
+        best_entry = track['best_entry']
+        best_genome = best_entry['genome'] if best_entry['genome'] is not None else np.zeros(0)
+        python_random = random.getstate()
+        numpy_random = np.random.get_state()
+        arrays = {
+            'generation': np.array(generation),
+            # Genomes of one population can be both integer and float, and crossover keeps each genome's dtype
+            'genomes': narrow(np.stack(genomes)),
+            'genome_dtypes': np.array([genome.dtype.str for genome in genomes]),
+            'fitness': narrow(np.array([individual.fitness for individual in population], dtype=np.float64)),
+            'python_random': np.array(python_random[1], dtype=np.uint32),
+            'python_gauss': np.array(np.nan if python_random[2] is None else python_random[2]),
+            'numpy_keys': numpy_random[1],
+            'numpy_position': np.array(numpy_random[2:4]),
+            'numpy_gauss': np.array(numpy_random[4]),
+            'best_generation': np.array(best_entry['generation']),
+            'best_fitness': np.array(best_entry['fitness'], dtype=np.float64),
+            'best_genome': narrow(best_genome),
+            'best_genome_dtype': np.array(best_genome.dtype.str if best_entry['genome'] is not None else ''),
+            'evaluations': np.array(self.throughput.evaluations),
+            **{f'history_{name}': narrow(values) for name, values in track['history'].state().items()},
+        }
+        if self.controller is not None:
+            arrays.update({f'adaptive_{name}': np.array(value) for name, value in self.controller.state().items()})
+
+        # Written beside the previous checkpoint and swapped in, so a run stopped mid-write still has one to resume
+        temporary = f'{self.file_name}.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, self.file_name)
+        self._last = generation
+        record(
+            'ga_checkpoint', generation=generation, bytes=os.path.getsize(self.file_name),
+            seconds=time.perf_counter() - start
+        )
+
+
+def load_checkpoint(file_name: str) -> GACheckpoint:
+    with np.load(file_name) as data:
+        genomes = [genome.astype(dtype) for genome, dtype in zip(data['genomes'], data['genome_dtypes'])]
+        python_gauss = data['python_gauss'].item()
+        position, has_gauss = data['numpy_position'].tolist()
+        best_dtype = data['best_genome_dtype'].item()
+        adaptive = {
+            name.removeprefix('adaptive_'): data[name] for name in data.files if name.startswith('adaptive_')
+        }
+
+        return GACheckpoint(
+            generation=int(data['generation']),
+            genomes=genomes,
+            fitness=data['fitness'].astype(np.float64),
+            python_random=(3, tuple(data['python_random'].tolist()), None if np.isnan(python_gauss) else python_gauss),
+            numpy_random=('MT19937', data['numpy_keys'], position, has_gauss, data['numpy_gauss'].item()),
+            best_entry={
+                'generation': int(data['best_generation']),
+                'fitness': data['best_fitness'][()],
+                'genome': data['best_genome'].astype(best_dtype) if best_dtype else None,
+            },
+            history={name.removeprefix('history_'): data[name] for name in data.files if name.startswith('history_')},
+            adaptive=adaptive or None,
+            evaluations=int(data['evaluations']),
+        )
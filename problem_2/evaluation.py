@@ -0,0 +1,14 @@
+import numpy as np
+from leap_ec import Individual
+
+
+def evaluate_population(population: list[Individual]) -> list[Individual]:
+    if not population:
+        return population
+
+    problem = population[0].problem
+    solutions = np.stack([individual.decode() for individual in population])
+    for individual, fitness in zip(population, problem.evaluate_population(solutions)):
+        individual.fitness = fitness
+
+    return population
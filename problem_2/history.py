@@ -0,0 +1,53 @@
+import numpy as np
+from numpy import ndarray
+
+
+class FitnessHistory:
+    def __init__(self, capacity: int, every: int = 1):
+        if capacity < 1 or every < 1:
+            raise ValueError(f'Fitness history needs a positive capacity and interval, not {capacity} and {every}')
+        self.capacity = capacity
+        self.every = every
+        self.count = 0
+        self._data = {
+            'generation': np.zeros(capacity, dtype=np.int64),
+            'best_fitness_in_gen': np.zeros(capacity, dtype=np.float64),
+            'avg_top_n_fitness': np.zeros(capacity, dtype=np.float64),
+            'best_fitness_so_far': np.zeros(capacity, dtype=np.float64),
+        }
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, generation: int, best_fitness_in_gen: float, avg_top_n_fitness: float,
+               best_fitness_so_far: float) -> None:
+        if generation % self.every != 0:
+            return
+
+        # Once full, the oldest retained entry is overwritten
+        index = self.count % self.capacity
+        self._data['generation'][index] = generation
+        self._data['best_fitness_in_gen'][index] = best_fitness_in_gen
+        self._data['avg_top_n_fitness'][index] = avg_top_n_fitness
+        self._data['best_fitness_so_far'][index] = best_fitness_so_far
+        self.count += 1
+
+    def snapshot(self) -> dict[str, ndarray]:
+        if self.count <= self.capacity:
+            return {name: values[:self.count].copy() for name, values in self._data.items()}
+
+        start = self.count % self.capacity
+        return {name: np.roll(values, -start) for name, values in self._data.items()}
+
+    def state(self) -> dict[str, ndarray]:
+        """The raw ring buffer, so a resumed run keeps appending where this one left off."""
+        return {'every': np.array(self.every), 'count': np.array(self.count), **self._data}
+
+    @classmethod
+    def from_state(cls, state: dict[str, ndarray]) -> 'FitnessHistory':
+        history = cls(len(state['generation']), int(state['every']))
+        history.count = int(state['count'])
+        for name, values in history._data.items():
+            values[:] = state[name]
+
+        return history
@@ -0,0 +1,69 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from queue import Empty, Queue
+from typing import Callable
+
+import numpy as np
+from leap_ec import context, Individual
+
+from problem_2.probes import find_best_solution
+
+
+class Migration:
+    def __init__(self, inbox: Queue, outbox: Queue, interval: int, count: int):
+        self.inbox = inbox
+        self.outbox = outbox
+        self.interval = interval
+        self.count = count
+
+    def __call__(self, population: list[Individual]) -> list[Individual]:
+        current_gen_num = context['leap']['generation']
+        if current_gen_num > 0 and current_gen_num % self.interval == 0:
+            self.outbox.put([(x.genome, x.fitness) for x in find_best_solution(population, self.count)])
+
+        immigrants = self._receive()[-len(population):]
+        if immigrants:
+            # Immigrants replace the least fit individuals of this island
+            population.sort(key=lambda x: x.fitness)
+            for i, (genome, fitness) in enumerate(immigrants, start=1):
+                immigrant = population[-i].clone()
+                immigrant.genome = genome
+                immigrant.fitness = fitness
+                population[-i] = immigrant
+
+        return population
+
+    def _receive(self) -> list[tuple[np.ndarray, float]]:
+        immigrants = []
+        while True:
+            try:
+                immigrants.extend(self.inbox.get_nowait())
+            except Empty:
+                return immigrants
+
+
+def _run_island(run: Callable[..., dict], seed: int, inbox: Queue, outbox: Queue, migration_interval: int,
+                migration_count: int, kwargs: dict) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    context.pop('track', None)
+
+    return run(extra_operators=[Migration(inbox, outbox, migration_interval, migration_count)], **kwargs)
+
+
+def run_islands(run: Callable[..., dict], num_islands: int, migration_interval: int, migration_count: int,
+                **kwargs) -> dict:
+    with Manager() as manager, ProcessPoolExecutor(max_workers=num_islands) as executor:
+        # Ring topology: each island sends its elites to the next one
+        queues = [manager.Queue() for _ in range(num_islands)]
+        futures = [
+            executor.submit(
+                _run_island, run, random.randrange(2 ** 32), queues[i], queues[(i + 1) % num_islands],
+                migration_interval, migration_count, kwargs
+            )
+            for i in range(num_islands)
+        ]
+        best_entries = [future.result() for future in futures]
+
+    return min(best_entries, key=lambda entry: entry['fitness'])
@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from numpy import ndarray
+
+PLOT_FORMATS = ('png', 'svg')
+METRIC_FORMATS = ('csv', 'parquet')
+
+
+def write_plot(history: dict[str, ndarray], file_name: str, min_fitness_plot_percentage: float,
+               max_fitness_plot_percentile: float) -> None:
+    # Only the rendering process needs matplotlib
+    from matplotlib.figure import Figure
+
+    all_generations = history['generation']
+    all_fittest_of_gen = history['best_fitness_in_gen']
+    y_min = np.min(all_fittest_of_gen) * min_fitness_plot_percentage
+    y_max = np.percentile(all_fittest_of_gen, max_fitness_plot_percentile)
+
+    # A standalone Figure avoids pyplot's global state, so it is safe to render away from the GA loop
+    figure = Figure(figsize=(19.20, 10.80))
+    ax = figure.add_subplot()
+    ax.plot(all_generations, history['avg_top_n_fitness'], label='Average Top N Fitness')
+    ax.plot(all_generations, all_fittest_of_gen, label='Best Fitness in Gen', alpha=0.8)
+    ax.plot(all_generations, history['best_fitness_so_far'], label='Fittest of all time', color='black', alpha=0.5)
+
+    ax.set_xlabel('Generation')
+    ax.set_ylabel('Fitness')
+    ax.set_title('Fitness over generations')
+    ax.set_ylim(y_min, y_max)
+    ax.legend()
+    figure.savefig(file_name)
+
+
+def write_metrics(history: dict[str, ndarray], file_name: str, file_format: str) -> None:
+    if file_format == 'csv':
+        np.savetxt(file_name, np.column_stack(list(history.values())), fmt='%.17g', delimiter=',',
+                   header=','.join(history), comments='')
+    else:
+        import pandas as pd
+
+        pd.DataFrame(history).to_parquet(file_name)
+
+
+def _write(history: dict[str, ndarray], output_dir: str, file_prefix: str, formats: Sequence[str],
+           min_fitness_plot_percentage: float, max_fitness_plot_percentile: float) -> list[str]:
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    written = []
+    for file_format in formats:
+        file_name = os.path.join(output_dir, f'{file_prefix}.{file_format}')
+        if file_format in PLOT_FORMATS:
+            write_plot(history, file_name, min_fitness_plot_percentage, max_fitness_plot_percentile)
+        else:
+            write_metrics(history, file_name, file_format)
+        written.append(file_name)
+
+    return written
+
+
+class ConvergencePlotWriter:
+    def __init__(self, formats: Sequence[str] = ('png',), output_dir: str = 'problem_2/outputs',
+                 file_prefix: str = 'convergence'):
+        unknown = set(formats) - set(PLOT_FORMATS + METRIC_FORMATS)
+        if unknown:
+            raise ValueError(f'Unsupported plot formats: {sorted(unknown)}')
+        if 'parquet' in formats:
+            # Fail before the run starts rather than when the first file is written
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    'Parquet convergence metrics need pyarrow installed (uv sync --extra parquet)'
+                ) from None
+
+        self.formats = formats
+        self.output_dir = output_dir
+        self.file_prefix = file_prefix
+        self.min_fitness_plot_percentage = 0.95
+        self.max_fitness_plot_percentile = 98
+        self._executor = ProcessPoolExecutor(max_workers=1)
+        self._pending: Future | None = None
+
+    def submit(self, history: dict[str, ndarray]) -> None:
+        # Only the latest state is worth drawing, so snapshots arriving mid-render are dropped
+        if self._pending is not None and not self._pending.done():
+            return
+        self._report_pending()
+        self._pending = self._executor.submit(
+            _write, history, self.output_dir, self.file_prefix, self.formats,
+            self.min_fitness_plot_percentage, self.max_fitness_plot_percentile
+        )
+
+    def close(self, history: dict[str, ndarray]) -> None:
+        self._report_pending()
+        self._pending = None
+        self.submit(history)
+        self._report_pending()
+        self._executor.shutdown()
+
+    def _report_pending(self) -> None:
+        if self._pending is not None:
+            for file_name in self._pending.result():
+                print(f"Convergence output written: {file_name}")
@@ -1,18 +1,42 @@
-import matplotlib.pyplot as plt
+import time
+from typing import Callable
+
 import numpy as np
 from leap_ec import context, Individual
+from numpy import ndarray
+
+from instrumentation.phases import record
+
+from problem_2.history import FitnessHistory
+from problem_2.plots import ConvergencePlotWriter
+
+
+def population_fitness(population: list[Individual]) -> ndarray:
+    return np.fromiter((x.fitness for x in population), dtype=np.float64, count=len(population))
+
 
+def find_best_indices(fitness: ndarray, n: int) -> ndarray:
+    n = min(n, len(fitness))
+    best = np.argpartition(fitness, n - 1)[:n]
 
-def find_best_solution(population: list[Individual], n) -> list[Individual]:
-    return sorted(population, key=lambda x: x.fitness)[:n]
+    return best[np.argsort(fitness[best])]
+
+
+def find_best_solution(population: list[Individual], n, fitness: ndarray | None = None) -> list[Individual]:
+    fitness = population_fitness(population) if fitness is None else fitness
+
+    return [population[i] for i in find_best_indices(fitness, n)]
 
 
 class BestFitnessLoggerProbe:
-    def __init__(self, total_generations: int, elite_retention_count: int):
+    def __init__(self, total_generations: int, elite_retention_count: int,
+                 plot_writer: ConvergencePlotWriter | None = None, history_size: int | None = None,
+                 history_every: int = 1):
         self.total_generations = total_generations
-        self.min_fitness_plot_percentage = 0.95
-        self.max_fitness_plot_percentile = 98
+        self.plot_writer = plot_writer
         self.elite_retention_count = elite_retention_count
+        self.history_size = history_size or -(-total_generations // history_every)
+        self.history_every = history_every
 
     def _is_last_gen(self, current_gen: int):
         return current_gen == self.total_generations - 1
@@ -32,51 +56,74 @@ class BestFitnessLoggerProbe:
     def __call__(self, population: list[Individual]) -> list[Individual]:
         current_gen_num = context['leap']['generation']
         if context.get('track') is None:
-            default = Individual(None)
-            default.fitness = float('inf')
-            context['track'] = {'solutions': [], 'best_entry': {'best_individual_in_gen': default, 'generation': -1}}
-
-        fittest_n = find_best_solution(population, self.elite_retention_count)
-        fittest_in_gen = fittest_n[0]
-        current_entry = {
-            'generation': current_gen_num,
-            'best_individual_in_gen': fittest_in_gen,
-            'best_individual': context['track']['best_entry']['best_individual_in_gen'],
-            'avg_top_n_fitness': sum([x.fitness for x in fittest_n]) / len(fittest_n)
-        }
-        if fittest_in_gen.fitness < context['track']['best_entry']['best_individual_in_gen'].fitness:
-            current_entry['best_individual_in_gen'] = fittest_in_gen
-            context['track']['best_entry'] = current_entry
-        context['track']['solutions'] = context['track']['solutions'] + [current_entry]
+            context['track'] = {
+                'history': FitnessHistory(self.history_size, self.history_every),
+                'best_entry': {'generation': -1, 'fitness': float('inf'), 'genome': None}
+            }
+        track = context['track']
+        fitness = population_fitness(population)
+        track['population_fitness'] = fitness
+
+        fittest_n = find_best_indices(fitness, self.elite_retention_count)
+        fittest_in_gen = population[fittest_n[0]]
+        avg_top_n_fitness = fitness[fittest_n].mean()
+        if fittest_in_gen.fitness < track['best_entry']['fitness']:
+            track['best_entry'] = {
+                'generation': current_gen_num,
+                'fitness': fittest_in_gen.fitness,
+                'genome': np.copy(fittest_in_gen.decode())
+            }
+        track['history'].append(
+            current_gen_num, fittest_in_gen.fitness, avg_top_n_fitness, track['best_entry']['fitness']
+        )
 
         if self._should_print_best_fitness(current_gen_num):
             print(f'Best fitness from [{current_gen_num}]: {fittest_in_gen.fitness} '
-                  f'(avg top n fitness: {current_entry["avg_top_n_fitness"]}) | '
-                  f'Best fitness so far[{context["track"]["best_entry"]["generation"]}]: '
-                  f'{context["track"]["best_entry"]["best_individual_in_gen"].fitness}')
+                  f'(avg top n fitness: {avg_top_n_fitness}) | '
+                  f'Best fitness so far[{track["best_entry"]["generation"]}]: '
+                  f'{track["best_entry"]["fitness"]}')
 
-        if self._should_plot_best_fitness(current_gen_num):
-            self.create_plot()
+        if self.plot_writer is not None and self._should_plot_best_fitness(current_gen_num):
+            self.plot_writer.submit(track['history'].snapshot())
 
         return population
 
-    def create_plot(self) -> None:
-        all_generations = [x['generation'] for x in context['track']['solutions']]
-        all_avg_top_n_fitness = [x['avg_top_n_fitness'] for x in context['track']['solutions']]
-        all_fittest_of_gen = [x['best_individual_in_gen'].fitness for x in context['track']['solutions']]
-        fittest_of_all_time = [x['best_individual'].fitness for x in context['track']['solutions']]
-        y_min = min(all_fittest_of_gen) * self.min_fitness_plot_percentage
-        y_max = np.percentile(all_fittest_of_gen, self.max_fitness_plot_percentile)
-
-        plt.plot(all_generations, all_avg_top_n_fitness, label='Average Top N Fitness')
-        plt.plot(all_generations, all_fittest_of_gen, label='Best Fitness in Gen', alpha=0.8)
-        plt.plot(all_generations, fittest_of_all_time, label='Fittest of all time', color='black', alpha=0.5)
-
-        plt.xlabel('Generation')
-        plt.ylabel('Fitness')
-        plt.title('Fitness over generations')
-        plt.gcf().set_size_inches(19.20, 10.80)
-        plt.ylim(y_min, y_max)
-        plt.legend()
-        plt.show()
-        # TODO: Write graph to file
+    def close(self) -> None:
+        if self.plot_writer is not None and context.get('track') is not None:
+            self.plot_writer.close(context['track']['history'].snapshot())
+
+
+class ThroughputProbe:
+    """Counts evaluations and reports evaluations per second every `every` generations and once the run ends."""
+
+    def __init__(self, evaluate: Callable[[list[Individual]], list[Individual]], every: int = 100,
+                 evaluations: int = 0):
+        self._evaluate = evaluate
+        self.every = every
+        # A resumed run carries on counting from the evaluations made before it was stopped
+        self.evaluations = self._window_evaluations = self._resumed_evaluations = evaluations
+        self._start = self._window_start = time.perf_counter()
+
+    def evaluate(self, population: list[Individual]) -> list[Individual]:
+        self.evaluations += len(population)
+
+        return self._evaluate(population)
+
+    def __call__(self, population: list[Individual]) -> list[Individual]:
+        generation = context['leap']['generation']
+        if generation > 0 and generation % self.every == 0:
+            now = time.perf_counter()
+            record(
+                'ga_throughput', generation=generation, evaluations=self.evaluations,
+                evaluations_per_second=(self.evaluations - self._window_evaluations) / (now - self._window_start)
+            )
+            self._window_start, self._window_evaluations = now, self.evaluations
+
+        return population
+
+    def close(self) -> None:
+        seconds = time.perf_counter() - self._start
+        record(
+            'ga_summary', generations=context['leap']['generation'], evaluations=self.evaluations, seconds=seconds,
+            evaluations_per_second=(self.evaluations - self._resumed_evaluations) / seconds
+        )
@@ -13,10 +13,15 @@ class TransportationProblem(ScalarProblem):
         self.cost_matrix = cost_matrix
 
     def evaluate(self, solution: ndarray, *args, **kwargs):
-        transport_matrix = solution.reshape((self.num_warehouses, self.num_stores))
+        return self.evaluate_population(solution[np.newaxis])[0]
 
-        supply_violation = np.maximum(0, np.sum(transport_matrix, axis=1) - self.supply).sum()
-        demand_violation = np.maximum(0, self.demand - np.sum(transport_matrix, axis=0)).sum()
+    def evaluate_population(self, solutions: ndarray) -> ndarray:
+        transport_matrices = solutions.reshape((-1, self.num_warehouses, self.num_stores))
+
+        supply_violation = np.maximum(0, np.sum(transport_matrices, axis=2) - self.supply).sum(axis=1)
+        demand_violation = np.maximum(0, self.demand - np.sum(transport_matrices, axis=1)).sum(axis=1)
         penalty = 1000 * (supply_violation + demand_violation)
 
-        return np.sum(transport_matrix * self.cost_matrix) + penalty
+        costs = transport_matrices.reshape((len(transport_matrices), -1)) @ self.cost_matrix.ravel()
+
+        return costs + penalty
@@ -0,0 +1,76 @@
+import numpy as np
+from leap_ec import Individual
+from numpy import ndarray
+
+
+def _scale_down(plans: ndarray, limits: ndarray, axis: int, integer: bool) -> ndarray:
+    totals = plans.sum(axis=axis, keepdims=True)
+    limits = limits.reshape(totals.shape[1:])
+    scaled = plans * np.minimum(1, limits / np.maximum(totals, 1e-12))
+
+    return np.floor(scaled) if integer else scaled
+
+
+def _allocation(amounts: ndarray, capacities: ndarray) -> ndarray:
+    """North-west corner allocation of `amounts` (n, S) against `capacities` (n, W), for every plan at once.
+
+    Both are laid end to end on a line and route (w, s) carries the overlap of capacity w with amount s, so every
+    amount is met exactly and no capacity is exceeded as long as the capacities cover the amounts.
+    """
+    capacity_end = np.cumsum(capacities, axis=1)[:, :, np.newaxis]
+    amount_end = np.cumsum(amounts, axis=1)[:, np.newaxis, :]
+    overlap = (np.minimum(capacity_end, amount_end) -
+               np.maximum(capacity_end - capacities[:, :, np.newaxis], amount_end - amounts[:, np.newaxis, :]))
+
+    return np.maximum(overlap, 0)
+
+
+def repair_plans(plans: ndarray, supply: ndarray, demand: ndarray, integer: bool = False) -> ndarray:
+    """Projects transport plans of shape (n, warehouses, stores) onto the feasible transportation polytope.
+
+    Stores receiving more than their demand are scaled down to it, warehouses sending more than their supply are
+    scaled down to it, and the demand still unmet is topped up from the supply left over. With `integer` every
+    step stays integral, matching the integer routes of the LP.
+    """
+    plans = np.maximum(plans, 0)
+    plans = _scale_down(plans, demand, axis=1, integer=integer)
+    plans = _scale_down(plans, supply, axis=2, integer=integer)
+
+    shortfall = np.maximum(demand - plans.sum(axis=1), 0)
+    spare = np.maximum(supply - plans.sum(axis=2), 0)
+
+    return plans + _allocation(shortfall, spare)
+
+
+class GenomeRepair:
+    """Pipeline operator repairing and, for the integer encoding, rounding genomes before they are evaluated."""
+
+    def __init__(self, supply: ndarray, demand: ndarray, repair: bool = True, integer: bool = False):
+        if repair and supply.sum() < demand.sum():
+            raise ValueError('Plans cannot be repaired when total demand exceeds total supply')
+
+        self.supply = supply
+        self.demand = demand
+        self.repair = repair
+        self.integer = integer
+
+    def __call__(self, population: list[Individual]) -> list[Individual]:
+        if not population:
+            return population
+
+        genomes = np.stack([individual.genome for individual in population])
+        if self.integer:
+            genomes = np.rint(genomes)
+        if self.repair:
+            plans = repair_plans(
+                genomes.reshape((len(population), len(self.supply), len(self.demand))), self.supply, self.demand,
+                self.integer
+            )
+            genomes = plans.reshape(genomes.shape)
+        if self.integer:
+            genomes = genomes.astype(np.int64)
+
+        for individual, genome in zip(population, genomes):
+            individual.genome = genome
+
+        return population
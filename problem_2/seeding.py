@@ -0,0 +1,54 @@
+import numpy as np
+from numpy import ndarray
+from pulp import LpMinimize, LpProblem, LpStatus, LpVariable, lpSum
+
+from problem_1.heuristics import vogel_approximation
+from solvers.backends import solver_backend
+
+
+def lp_relaxation_plan(supply: ndarray, demand: ndarray, costs: ndarray) -> ndarray:
+    num_warehouses, num_stores = costs.shape
+    problem = LpProblem('ga_warm_start', LpMinimize)
+    routes = LpVariable.matrix('route', (range(num_warehouses), range(num_stores)), 0)
+
+    problem += lpSum(costs[w, s] * routes[w][s] for w in range(num_warehouses) for s in range(num_stores))
+    for w in range(num_warehouses):
+        problem += lpSum(routes[w]) <= supply[w]
+    for s in range(num_stores):
+        problem += lpSum(routes[w][s] for w in range(num_warehouses)) >= demand[s]
+
+    problem.solve(solver_backend())
+    if LpStatus[problem.status] != 'Optimal':
+        raise ValueError(f'Cannot warm start from an LP relaxation that is {LpStatus[problem.status]}')
+
+    # Transportation problems with integer supply and demand have integral vertices
+    return np.rint([[route.varValue for route in row] for row in routes]).astype(np.int64)
+
+
+def initial_plan(initialise: str, supply: ndarray, demand: ndarray, costs: ndarray) -> ndarray | None:
+    if initialise == 'vogel':
+        return vogel_approximation(supply, demand, costs)
+    if initialise == 'lp':
+        return lp_relaxation_plan(supply, demand, costs)
+
+    return None
+
+
+class SeededInitializer:
+    def __init__(self, plan: ndarray, upper_bound: int, std: float = 50, mutation_rate: float = 0.1):
+        self.genome = plan.ravel()
+        self.upper_bound = upper_bound
+        self.std = std
+        self.mutation_rate = mutation_rate
+        self.created = 0
+
+    def __call__(self) -> ndarray:
+        self.created += 1
+        if self.created == 1:
+            return self.genome.copy()
+
+        # Perturbed copies keep the population diverse around the warm start
+        mutated = np.random.random(self.genome.size) < self.mutation_rate
+        noise = np.random.normal(0, self.std, self.genome.size) * mutated
+
+        return np.clip(np.rint(self.genome + noise), 0, self.upper_bound).astype(self.genome.dtype)
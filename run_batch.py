@@ -0,0 +1,24 @@
+import sys
+
+from args_parser import batch_cli_args, solver_settings
+from problem_1.cbc import get_threads
+from scenarios.batch import read_scenarios, run_batch
+from scenarios.cache import SolutionCache
+
+if __name__ == '__main__':
+    args = batch_cli_args()
+    workers = args.workers or max(1, get_threads() // args.threads_per_solve)
+    settings = solver_settings(args)
+    cache = None
+    if args.cache:
+        cache = SolutionCache(args.cache, max_entries=args.cache_max_entries, max_age=args.cache_max_age)
+
+    if args.output == '-':
+        solved = run_batch(read_scenarios(args.input), sys.stdout, workers, args.threads_per_solve, cache, settings)
+    else:
+        with open(args.output, 'w') as f:
+            solved = run_batch(read_scenarios(args.input), f, workers, args.threads_per_solve, cache, settings)
+
+    if cache is not None:
+        cache.close()
+    print(f'Solved {solved} scenarios with {workers} workers', file=sys.stderr)
@@ -0,0 +1,31 @@
+import json
+import sys
+
+from args_parser import benchmark_cli_args, solver_settings
+from benchmarks.report import compare_results, load_results
+from benchmarks.runner import CROPS, TRANSPORTATION, run_benchmarks
+
+if __name__ == '__main__':
+    args = benchmark_cli_args()
+    cases = []
+    if TRANSPORTATION in args.problems:
+        cases += [(TRANSPORTATION, size) for size in args.sizes]
+    if CROPS in args.problems:
+        cases += [(CROPS, size) for size in args.crop_sizes]
+
+    previous = load_results(args.compare) if args.compare else None
+    records = []
+    with open(args.output, 'a') as f:
+        for record in run_benchmarks(
+                cases, args.techniques, args.seed, solver_settings(args), args.ga_max_routes,
+                ga_target_gap=args.ga_target_gap, ga_generations=args.ga_generations
+        ):
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            records.append(record)
+
+    if previous is not None:
+        regressions = compare_results(previous, records)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
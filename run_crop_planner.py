@@ -0,0 +1,25 @@
+from args_parser import planner_cli_args, solver_settings
+from farmers_problem.planner import (
+    build_crop_model, crop_plan_results, crop_sensitivity, load_crop_plan, print_crop_plan, solve_crop_model
+)
+from instrumentation.phases import phase, recording
+from problem_1.outputs import print_sensitivity
+from solvers.incumbents import print_incumbent
+
+if __name__ == '__main__':
+    args = planner_cli_args()
+    with recording(args.metrics, entry_point='run_crop_planner'):
+        with phase('load'):
+            inputs = load_crop_plan(args.options, args.resources)
+        with phase('build'):
+            model = build_crop_model(inputs)
+        solution = solve_crop_model(
+            model, solver_settings(args).solver(msg=False), print_incumbent if args.stream else None
+        )
+        with phase('extract'):
+            print_crop_plan(crop_plan_results(model, solution))
+        if args.sensitivity is not None:
+            with phase('sensitivity'):
+                index = crop_sensitivity(model, solution)
+                index.save(args.sensitivity)
+            print_sensitivity(index)
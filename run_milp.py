@@ -0,0 +1,4 @@
+from farmers_problem.optimise_milp import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import asyncio
+
+from args_parser import service_cli_args, solver_settings
+from problem_1.cbc import get_threads
+from scenarios.cache import SolutionCache
+from scenarios.service import SolveService, serve
+
+if __name__ == '__main__':
+    args = service_cli_args()
+    workers = args.workers or max(1, get_threads() // args.threads_per_solve)
+    cache = SolutionCache(args.cache) if args.cache else None
+    service = SolveService(workers, args.threads_per_solve, solver_settings(args), cache, args.grace)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.socket))
+    finally:
+        if cache is not None:
+            cache.close()
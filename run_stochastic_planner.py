@@ -0,0 +1,25 @@
+from args_parser import solver_settings, stochastic_cli_args
+from farmers_problem.planner import load_crop_plan
+from farmers_problem.stochastic import (
+    print_stochastic_plan, read_scenarios, sample_scenarios, solve_extensive_form, solve_stochastic_plan
+)
+from instrumentation.phases import phase, recording
+
+if __name__ == '__main__':
+    args = stochastic_cli_args()
+    with recording(args.metrics, entry_point='run_stochastic_planner', method=args.method):
+        with phase('load'):
+            inputs = load_crop_plan(args.options, args.resources)
+            if args.scenarios is not None:
+                scenarios = read_scenarios(inputs, args.scenarios, args.scenario_resources)
+            else:
+                scenarios = sample_scenarios(inputs, args.sample, args.seed)
+        settings = solver_settings(args)
+        if args.method == 'extensive':
+            results = solve_extensive_form(inputs, scenarios, settings)
+        else:
+            results = solve_stochastic_plan(
+                inputs, scenarios, settings, args.workers, args.max_iterations, args.tolerance, verbose=True
+            )
+        with phase('extract'):
+            print_stochastic_plan(results)
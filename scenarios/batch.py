@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+from scenarios.cache import SolutionCache
+from scenarios.solve import scenario_key, scenario_kind, solve_scenario
+from solvers.backends import SolverSettings
+
+
+def read_scenarios(source: str) -> Iterator[dict]:
+    if source == '-':
+        yield from _read_jsonl(sys.stdin, '<stdin>')
+    elif os.path.isdir(source):
+        for file_name in sorted(Path(source).glob('*.json')):
+            with open(file_name) as f:
+                yield {'id': file_name.stem, **json.load(f)}
+    else:
+        with open(source) as f:
+            yield from _read_jsonl(f, Path(source).stem)
+
+
+def _read_jsonl(lines: Iterable[str], source_name: str) -> Iterator[dict]:
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield {'id': f'{source_name}:{line_number}', **json.loads(line)}
+
+
+def _silence() -> None:
+    # Results are streamed to stdout, so the solver output printed in the workers must not end up among them
+    sys.stdout = open(os.devnull, 'w')
+
+
+def _solve(scenario: dict, threads: int, settings: SolverSettings) -> dict:
+    try:
+        return {
+            'id': scenario['id'], 'kind': scenario_kind(scenario),
+            **solve_scenario(scenario, threads, settings=settings)
+        }
+    except Exception as e:
+        return {'id': scenario['id'], 'error': f'{type(e).__name__}: {e}'}
+
+
+def _cached(scenario: dict, cache: SolutionCache, settings: SolverSettings) -> tuple[str | None, dict | None]:
+    try:
+        key = scenario_key(scenario, settings)
+    except Exception:
+        # Malformed scenarios are left for the worker to report
+        return None, None
+
+    result = cache.get(key)
+    if result is None:
+        return key, None
+
+    return key, {'id': scenario['id'], 'kind': scenario_kind(scenario), **result}
+
+
+def run_batch(scenarios: Iterable[dict], output: TextIO, workers: int, threads_per_solve: int,
+              cache: SolutionCache | None = None, settings: SolverSettings = SolverSettings()) -> int:
+    solved = 0
+    pending: dict[Future, str | None] = {}
+
+    def write(result: dict) -> None:
+        nonlocal solved
+        output.write(json.dumps(result) + '\n')
+        solved += 1
+
+    def write_completed(return_when: str) -> None:
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            key = pending.pop(future)
+            result = future.result()
+            # Only the parent touches the cache, so workers never contend for the on-disk store
+            if cache is not None and key is not None and 'error' not in result:
+                cache.put(key, {k: v for k, v in result.items() if k not in ('id', 'kind')})
+            write(result)
+        output.flush()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_silence) as executor:
+        for scenario in scenarios:
+            key = None
+            if cache is not None:
+                key, result = _cached(scenario, cache, settings)
+                if result is not None:
+                    write(result)
+                    continue
+            # Only a bounded number of scenarios are read ahead, so arbitrarily long streams use constant memory
+            if len(pending) >= 2 * workers:
+                write_completed(FIRST_COMPLETED)
+            pending[executor.submit(_solve, scenario, threads_per_solve, settings)] = key
+
+        while pending:
+            write_completed(FIRST_COMPLETED)
+
+    return solved
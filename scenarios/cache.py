@@ -0,0 +1,102 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    # 5 and 5.0 describe the same model, so they must hash the same
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+
+    return value
+
+
+def fingerprint(kind: str, inputs: dict, settings: dict | None = None) -> str:
+    payload = json.dumps(
+        _canonical({'kind': kind, 'inputs': inputs, 'settings': settings or {}}), sort_keys=True,
+        separators=(',', ':')
+    )
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SolutionCache:
+    def __init__(self, path: str | None = None, memory_entries: int = 1024, max_entries: int = 100_000,
+                 max_age: float | None = None):
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS solutions '
+                '(key TEXT PRIMARY KEY, created REAL NOT NULL, accessed REAL NOT NULL, result TEXT NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS solutions_accessed ON solutions (accessed)')
+            self._evict_disk()
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        if key in self._memory:
+            created, result = self._memory[key]
+            if not self._expired(created, now):
+                self._memory.move_to_end(key)
+                return result
+            del self._memory[key]
+
+        if self._db is None:
+            return None
+
+        row = self._db.execute('SELECT created, result FROM solutions WHERE key = ?', (key,)).fetchone()
+        if row is None or self._expired(row[0], now):
+            return None
+
+        with self._db:
+            self._db.execute('UPDATE solutions SET accessed = ? WHERE key = ?', (now, key))
+        result = json.loads(row[1])
+        self._remember(key, row[0], result)
+
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        now = time.time()
+        self._remember(key, now, result)
+        if self._db is not None:
+            with self._db:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO solutions (key, created, accessed, result) VALUES (?, ?, ?, ?)',
+                    (key, now, now, json.dumps(result))
+                )
+            self._evict_disk()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.max_age is not None and now - created > self.max_age
+
+    def _remember(self, key: str, created: float, result: dict) -> None:
+        self._memory[key] = (created, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        with self._db:
+            if self.max_age is not None:
+                self._db.execute('DELETE FROM solutions WHERE created < ?', (time.time() - self.max_age,))
+            # Least recently used entries go first once the store is over size
+            self._db.execute(
+                'DELETE FROM solutions WHERE key IN '
+                '(SELECT key FROM solutions ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.max_entries,)
+            )
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from multiprocessing.managers import SyncManager
+from typing import Any
+
+import numpy as np
+
+from problem_1.models import Inputs as SupplyChainInputs
+from scenarios.cache import SolutionCache, fingerprint
+from scenarios.solve import scenario_inputs, scenario_key, scenario_kind, solve_scenario
+from solvers.backends import SolverSettings
+
+GA = 'ga'
+METHODS = ['milp', GA]
+GA_OPTIONS = ['generations', 'target_fitness', 'adaptive', 'repair', 'integer']
+MAX_BODY = 64 * 2 ** 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+            500: 'Internal Server Error', 504: 'Gateway Timeout'}
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def request_key(request: dict, settings: SolverSettings = SolverSettings()) -> str:
+    method = request.get('method', 'milp')
+    if method not in METHODS:
+        raise ValueError(f'Unknown method {method}, expected one of {METHODS}')
+    if method == 'milp':
+        return scenario_key(request, settings)
+
+    options = request.get('ga', {})
+    if unknown := set(options) - set(GA_OPTIONS):
+        raise ValueError(f'Unknown GA options {sorted(unknown)}, expected some of {GA_OPTIONS}')
+    # Solver settings do not change a GA run, so they are left out of its key
+    return fingerprint(GA, asdict(scenario_inputs(request)), options)
+
+
+def _ignore_interrupts() -> None:
+    # Ctrl-C reaches the whole process group, but only the server should act on it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _warm_up() -> None:
+    _ignore_interrupts()
+    # Each worker pays for the solver and GA imports once, when it starts rather than on its first request
+    import leap_ec.algorithm  # noqa: F401
+    import optimise_problem_2  # noqa: F401
+
+    # Solves print progress, which has nowhere useful to go from a worker
+    sys.stdout = open(os.devnull, 'w')
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _solve_ga(request: dict, deadline: float | None, cancelled: Any) -> dict:
+    from leap_ec import context
+
+    from optimise_problem_2 import clean_inputs, run_ga
+    from problem_1.network import Network
+
+    inputs = scenario_inputs(request)
+    if not isinstance(inputs, SupplyChainInputs):
+        raise ValueError(f'The genetic algorithm only solves supply chain scenarios, not {scenario_kind(request)}')
+    warehouse_index, store_index, route_costs = inputs.routes()
+    costs = np.full((len(inputs.warehouses), len(inputs.stores)), np.nan)
+    costs[warehouse_index, store_index] = route_costs
+    ga_inputs = clean_inputs(
+        Network(inputs.warehouses, inputs.stores, inputs.supply_array(), inputs.demand_array(), costs)
+    )
+
+    def interrupt() -> bool:
+        return cancelled.is_set() or (deadline is not None and time.time() >= deadline)
+
+    # The best plan is tracked in leap's global context, which outlives a run in a reused worker
+    context.pop('track', None)
+    best_entry = run_ga(**ga_inputs, plot_formats=(), interrupt=interrupt, **request.get('ga', {}))
+    plan = best_entry['genome'].reshape(costs.shape)
+
+    return {
+        'status': 'Interrupted' if interrupt() else 'Finished',
+        'routes': {
+            f'route_{inputs.warehouses[w]}_{inputs.stores[s]}': plan[w, s].item() for w, s in zip(*np.nonzero(plan))
+        },
+        'total_cost': float(best_entry['fitness']),
+        'generation': best_entry['generation'],
+    }
+
+
+def _solve(request: dict, settings: SolverSettings, threads: int, deadline: float | None, cancelled: Any) -> dict:
+    # Jobs cancelled while queued are dropped without starting
+    if cancelled.is_set():
+        return {'status': 'Cancelled'}
+    if request.get('method', 'milp') == GA:
+        return _solve_ga(request, deadline, cancelled)
+
+    # A solve already handed to the MILP backend cannot be interrupted, so the deadline becomes its time limit
+    if deadline is not None:
+        remaining = max(1.0, deadline - time.time())
+        settings = replace(settings, time_limit=min(settings.time_limit or remaining, remaining))
+
+    return solve_scenario(request, threads, settings=settings)
+
+
+@dataclass
+class _Job:
+    future: asyncio.Future
+    cancelled: Any
+    deadline: float | None
+    waiters: int = 0
+    stopped: bool = False
+
+    def covers(self, deadline: float | None) -> bool:
+        """Whether this job runs at least until `deadline`, so a request with that deadline can share it."""
+        return self.deadline is None or (deadline is not None and self.deadline >= deadline)
+
+
+class SolveService:
+    """Solves requests in a pool of warm worker processes, sharing one solve between identical requests in flight."""
+
+    def __init__(self, workers: int, threads_per_solve: int = 1, settings: SolverSettings = SolverSettings(),
+                 cache: SolutionCache | None = None, grace: float = 1.0):
+        self.workers = workers
+        self.threads_per_solve = threads_per_solve
+        self.settings = settings
+        self.cache = cache
+        self.grace = grace
+        # Identical requests with later deadlines than a running job get a job of their own, so a key can have several
+        self._jobs: dict[str, list[_Job]] = {}
+        self._executor: ProcessPoolExecutor | None = None
+        self._manager: SyncManager | None = None
+
+    async def start(self) -> None:
+        # Cancellation events are shared with the workers through a manager, as pool tasks cannot take plain ones
+        self._manager = SyncManager()
+        self._manager.start(_ignore_interrupts)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)))
+
+    def close(self) -> None:
+        for key in list(self._jobs):
+            self.cancel(key)
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    def in_flight(self) -> list[str]:
+        return list(self._jobs)
+
+    def cancel(self, key: str) -> bool:
+        jobs = list(self._jobs.get(key, []))
+        for job in jobs:
+            self._stop(key, job)
+
+        return bool(jobs)
+
+    def _stop(self, key: str, job: _Job) -> None:
+        # The worker sees the event at its next check and returns early; its result is then not cached
+        job.cancelled.set()
+        job.stopped = True
+        self._forget(key, job)
+
+    def _forget(self, key: str, job: _Job) -> None:
+        jobs = self._jobs.get(key, [])
+        if job in jobs:
+            jobs.remove(job)
+            if not jobs:
+                del self._jobs[key]
+
+    def _finished(self, key: str, job: _Job, future: asyncio.Future) -> None:
+        self._forget(key, job)
+        if self.cache is None or future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        # Only complete solves are worth answering later requests with
+        if job.deadline is None and not job.stopped and result.get('status') not in ('Interrupted', 'Cancelled'):
+            self.cache.put(key, result)
+
+    async def solve(self, request: dict) -> dict:
+        started = time.perf_counter()
+        request = dict(request)
+        timeout = request.pop('deadline', None)
+        key = request_key(request, self.settings)
+        response = {'key': key, 'coalesced': False, 'cached': False}
+
+        if self.cache is not None and (result := self.cache.get(key)) is not None:
+            return {**response, 'cached': True, 'seconds': time.perf_counter() - started, **result}
+
+        deadline = None if timeout is None else time.time() + timeout
+        # A job stopping before this request's deadline could hand it an interrupted or time-limited result
+        job = next((job for job in self._jobs.get(key, []) if job.covers(deadline)), None)
+        if job is None:
+            cancelled = self._manager.Event()
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, _solve, request, self.settings, self.threads_per_solve, deadline, cancelled
+            )
+            job = _Job(future, cancelled, deadline)
+            self._jobs.setdefault(key, []).append(job)
+            future.add_done_callback(lambda f: self._finished(key, job, f))
+        else:
+            response['coalesced'] = True
+
+        job.waiters += 1
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(job.future), None if timeout is None else timeout + self.grace
+            )
+        except TimeoutError:
+            raise DeadlineExceeded(f'No result within the {timeout}s deadline') from None
+        finally:
+            job.waiters -= 1
+            # Nobody is left to read the result, so the worker is freed as soon as it notices
+            if job.waiters == 0 and not job.future.done() and not job.stopped:
+                self._stop(key, job)
+
+        return {**response, 'seconds': time.perf_counter() - started, **result}
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+    method, path, _ = (await reader.readline()).decode('latin-1').split(' ', 2)
+    headers = {}
+    while (line := (await reader.readline()).decode('latin-1').strip()):
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY:
+        raise OverflowError(f'Request bodies are limited to {MAX_BODY} bytes')
+
+    return method, path, await reader.readexactly(length) if length else b''
+
+
+async def _write_response(writer: asyncio.StreamWriter, status: int, body: dict) -> None:
+    payload = json.dumps(body).encode()
+    writer.write(
+        f'HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + payload
+    )
+    await writer.drain()
+
+
+async def _respond(service: SolveService, reader: asyncio.StreamReader, method: str, path: str,
+                   body: bytes) -> tuple[int, dict] | None:
+    if path == '/health':
+        return (200, {'workers': service.workers, 'in_flight': service.in_flight()}) if method == 'GET' else (405, {})
+    if path.startswith('/jobs/'):
+        if method != 'DELETE':
+            return 405, {}
+        key = path.removeprefix('/jobs/')
+        return (200, {'key': key, 'cancelled': True}) if service.cancel(key) else (404, {'error': f'No job {key}'})
+    if path != '/solve':
+        return 404, {'error': f'No endpoint {path}'}
+    if method != 'POST':
+        return 405, {}
+
+    solve = asyncio.ensure_future(service.solve(json.loads(body)))
+    # Clients send nothing more after the request, so a read returning only when they hang up
+    disconnected = asyncio.ensure_future(reader.read(1))
+    await asyncio.wait([solve, disconnected], return_when=asyncio.FIRST_COMPLETED)
+    disconnected.cancel()
+    if not solve.done():
+        solve.cancel()
+        return None
+
+    return 200, solve.result()
+
+
+async def handle_connection(service: SolveService, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+    try:
+        try:
+            method, path, body = await _read_request(reader)
+        except OverflowError as e:
+            await _write_response(writer, 413, {'error': str(e)})
+            return
+        except ValueError:
+            await _write_response(writer, 400, {'error': 'Malformed HTTP request'})
+            return
+
+        try:
+            response = await _respond(service, reader, method, path, body)
+        except DeadlineExceeded as e:
+            response = 504, {'error': str(e)}
+        except (ValueError, KeyError, TypeError) as e:
+            response = 400, {'error': f'{type(e).__name__}: {e}'}
+        except Exception as e:
+            response = 500, {'error': f'{type(e).__name__}: {e}'}
+        if response is not None:
+            await _write_response(writer, *response)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service: SolveService, host: str = '127.0.0.1', port: int = 8080, socket: str | None = None) -> None:
+    await service.start()
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    # Services are usually stopped with SIGTERM, which should shut the workers down as cleanly as Ctrl-C does
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stopping.set)
+    try:
+        if socket is not None:
+            server = await asyncio.start_unix_server(lambda r, w: handle_connection(service, r, w), socket)
+        else:
+            server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+        print(f'Serving on {socket or f"http://{host}:{port}"} with {service.workers} workers', file=sys.stderr)
+        await stopping.wait()
+        server.close()
+    finally:
+        service.close()
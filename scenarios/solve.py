@@ -0,0 +1,62 @@
+from dataclasses import asdict
+
+from farmers_problem.models import Inputs as FarmersInputs
+from farmers_problem.optimise import solve_problem
+from problem_1.models import Inputs as SupplyChainInputs
+from problem_1.outputs import solution_results
+from problem_1.supply_chain import solve_supply_chain
+from scenarios.cache import SolutionCache, fingerprint
+from solvers.backends import SolverSettings
+
+SUPPLY_CHAIN = 'supply_chain'
+FARMERS = 'farmers'
+
+
+def scenario_kind(scenario: dict) -> str:
+    if 'kind' in scenario:
+        return scenario['kind']
+
+    # Plain problem input files are recognised by their fields
+    inputs = scenario.get('inputs', scenario)
+    if 'supply' in inputs:
+        return SUPPLY_CHAIN
+    if 'fertilizer_available' in inputs:
+        return FARMERS
+
+    raise ValueError(f'Cannot tell what kind of scenario has fields {sorted(set(inputs) - {"id"})}')
+
+
+def scenario_inputs(scenario: dict) -> SupplyChainInputs | FarmersInputs:
+    inputs = scenario.get('inputs', scenario)
+    kind = scenario_kind(scenario)
+    if kind == SUPPLY_CHAIN:
+        return SupplyChainInputs(supply=inputs['supply'], demand=inputs['demand'], costs=inputs['costs'])
+    if kind == FARMERS:
+        return FarmersInputs(**{field: inputs[field] for field in FarmersInputs.__dataclass_fields__})
+
+    raise ValueError(f'Unknown scenario kind: {kind}')
+
+
+def scenario_key(scenario: dict, settings: SolverSettings = SolverSettings()) -> str:
+    # Thread counts change how long a solve takes, not its answer, so they are left out of the key
+    return fingerprint(scenario_kind(scenario), asdict(scenario_inputs(scenario)), settings.key())
+
+
+def solve_scenario(scenario: dict, threads: int = 1, cache: SolutionCache | None = None,
+                   settings: SolverSettings = SolverSettings()) -> dict:
+    if cache is not None:
+        key = scenario_key(scenario, settings)
+        result = cache.get(key)
+        if result is None:
+            result = solve_scenario(scenario, threads, settings=settings)
+            cache.put(key, result)
+        return result
+
+    inputs = scenario_inputs(scenario)
+    solver = settings.solver(threads, msg=False)
+    if isinstance(inputs, SupplyChainInputs):
+        problem, _ = solve_supply_chain(inputs, solver, verbose=False)
+        return solution_results(problem)
+
+    return solve_problem(inputs, solver)
+
@@ -0,0 +1,50 @@
+import os
+from dataclasses import dataclass
+
+from pulp import HiGHS, LpSolver, PulpSolverError
+
+from problem_1.cbc import coin_cmd_solver
+from solvers.scipy_solver import ScipySolver
+
+BACKENDS = ['cbc', 'highs', 'scipy']
+# Matrix models are written to MPS for CBC or handed to scipy's HiGHS as arrays
+MATRIX_BACKENDS = ['cbc', 'scipy']
+
+
+@dataclass(frozen=True)
+class SolverSettings:
+    backend: str | None = None
+    time_limit: float | None = None  # seconds; the best solution found so far is returned when it runs out
+    gap_rel: float | None = None
+    gap_abs: float | None = None
+
+    def solver(self, threads: int | None = None, msg: bool = True) -> LpSolver:
+        return solver_backend(self.backend, threads, msg, self.time_limit, self.gap_rel, self.gap_abs)
+
+    def key(self) -> dict:
+        return {'solver': self.backend or default_backend(), 'time_limit': self.time_limit,
+                'gap_rel': self.gap_rel, 'gap_abs': self.gap_abs}
+
+
+def default_backend() -> str:
+    return os.environ.get('OPTIMISATION_SOLVER', 'cbc')
+
+
+def solver_backend(name: str | None = None, threads: int | None = None, msg: bool = True,
+                   time_limit: float | None = None, gap_rel: float | None = None,
+                   gap_abs: float | None = None) -> LpSolver:
+    name = name or default_backend()
+    if name == 'cbc':
+        return coin_cmd_solver(threads, msg, time_limit, gap_rel, gap_abs)
+    if name == 'highs':
+        solver = HiGHS(msg=msg, threads=threads, timeLimit=time_limit, gapRel=gap_rel, gapAbs=gap_abs)
+        if not solver.available():
+            raise PulpSolverError('The highs backend needs highspy installed (uv sync --extra highs)')
+        return solver
+    if name == 'scipy':
+        if gap_abs is not None:
+            raise ValueError('The scipy backend only supports a relative gap target')
+        # HiGHS through scipy is single threaded here, so threads is ignored
+        return ScipySolver(msg=msg, timeLimit=time_limit, gapRel=gap_rel)
+
+    raise ValueError(f'Unknown solver backend {name}, expected one of {BACKENDS}')
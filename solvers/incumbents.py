@@ -0,0 +1,94 @@
+import copy
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+from pulp import COIN_CMD
+
+T = TypeVar('T')
+
+# CBC reports every new integer solution, and the best bound every 100 nodes, always as a minimisation
+INTEGER_SOLUTION = re.compile(r'Cbc\d{4}I Integer solution of (\S+) found.*\(([\d.]+) seconds\)')
+PROGRESS = re.compile(r'Cbc0010I After \d+ nodes, \d+ on tree, (\S+) best solution, best possible (\S+) '
+                      r'\(([\d.]+) seconds\)')
+NO_SOLUTION = 1e50
+
+
+@dataclass
+class Incumbent:
+    objective: float
+    bound: float | None
+    gap: float | None
+    seconds: float
+
+
+class CbcLogParser:
+    def __init__(self, sense: int = 1):
+        self.sense = sense
+        self.objective: float | None = None
+        self.bound: float | None = None
+
+    def parse(self, line: str) -> Incumbent | None:
+        if match := INTEGER_SOLUTION.search(line):
+            objective, bound, seconds = float(match[1]), self.bound, float(match[2])
+        elif match := PROGRESS.search(line):
+            objective, bound, seconds = float(match[1]), float(match[2]), float(match[3])
+            if abs(objective) >= NO_SOLUTION:
+                self.bound = bound
+                return None
+        else:
+            return None
+
+        if (objective, bound) == (self.objective, self.bound):
+            return None
+        self.objective, self.bound = objective, bound
+
+        gap = None if bound is None else abs(objective - bound) / max(abs(objective), 1e-9)
+        return Incumbent(self.sense * objective, None if bound is None else self.sense * bound, gap, seconds)
+
+
+def stream_incumbents(solver: COIN_CMD, solve: Callable[[COIN_CMD], T], on_incumbent: Callable[[Incumbent], None],
+                      sense: int = 1, poll_interval: float = 0.05) -> T:
+    """Run `solve` with a copy of `solver` that logs to a file, calling `on_incumbent` for every improvement
+    read from that log while the solve is still running."""
+    if not isinstance(solver, COIN_CMD):
+        raise ValueError('Incumbents can only be streamed from the cbc backend')
+
+    parser = CbcLogParser(sense)
+    with tempfile.TemporaryDirectory() as tmp_dir, ThreadPoolExecutor(max_workers=1) as executor:
+        log_path = os.path.join(tmp_dir, 'cbc.log')
+        logging_solver = copy.copy(solver)
+        logging_solver.optionsDict = {**solver.optionsDict, 'logPath': log_path}
+        future = executor.submit(solve, logging_solver)
+
+        pending = ''
+        log = None
+        while True:
+            done = future.done()
+            if log is None and os.path.exists(log_path):
+                log = open(log_path)
+            if log is not None:
+                pending += log.read()
+                *lines, pending = pending.split('\n')
+                for line in lines:
+                    if (incumbent := parser.parse(line)) is not None:
+                        on_incumbent(incumbent)
+            # The log is read once more after the solve finishes, so the last lines are never missed
+            if done:
+                break
+            time.sleep(poll_interval)
+
+        if log is not None:
+            log.close()
+
+        return future.result()
+
+
+def print_incumbent(incumbent: Incumbent) -> None:
+    bound = '-' if incumbent.bound is None else f'{incumbent.bound:.2f}'
+    gap = '-' if incumbent.gap is None else f'{incumbent.gap:.2%}'
+    print(f'[{incumbent.seconds:.2f}s] Incumbent {incumbent.objective:.2f} | bound {bound} | gap {gap}', flush=True)
@@ -0,0 +1,131 @@
+from dataclasses import dataclass
+
+import numpy as np
+from numpy import ndarray
+from pulp import LpInteger, LpSolver, PulpSolverError, const
+
+
+@dataclass
+class ArraySolution:
+    status: str
+    values: ndarray
+    reduced_costs: ndarray
+    row_activity: ndarray
+    duals: ndarray
+
+
+def solve_arrays(objective: ndarray, matrix, row_lower: ndarray, row_upper: ndarray, col_lower: ndarray,
+                 col_upper: ndarray, integrality: ndarray, sense: int = 1, time_limit: float | None = None,
+                 gap_rel: float | None = None, msg: bool = False) -> ArraySolution:
+    """Minimise `sense * objective` over `row_lower <= matrix @ x <= row_upper` with HiGHS, in process."""
+    from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+    from scipy.sparse import csr_array, vstack
+
+    matrix = csr_array(matrix, shape=(len(row_lower), len(objective)))
+    cost = sense * np.asarray(objective, dtype=np.float64)
+    options = {'disp': msg}
+    if time_limit is not None:
+        options['time_limit'] = time_limit
+
+    if np.any(integrality):
+        if gap_rel is not None:
+            options['mip_rel_gap'] = gap_rel
+        result = milp(cost, integrality=np.asarray(integrality, dtype=np.int8),
+                      bounds=Bounds(col_lower, col_upper),
+                      constraints=LinearConstraint(matrix, row_lower, row_upper), options=options)
+        values = result.x
+        reduced_costs = np.zeros(len(cost))
+        duals = np.zeros(matrix.shape[0])
+    else:
+        # linprog reports row marginals, so continuous models get duals and reduced costs like CBC's.
+        # Its rows are one-sided, so ranged rows are split into an upper and a negated lower row
+        equal = row_lower == row_upper
+        upper_rows = np.flatnonzero(np.isfinite(row_upper) & ~equal)
+        lower_rows = np.flatnonzero(np.isfinite(row_lower) & ~equal)
+        equal_rows = np.flatnonzero(equal)
+        inequalities = {}
+        if len(upper_rows) or len(lower_rows):
+            inequalities = {
+                'A_ub': vstack([matrix[upper_rows], -matrix[lower_rows]]),
+                'b_ub': np.concatenate([row_upper[upper_rows], -row_lower[lower_rows]]),
+            }
+        if len(equal_rows):
+            inequalities.update(A_eq=matrix[equal_rows], b_eq=row_lower[equal_rows])
+        result = linprog(cost, bounds=np.column_stack([col_lower, col_upper]), method='highs',
+                         options=options, **inequalities)
+        values = result.x
+        reduced_costs = np.zeros(len(cost))
+        duals = np.zeros(matrix.shape[0])
+        if values is not None:
+            reduced_costs = sense * (result.lower.marginals + result.upper.marginals)
+            if 'A_ub' in inequalities:
+                duals[upper_rows] += result.ineqlin.marginals[:len(upper_rows)]
+                duals[lower_rows] -= result.ineqlin.marginals[len(upper_rows):]
+            if len(equal_rows):
+                duals[equal_rows] = result.eqlin.marginals
+            duals *= sense
+
+    # Like CBC through PuLP, a run stopped by its time limit with an incumbent still counts as solved
+    if values is not None and result.status in (0, 1):
+        status = 'Optimal'
+    else:
+        status = {2: 'Infeasible', 3: 'Unbounded'}.get(result.status, 'Not Solved')
+        values = np.zeros(len(cost))
+
+    return ArraySolution(status, values, reduced_costs, matrix @ values, duals)
+
+
+class ScipySolver(LpSolver):
+    name = 'SCIPY'
+
+    def available(self) -> bool:
+        try:
+            import scipy.optimize
+        except ImportError:
+            return False
+
+        return True
+
+    def actualSolve(self, lp) -> int:
+        if not self.available():
+            raise PulpSolverError('The scipy backend needs scipy installed (uv sync --extra scipy)')
+
+        variables = lp.variables()
+        positions = {variable.name: i for i, variable in enumerate(variables)}
+        objective = np.zeros(len(variables))
+        for variable, coefficient in lp.objective.items():
+            objective[positions[variable.name]] = coefficient
+
+        rows, columns, coefficients, row_lower, row_upper = [], [], [], [], []
+        for row, constraint in enumerate(lp.constraints.values()):
+            for variable, coefficient in constraint.items():
+                rows.append(row)
+                columns.append(positions[variable.name])
+                coefficients.append(coefficient)
+            rhs = -constraint.constant
+            row_lower.append(-np.inf if constraint.sense == const.LpConstraintLE else rhs)
+            row_upper.append(np.inf if constraint.sense == const.LpConstraintGE else rhs)
+
+        from scipy.sparse import coo_array
+        matrix = coo_array((coefficients, (rows, columns)), shape=(len(row_lower), len(variables)))
+        col_lower = np.array([-np.inf if v.lowBound is None else v.lowBound for v in variables], dtype=np.float64)
+        col_upper = np.array([np.inf if v.upBound is None else v.upBound for v in variables], dtype=np.float64)
+        integrality = np.array([self.mip and v.cat == LpInteger for v in variables], dtype=bool)
+
+        solution = solve_arrays(
+            objective, matrix, np.array(row_lower, dtype=np.float64), np.array(row_upper, dtype=np.float64),
+            col_lower, col_upper, integrality, lp.sense, self.timeLimit, self.optionsDict.get('gapRel'), self.msg
+        )
+
+        names = list(positions)
+        lp.assignVarsVals(dict(zip(names, solution.values.tolist())))
+        if not integrality.any():
+            lp.assignVarsDj(dict(zip(names, solution.reduced_costs.tolist())))
+            lp.assignConsPi(dict(zip(lp.constraints, solution.duals.tolist())))
+        status = {
+            'Optimal': const.LpStatusOptimal, 'Infeasible': const.LpStatusInfeasible,
+            'Unbounded': const.LpStatusUnbounded
+        }.get(solution.status, const.LpStatusNotSolved)
+        lp.assignStatus(status)
+
+        return status
@@ -0,0 +1,35 @@
+import time
+
+from args_parser import solver_settings, what_if_cli_args
+from problem_1.sensitivity import load_sensitivity_index
+
+if __name__ == '__main__':
+    args = what_if_cli_args()
+    index = load_sensitivity_index(args.index)
+    solver = solver_settings(args).solver(msg=False)
+    print(f'Base objective = {index.objective}')
+    if index.answer_status == 'Fixed-MIP' and not args.resolve:
+        print('Answers from the index keep the integer decisions of the saved plan fixed (Fixed-MIP); re-solving '
+              'the MILP with --resolve may find a better plan')
+
+    # Right-hand side answers and basic cost ranges solve with the basis, which a loaded index has not factored yet
+    if not args.resolve:
+        index.factor()
+
+    questions = [('rhs', name, float(change)) for name, change in args.rhs]
+    questions += [('cost', name, float(change)) for name, change in args.cost]
+    for kind, name, change in questions:
+        start = time.perf_counter()
+        if kind == 'rhs':
+            position = index.row(name)
+            low, high = index.rhs_range(position)
+            answer = index.what_if_rhs(position, change, solver, args.resolve)
+        else:
+            position = index.column(name)
+            low, high = index.cost_range(position)
+            answer = index.what_if_cost(position, change, solver, args.resolve)
+        elapsed = time.perf_counter() - start
+
+        how = f'from the index in {elapsed * 1e6:.0f}µs' if answer.from_index else f're-solved in {elapsed:.3f}s'
+        print(f'{name} {change:+g} (range {low:g} to {high:+g}): {answer.status}, objective = {answer.objective} '
+              f'({how})')